@@ -0,0 +1,265 @@
+"""
+Benchmark suite for the prediction hot paths
+Times model loading, prediction, crop comparison and history writes, and saves the results as JSON
+
+Usage:
+    python benchmark.py                                  # run everything
+    python benchmark.py --filter predict                 # only matching cases
+    python benchmark.py --compare benchmark_results.json # flag regressions against an older run
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from models.ml_predictor import MLCropPredictor
+from models.predictor import CropPredictor
+from models.registry import DEFAULT_MODEL_PATH
+from utils.data_handler import DataHandler
+
+SAMPLE_INPUT = {'crop_type': 'wheat', 'nitrogen': 50, 'phosphorus': 50, 'potassium': 50,
+                'temperature': 25, 'humidity': 65, 'ph': 6.5, 'rainfall': 100}
+COMPARE_CROPS = ['wheat', 'rice', 'maize']
+HISTORY_SIZES = [1_000, 100_000, 1_000_000]
+HISTORY_BACKENDS = ['csv', 'sqlite']
+BATCH_ROWS = 1000
+
+# A case this much slower than the baseline is reported as a regression
+REGRESSION_THRESHOLD = 1.2
+
+BENCHMARKS = []
+
+def benchmark(name, repeats=20, number=1):
+    """Register `func(context)` as a case timed `number` calls at a time, `repeats` times"""
+    def register(func):
+        BENCHMARKS.append({'name': name, 'func': func, 'repeats': repeats, 'number': number})
+        return func
+    return register
+
+# ---- Model loading --------------------------------------------------------
+
+@benchmark('load/mmap_store', repeats=10)
+def bench_load_mmap(context):
+    MLCropPredictor(model_path=context['model_path'])
+
+@benchmark('load/pickle', repeats=5)
+def bench_load_pickle(context):
+    MLCropPredictor(model_path=context['model_path'], use_mmap=False)
+
+# ---- MLCropPredictor ------------------------------------------------------
+
+@benchmark('ml_predictor/predict_single_row', repeats=20, number=10)
+def bench_ml_single(context):
+    context['ml_predictor'].predict(SAMPLE_INPUT)
+
+@benchmark(f'ml_predictor/predict_batch_{BATCH_ROWS}_rows', repeats=10)
+def bench_ml_batch(context):
+    context['ml_predictor'].predict_batch(context['batch'])
+
+# ---- CropPredictor ----------------------------------------------------------
+
+@benchmark('crop_predictor/predict_ml', repeats=20, number=10)
+def bench_crop_predictor_ml(context):
+    context['crop_predictor_ml'].predict(SAMPLE_INPUT)
+
+@benchmark('crop_predictor/predict_rule_based', repeats=20, number=10)
+def bench_crop_predictor_rules(context):
+    context['crop_predictor_rules'].predict(SAMPLE_INPUT)
+
+@benchmark('crop_predictor/compare_3_crops', repeats=20, number=5)
+def bench_compare(context):
+    # Same loop as the Compare page
+    for crop in COMPARE_CROPS:
+        context['crop_predictor_ml'].predict({**SAMPLE_INPUT, 'crop_type': crop})
+
+@benchmark('crop_predictor/compare_crops_all', repeats=20, number=5)
+def bench_compare_crops(context):
+    context['crop_predictor_ml'].compare_crops(SAMPLE_INPUT)
+
+# ---- History writes --------------------------------------------------------
+
+def history_cases(sizes, backends=HISTORY_BACKENDS):
+    """save_prediction, get_statistics and load_history cases per history backend and size"""
+    def save(context, backend, size):
+        context['handlers'][backend, size].save_prediction(context['prediction'], SAMPLE_INPUT)
+    
+    def statistics(context, backend, size):
+        context['handlers'][backend, size].get_statistics()
+    
+    def latest_page(context, backend, size):
+        context['handlers'][backend, size].load_history(100)
+    
+    cases = []
+    for backend in backends:
+        for size in sizes:
+            repeats = 3 if size >= 1_000_000 else 10
+            cases.append({'name': f'data_handler/{backend}/save_prediction_{size}_rows', 'repeats': repeats,
+                          'number': 1, 'size': size, 'backend': backend,
+                          'func': lambda context, backend=backend, size=size: save(context, backend, size)})
+            cases.append({'name': f'data_handler/{backend}/get_statistics_{size}_rows', 'repeats': repeats,
+                          'number': 1, 'size': size, 'backend': backend,
+                          'func': lambda context, backend=backend, size=size: statistics(context, backend, size)})
+            cases.append({'name': f'data_handler/{backend}/load_history_{size}_rows', 'repeats': repeats,
+                          'number': 1, 'size': size, 'backend': backend,
+                          'func': lambda context, backend=backend, size=size: latest_page(context, backend, size)})
+    return cases
+
+def build_context(model_path, histories, work_dir):
+    """Everything the cases share, built once outside the timed region"""
+    ml_predictor = MLCropPredictor(model_path=model_path)
+    if ml_predictor.classifier_model is None:
+        raise SystemExit(f"❌ No trained model at '{model_path}'. Run: python train_model.py")
+    
+    rng = np.random.default_rng(0)
+    batch = pd.DataFrame({
+        'N': rng.uniform(0, 140, BATCH_ROWS), 'P': rng.uniform(5, 145, BATCH_ROWS),
+        'K': rng.uniform(5, 205, BATCH_ROWS), 'temperature': rng.uniform(10, 40, BATCH_ROWS),
+        'humidity': rng.uniform(15, 100, BATCH_ROWS), 'ph': rng.uniform(4, 9, BATCH_ROWS),
+        'rainfall': rng.uniform(20, 300, BATCH_ROWS)
+    })
+    
+    crop_predictor_ml = CropPredictor(model_path=model_path, seed=42)
+    prediction = crop_predictor_ml.predict(SAMPLE_INPUT)
+    
+    handlers = {}
+    for backend, size in histories:
+        history_dir = os.path.join(work_dir, f'history_{backend}_{size}')
+        os.makedirs(history_dir)
+        # The sqlite handler imports the seeded CSV once, outside the timed region
+        _seed_history(os.path.join(history_dir, 'historical_data.csv'), size, rng)
+        handlers[backend, size] = DataHandler(history_dir, backend=backend)
+    
+    return {
+        'model_path': model_path,
+        'ml_predictor': ml_predictor,
+        'batch': batch,
+        'crop_predictor_ml': crop_predictor_ml,
+        'crop_predictor_rules': CropPredictor(use_ml=False, seed=42),
+        'prediction': prediction,
+        'handlers': handlers
+    }
+
+def _seed_history(path, size, rng):
+    """Write a synthetic history file with `size` rows in DataHandler's column order"""
+    crops = np.array(['wheat', 'rice', 'maize', 'cotton', 'sugarcane'])
+    qualities = np.array(['Excellent', 'Good', 'Average', 'Poor'])
+    start = pd.Timestamp('2024-01-01')
+    pd.DataFrame({
+        'timestamp': (start + pd.to_timedelta(np.arange(size), unit='m')).strftime('%Y-%m-%d %H:%M:%S'),
+        'crop': crops[rng.integers(0, len(crops), size)],
+        'nitrogen': rng.integers(0, 140, size),
+        'phosphorus': rng.integers(5, 145, size),
+        'potassium': rng.integers(5, 205, size),
+        'temperature': rng.uniform(10, 40, size).round(1),
+        'humidity': rng.uniform(15, 100, size).round(1),
+        'ph': rng.uniform(4, 9, size).round(2),
+        'rainfall': rng.uniform(20, 300, size).round(1),
+        'score': rng.uniform(30, 100, size).round(2),
+        'quality': qualities[rng.integers(0, len(qualities), size)],
+        'estimated_yield': rng.uniform(1, 80, size).round(2),
+        'growth_duration': rng.uniform(60, 365, size).round(1)
+    }).to_csv(path, index=False)
+
+def run_case(case, context):
+    case['func'](context)  # warm-up
+    timings = []
+    for _ in range(case['repeats']):
+        start = time.perf_counter()
+        for _ in range(case['number']):
+            case['func'](context)
+        timings.append((time.perf_counter() - start) / case['number'])
+    
+    timings = np.array(timings) * 1000
+    return {
+        'repeats': case['repeats'],
+        'number': case['number'],
+        'min_ms': round(float(timings.min()), 4),
+        'median_ms': round(float(np.median(timings)), 4),
+        'mean_ms': round(float(timings.mean()), 4),
+        'p95_ms': round(float(np.percentile(timings, 95)), 4),
+        'max_ms': round(float(timings.max()), 4)
+    }
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+def compare(results, baseline_path):
+    """Print median ratios against a previous results file; returns the regressed case names"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    
+    print()
+    print(f"📊 Compared with {baseline_path} (commit {baseline['environment'].get('commit')}):")
+    regressions = []
+    for name, result in results.items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        ratio = result['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+        flag = '⚠️ ' if ratio > REGRESSION_THRESHOLD else '   '
+        if ratio > REGRESSION_THRESHOLD:
+            regressions.append(name)
+        print(f"{flag}{name:45s} {old['median_ms']:10.3f} -> {result['median_ms']:10.3f} ms ({ratio:.2f}x)")
+    return regressions
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the prediction hot paths")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="Pickle model path")
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the results")
+    parser.add_argument('--compare', default=None, help="Earlier results file to compare against")
+    parser.add_argument('--filter', default=None, help="Only run cases whose name contains this")
+    parser.add_argument('--sizes', type=int, nargs='+', default=HISTORY_SIZES,
+                        help="History sizes for the history cases")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    cases = [
+        case for case in BENCHMARKS + history_cases(args.sizes)
+        if args.filter is None or args.filter in case['name']
+    ]
+    histories = sorted({(case['backend'], case['size']) for case in cases if 'size' in case})
+    
+    work_dir = tempfile.mkdtemp(prefix='agrismart-bench-')
+    try:
+        print("⚙️ Preparing benchmark data...")
+        context = build_context(args.model, histories, work_dir)
+        
+        results = {}
+        for case in cases:
+            results[case['name']] = run_case(case, context)
+            print(f"   • {case['name']:45s} median {results[case['name']]['median_ms']:10.3f} ms")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+    
+    if args.compare:
+        regressions = compare(results, args.compare)
+        if regressions:
+            print(f"\n⚠️ {len(regressions)} case(s) slower than {REGRESSION_THRESHOLD}x the baseline")
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
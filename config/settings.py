@@ -171,6 +171,33 @@ ALERT_THRESHOLDS = {
     'rainfall_min': 30
 }
 
+# Prediction memoization (caching needs the seeded, deterministic jitter)
+PREDICTION_CACHE = {
+    'seed': 42,
+    'maxsize': 2048,
+    'ttl_seconds': 3600
+}
+
+# Per-stage timing of CropPredictor.predict (no overhead while disabled)
+STAGE_TIMINGS = {
+    'enabled': False
+}
+
+# Prediction history backend: 'csv' (data/historical_data.csv) or 'sqlite' (indexed, opt-in).
+# Switching to 'sqlite' imports the existing CSV into db_file once; the CSV is left
+# untouched, but new predictions are then only written to the database.
+HISTORY_STORAGE = {
+    'backend': 'csv',
+    'db_file': 'history.db'
+}
+
+# Parquet archive of the history for analytics (skipped when pyarrow isn't installed)
+HISTORY_ARCHIVE = {
+    'enabled': True,
+    'dir': 'history_archive',
+    'compact_interval_seconds': 3600
+}
+
 # Color schemes
 QUALITY_COLORS = {
     'Excellent': '#10b981',
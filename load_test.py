@@ -0,0 +1,106 @@
+"""
+Load generator for the scoring daemon
+Starts a micro-batched and a per-request server and compares their throughput and latency
+"""
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from models.serving import ScoringClient
+
+SAMPLE_INPUT = {'nitrogen': 50, 'phosphorus': 50, 'potassium': 50, 'temperature': 25,
+                'humidity': 65, 'ph': 6.5, 'rainfall': 100}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare micro-batched and per-request serving")
+    parser.add_argument('--clients', type=int, default=32, help="Concurrent client threads")
+    parser.add_argument('--duration', type=float, default=10.0, help="Seconds per run")
+    parser.add_argument('--port', type=int, default=8766, help="First port to use")
+    parser.add_argument('--window-ms', type=float, default=3.0)
+    parser.add_argument('--output', default=None, help="Write the results as JSON")
+    return parser.parse_args()
+
+def wait_until_ready(client, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            return client.health()
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Scoring server did not start")
+
+def run_load(client, clients, duration):
+    """Hammer the server from `clients` threads; returns throughput and latency percentiles"""
+    latencies = [[] for _ in range(clients)]
+    errors = [0] * clients
+    stop_at = time.monotonic() + duration
+    rng = np.random.default_rng(0)
+    inputs = [{**SAMPLE_INPUT, 'temperature': float(t), 'rainfall': float(r)}
+              for t, r in zip(rng.uniform(10, 40, 512), rng.uniform(20, 300, 512))]
+    
+    def worker(index):
+        i = index
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                client.predict(inputs[i % len(inputs)])
+                latencies[index].append(time.perf_counter() - start)
+            except Exception:
+                errors[index] += 1
+            i += clients
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    all_latencies = np.concatenate([np.asarray(l) for l in latencies]) * 1000
+    return {
+        'requests': int(len(all_latencies)),
+        'errors': int(sum(errors)),
+        'throughput_rps': round(len(all_latencies) / duration, 1),
+        'p50_ms': round(float(np.percentile(all_latencies, 50)), 2),
+        'p99_ms': round(float(np.percentile(all_latencies, 99)), 2)
+    }
+
+def main():
+    args = parse_args()
+    results = {}
+    
+    for offset, (name, flags) in enumerate([
+        ('per_request', ['--no-batching']),
+        ('micro_batched', ['--window-ms', str(args.window_ms)])
+    ]):
+        port = args.port + offset
+        server = subprocess.Popen([sys.executable, 'serve_model.py', '--port', str(port), *flags])
+        try:
+            client = ScoringClient(port=port)
+            wait_until_ready(client)
+            print(f"⏱️ {name}: {args.clients} clients for {args.duration:.0f}s...")
+            results[name] = run_load(client, args.clients, args.duration)
+            health = client.health()
+            if health['batching']:
+                results[name]['batching'] = health['batching']
+        finally:
+            server.terminate()
+            server.wait()
+    
+    print()
+    print(f"{'mode':15s} {'req/s':>9s} {'p50 ms':>8s} {'p99 ms':>8s} {'errors':>7s}")
+    for name, result in results.items():
+        print(f"{name:15s} {result['throughput_rps']:9.1f} {result['p50_ms']:8.2f} "
+              f"{result['p99_ms']:8.2f} {result['errors']:7d}")
+    speedup = results['micro_batched']['throughput_rps'] / max(results['per_request']['throughput_rps'], 1e-9)
+    print(f"\n🚀 Micro-batching throughput: {speedup:.2f}x per-request")
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Prediction history maintenance
+    python manage_history.py stats            # print the running statistics
+    python manage_history.py rebuild-stats    # recompute them from the full history
+    python manage_history.py compact          # copy new history into the Parquet archive
+    python manage_history.py archive-info     # list the archive's monthly partitions
+"""
+import argparse
+import json
+import time
+from utils.data_handler import DataHandler
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Maintain the prediction history")
+    parser.add_argument('command', choices=['stats', 'rebuild-stats', 'compact', 'archive-info'])
+    parser.add_argument('--data-dir', default='data', help="Directory holding the history")
+    parser.add_argument('--backend', choices=['sqlite', 'csv'], default=None,
+                        help="History backend (default: HISTORY_STORAGE in config/settings.py)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    handler = DataHandler(args.data_dir, backend=args.backend)
+    
+    if args.command == 'compact':
+        summary = handler.compact_archive()
+        if summary is None:
+            print("⏳ Another compaction is running")
+        else:
+            print(f"📦 Archived {summary['rows']} rows into {len(summary['partitions'])} partition(s) "
+                  f"in {summary['seconds']}s")
+        return
+    if args.command == 'archive-info':
+        info = handler.archive.info() if handler.archive is not None else None
+        print(json.dumps(info, indent=2, default=str) if info else "📭 The history archive is disabled")
+        return
+    
+    if args.command == 'rebuild-stats':
+        start = time.perf_counter()
+        stats = handler.rebuild_statistics()
+        print(f"🔄 Rebuilt {handler.backend} history statistics in {time.perf_counter() - start:.2f}s")
+    else:
+        stats = handler.get_statistics()
+    
+    if stats is None:
+        print("📭 No predictions in the history")
+    else:
+        print(json.dumps(stats, indent=2, default=str))
+
+if __name__ == "__main__":
+    main()
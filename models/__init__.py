@@ -1,6 +1,18 @@
 # models/__init__.py
+from .crop_catalog import *
 from .calculator import *
 from .predictor import *
 from .ml_predictor import *
+from .forest_compiler import *
+from .model_store import *
+from .registry import *
+from .prediction_cache import *
+from .sensitivity import *
+from .training_cache import *
+from .dataset_loader import *
+from .training_jobs import *
+from .serving import *
+from .instrumentation import *
+from .rule_engine import *
 
-__all__ = ['calculator', 'predictor', 'ml_predictor']
+__all__ = ['crop_catalog', 'calculator', 'predictor', 'ml_predictor', 'forest_compiler', 'model_store', 'registry', 'prediction_cache', 'sensitivity', 'training_cache', 'dataset_loader', 'training_jobs', 'serving', 'instrumentation', 'rule_engine']
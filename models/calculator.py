@@ -2,13 +2,14 @@
 Calculators for Fertilizer, Irrigation, and Profit Analysis
 Enhanced with exact timeline design from specifications
 """
-from config.settings import CROP_PARAMETERS, FERTILIZER_PRICES
+from config.settings import FERTILIZER_PRICES
+from models.crop_catalog import get_crop_catalog
 
 class FertilizerCalculator:
     """Calculate fertilizer requirements and costs"""
     
     def __init__(self):
-        self.crop_params = CROP_PARAMETERS
+        self.crop_params = get_crop_catalog()
         self.prices = FERTILIZER_PRICES
     
     def calculate(self, crop_type, current_n, current_p, current_k):
@@ -116,7 +117,7 @@ class IrrigationCalculator:
     """Calculate irrigation requirements"""
     
     def __init__(self):
-        self.crop_params = CROP_PARAMETERS
+        self.crop_params = get_crop_catalog()
     
     def calculate(self, crop_type, rainfall):
         """
@@ -0,0 +1,181 @@
+"""
+Crop parameter catalog
+Optimal growing profiles for every crop, from CROP_PARAMETERS plus the training data, as one array table
+"""
+import json
+import os
+from collections.abc import Mapping
+from functools import lru_cache
+import numpy as np
+from config.settings import CROP_PARAMETERS
+from models.dataset_loader import load_dataset, FEATURE_COLUMNS, LABEL_COLUMN
+
+# Resolved from this file so the catalog loads the same data from any working directory
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 'data', 'crop_recommendation.csv')
+
+# Bump when the cached table layout or the aggregation changes
+CATALOG_FORMAT_VERSION = 1
+
+# Profiles come from each crop's rows at or above this quality_score quantile
+QUALITY_QUANTILE = 0.75
+
+# CROP_PARAMETERS keys, in the order of the dataset's FEATURE_COLUMNS
+PARAMETER_KEYS = ['nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity', 'ph', 'rainfall']
+PARAMETER_DECIMALS = [1, 1, 1, 1, 1, 2, 1]
+
+
+class CropCatalog(Mapping):
+    """
+    Read-only crop -> parameters mapping backed by a (crops, 7) array
+    
+    Works anywhere CROP_PARAMETERS did: catalog['papaya']['nitrogen'].
+    Each crop has an integer id (its row in `table`), so a lookup is one
+    dict probe and an index, whether by name or by id.
+    """
+    
+    def __init__(self, profiles, sources):
+        self.crops = list(profiles)
+        self.crop_index = {crop: i for i, crop in enumerate(self.crops)}
+        self._rows = [dict(profiles[crop]) for crop in self.crops]
+        self.table = np.array([[row[key] for key in PARAMETER_KEYS] for row in self._rows],
+                              dtype=np.float64).reshape(-1, len(PARAMETER_KEYS))
+        self.table.flags.writeable = False
+        self.sources = list(sources)
+    
+    def __getitem__(self, crop):
+        return self._rows[self.crop_index[crop]]
+    
+    def __iter__(self):
+        return iter(self.crops)
+    
+    def __len__(self):
+        return len(self.crops)
+    
+    def __contains__(self, crop):
+        return crop in self.crop_index
+    
+    def index_of(self, crop):
+        """Row id of a crop in `table`"""
+        return self.crop_index[crop]
+    
+    def row(self, crop):
+        """Parameters of one crop as an array in PARAMETER_KEYS order"""
+        return self.table[self.crop_index[crop]]
+    
+    def source(self, crop):
+        """'settings' for hand-tuned CROP_PARAMETERS entries, 'data' for derived ones"""
+        return self.sources[self.crop_index[crop]]
+
+
+def catalog_path_for(csv_path):
+    """Cached profile table that sits next to a CSV dataset"""
+    return os.path.splitext(csv_path)[0] + '.catalog.npz'
+
+
+def build_crop_catalog(data_path=DEFAULT_DATA_PATH, quantile=QUALITY_QUANTILE, curated=CROP_PARAMETERS,
+                       use_cache=True):
+    """
+    Catalog of the curated crops plus every other label in the dataset
+    
+    Curated entries keep their hand-tuned values; crops that only appear
+    in the data get the median of their high-quality rows. The derived
+    profiles are cached until the CSV changes.
+    
+    Parameters:
+    -----------
+    quantile : float
+        quality_score quantile (per crop) a row must reach to count
+    curated : dict
+        Hand-tuned profiles that take precedence, CROP_PARAMETERS by default
+    
+    Returns:
+    --------
+    CropCatalog
+    """
+    derived_crops, derived_table = derive_profiles(data_path, quantile, use_cache)
+    
+    profiles = dict(curated)
+    for crop, row in zip(derived_crops, derived_table.tolist()):
+        profiles.setdefault(crop, dict(zip(PARAMETER_KEYS, row)))
+    sources = ['settings'] * len(curated) + ['data'] * (len(profiles) - len(curated))
+    return CropCatalog(profiles, sources)
+
+
+def build_crop_catalog_from(crop_params):
+    """Catalog of a plain {crop: parameters} dict, without any dataset"""
+    return CropCatalog(crop_params, ['settings'] * len(crop_params))
+
+
+def derive_profiles(data_path=DEFAULT_DATA_PATH, quantile=QUALITY_QUANTILE, use_cache=True):
+    """
+    Per-crop optimal profiles from the training data
+    
+    Returns:
+    --------
+    (list, ndarray) : Crop names and their (crops, 7) profiles in PARAMETER_KEYS order
+    """
+    cache_path = catalog_path_for(data_path)
+    stat = os.stat(data_path)
+    meta = {
+        'format_version': CATALOG_FORMAT_VERSION,
+        'quantile': quantile,
+        'mtime_ns': stat.st_mtime_ns,
+        'bytes': stat.st_size
+    }
+    
+    if use_cache:
+        cached = _read_cache(cache_path, meta)
+        if cached is not None:
+            return cached
+    
+    df = load_dataset(data_path)
+    if 'quality_score' in df.columns:
+        # Each crop's own threshold, so a crop with low scores overall still gets a profile
+        threshold = df.groupby(LABEL_COLUMN, observed=True)['quality_score'].transform('quantile', quantile)
+        df = df[df['quality_score'] >= threshold]
+    
+    profiles = df.groupby(LABEL_COLUMN, observed=True)[FEATURE_COLUMNS].median()
+    table = profiles.to_numpy(dtype=np.float64, copy=True)
+    for column, decimals in enumerate(PARAMETER_DECIMALS):
+        table[:, column] = table[:, column].round(decimals)
+    crops = [str(crop) for crop in profiles.index]
+    
+    if use_cache:
+        _write_cache(cache_path, crops, table, meta)
+    return crops, table
+
+
+def _read_cache(cache_path, meta):
+    try:
+        with np.load(cache_path, allow_pickle=False) as cached:
+            if json.loads(str(cached['meta'])) != meta:
+                return None
+            return cached['crops'].tolist(), cached['table']
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write_cache(cache_path, crops, table, meta):
+    tmp_path = f'{cache_path}.tmp-{os.getpid()}'
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, crops=np.array(crops), table=table, meta=np.array(json.dumps(meta)))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️ Could not cache crop catalog: {e}")
+
+
+@lru_cache(maxsize=None)
+def get_crop_catalog():
+    """
+    Shared catalog of the bundled dataset, built on first use
+    
+    Used by the rule engine, the predictor and the calculators. Falls back
+    to CROP_PARAMETERS alone when the dataset can't be read.
+    """
+    try:
+        return build_crop_catalog()
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Crop catalog uses CROP_PARAMETERS only: {e}")
+        return build_crop_catalog_from(CROP_PARAMETERS)
@@ -0,0 +1,161 @@
+"""
+Columnar training dataset loader
+Parses the crop CSV once with pinned dtypes and reuses a binary .npy sidecar while the CSV is unchanged
+"""
+import hashlib
+import io
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+# Bump when the sidecar layout or the pinned dtypes change
+SIDECAR_FORMAT_VERSION = 2
+
+SIDECAR_META_FILE = 'meta.json'
+
+FEATURE_COLUMNS = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+LABEL_COLUMN = 'label'
+TARGET_COLUMNS = ['quality_score', 'yield_estimation', 'growth_duration']
+
+# Bytes at the end of the CSV hashed to detect rewrites before an append point
+TAIL_HASH_BYTES = 4096
+
+
+def sidecar_path_for(csv_path):
+    """Sidecar directory that sits next to a CSV dataset"""
+    return os.path.splitext(csv_path)[0] + '.columns'
+
+
+def tail_sha1(raw):
+    return hashlib.sha1(raw[-TAIL_HASH_BYTES:]).hexdigest()
+
+
+def load_dataset(csv_path, use_sidecar=True, with_meta=False):
+    """
+    Load the crop dataset with float32 features, float64 targets and a categorical label
+    
+    The CSV is parsed and validated only when its sidecar is missing or
+    stale (mtime or size changed). Otherwise the columns are read straight
+    from the sidecar's .npy files.
+    
+    Parameters:
+    -----------
+    use_sidecar : bool
+        Read and write the binary sidecar; False always parses the CSV
+    with_meta : bool
+        Also return the source metadata ('rows', 'bytes', 'mtime_ns',
+        'tail_sha1') describing exactly which bytes were loaded
+    
+    Returns:
+    --------
+    DataFrame, or (DataFrame, dict) with with_meta=True
+    """
+    sidecar_dir = sidecar_path_for(csv_path)
+    stat = os.stat(csv_path)
+    
+    meta = _read_meta(sidecar_dir) if use_sidecar else None
+    if meta is not None and (meta['mtime_ns'], meta['bytes']) == (stat.st_mtime_ns, stat.st_size):
+        df = _read_sidecar(sidecar_dir, meta)
+    else:
+        with open(csv_path, 'rb') as f:
+            raw = f.read()
+        df = parse_dataset(raw)
+        meta = {
+            'format_version': SIDECAR_FORMAT_VERSION,
+            'rows': len(df),
+            'bytes': len(raw),
+            'mtime_ns': stat.st_mtime_ns,
+            'tail_sha1': tail_sha1(raw)
+        }
+        # A file that changed while it was read must not get a sidecar
+        if use_sidecar and len(raw) == stat.st_size and os.stat(csv_path).st_mtime_ns == stat.st_mtime_ns:
+            _write_sidecar(sidecar_dir, df, meta)
+    
+    return (df, meta) if with_meta else df
+
+
+def parse_dataset(raw):
+    """Parse CSV bytes with pinned dtypes and validate the schema"""
+    header = pd.read_csv(io.BytesIO(raw), nrows=0).columns
+    missing = [c for c in FEATURE_COLUMNS + [LABEL_COLUMN] if c not in header]
+    if missing:
+        raise ValueError(f"Dataset is missing required columns: {missing}")
+    
+    # Targets stay float64 so regressors fit and report the exact values
+    dtypes = {c: np.float32 for c in FEATURE_COLUMNS}
+    dtypes.update({c: np.float64 for c in TARGET_COLUMNS if c in header})
+    dtypes[LABEL_COLUMN] = 'category'
+    try:
+        df = pd.read_csv(io.BytesIO(raw), dtype=dtypes)
+    except ValueError as e:
+        raise ValueError(f"Dataset has non-numeric values in a numeric column: {e}")
+    
+    incomplete = df[FEATURE_COLUMNS + [LABEL_COLUMN]].isna().any(axis=1)
+    if incomplete.any():
+        raise ValueError(f"Dataset has {int(incomplete.sum())} rows with missing features or label")
+    
+    # Any extra text columns are stored as categories too
+    for name in df.columns[df.dtypes == object]:
+        df[name] = df[name].astype('category')
+    return df
+
+
+def _read_meta(sidecar_dir):
+    try:
+        with open(os.path.join(sidecar_dir, SIDECAR_META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('format_version') == SIDECAR_FORMAT_VERSION else None
+
+
+def _read_sidecar(sidecar_dir, meta):
+    """
+    Rebuild the DataFrame from the sidecar without consolidating blocks
+    
+    Numeric columns are stored as one (columns, rows) array per dtype, the
+    layout pandas keeps internally, so each becomes a block without a copy.
+    """
+    frames = []
+    for dtype, names in meta['blocks'].items():
+        block = np.load(os.path.join(sidecar_dir, f'block-{dtype}.npy'), allow_pickle=False)
+        frames.append(pd.DataFrame(block.T, columns=names, copy=False))
+    df = pd.concat(frames, axis=1) if len(frames) > 1 else frames[0]
+    
+    for name, categories in meta['categories'].items():
+        codes = np.load(os.path.join(sidecar_dir, f'codes-{meta["columns"].index(name):03d}.npy'),
+                        allow_pickle=False)
+        df.insert(meta['columns'].index(name), name, pd.Categorical.from_codes(codes, categories=categories))
+    
+    if list(df.columns) != meta['columns']:
+        df = df[meta['columns']]
+    return df
+
+
+def _write_sidecar(sidecar_dir, df, meta):
+    """Write the column blocks into a temp dir, then swap it into place"""
+    tmp_dir = f'{sidecar_dir}.tmp-{os.getpid()}'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    
+    meta = {**meta, 'columns': list(df.columns), 'blocks': {}, 'categories': {}}
+    for index, name in enumerate(df.columns):
+        values = df[name]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            meta['categories'][name] = values.cat.categories.tolist()
+            np.save(os.path.join(tmp_dir, f'codes-{index:03d}.npy'), values.cat.codes.to_numpy(),
+                    allow_pickle=False)
+        else:
+            meta['blocks'].setdefault(values.dtype.name, []).append(name)
+    
+    for dtype, names in meta['blocks'].items():
+        block = np.ascontiguousarray(df[names].to_numpy(dtype=dtype).T)
+        np.save(os.path.join(tmp_dir, f'block-{dtype}.npy'), block, allow_pickle=False)
+    
+    with open(os.path.join(tmp_dir, SIDECAR_META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+    
+    shutil.rmtree(sidecar_dir, ignore_errors=True)
+    os.replace(tmp_dir, sidecar_dir)
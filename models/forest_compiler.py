@@ -0,0 +1,303 @@
+"""
+Flat-array inference engine for trained random forests
+Compiles sklearn forests into plain NumPy arrays and evaluates them without sklearn
+"""
+import numpy as np
+
+# Bump when the array layout written by export_compiled_model changes
+COMPILED_FORMAT_VERSION = 1
+
+# Upper bound on rows x trees walked at once, keeps the node matrix small
+MAX_CELLS_PER_CHUNK = 1 << 20
+
+# Predictor attributes that hold a forest or a scaler
+FOREST_ATTRS = ['classifier_model', 'quality_model', 'yield_model',
+                'duration_model', 'regression_model']
+SCALER_ATTRS = ['scaler', 'regression_scaler']
+
+
+class CompiledForest:
+    """
+    Random forest stored as flat node arrays
+    
+    All trees share one set of arrays; tree t starts at node roots[t].
+    Leaves point to themselves, so walking max_depth levels is enough to
+    park every (row, tree) pair on its leaf.
+    """
+    
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth,
+                 classes=None, feature_importances=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.feature_importances_ = feature_importances
+    
+    @classmethod
+    def from_sklearn(cls, forest):
+        """Flatten a fitted RandomForestClassifier/Regressor"""
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+        is_classifier = hasattr(forest, 'classes_')
+        
+        features, thresholds, lefts, rights, values = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            nodes = np.arange(tree.node_count)
+            leaf = tree.children_left == -1
+            
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(_floor_float32(tree.threshold))
+            lefts.append(np.where(leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(leaf, nodes, tree.children_right) + offset)
+            
+            if is_classifier:
+                # Older sklearn stores class counts, newer stores fractions
+                counts = tree.value[:, 0, :]
+                values.append(counts / counts.sum(axis=1, keepdims=True))
+            else:
+                values.append(tree.value[:, :, 0])
+        
+        return cls(
+            feature=np.concatenate(features).astype(np.int32),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts).astype(np.int32),
+            right=np.concatenate(rights).astype(np.int32),
+            value=np.concatenate(values).astype(np.float64),
+            roots=offsets.astype(np.int32),
+            max_depth=max(tree.max_depth for tree in trees),
+            classes=forest.classes_ if is_classifier else None,
+            feature_importances=forest.feature_importances_
+        )
+    
+    @property
+    def n_trees(self):
+        return len(self.roots)
+    
+    def leaf_average(self, X):
+        """Mean leaf value over all trees, shape (n_rows, n_values)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        
+        chunk = max(1, MAX_CELLS_PER_CHUNK // self.n_trees)
+        output = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), chunk):
+            output[start:start + chunk] = self._walk(X[start:start + chunk])
+        return output
+    
+    def _walk(self, X):
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        
+        # Level-by-level: every (row, tree) pair advances one level per step
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        
+        return self.value[node].mean(axis=1)
+    
+    def predict_proba(self, X):
+        return self.leaf_average(X)
+    
+    def predict(self, X):
+        averaged = self.leaf_average(X)
+        if self.classes_ is not None:
+            return self.classes_[averaged.argmax(axis=1)]
+        if averaged.shape[1] == 1:
+            return averaged[:, 0]
+        return averaged
+    
+    def to_arrays(self, prefix):
+        arrays = {
+            f'{prefix}.feature': self.feature,
+            f'{prefix}.threshold': self.threshold,
+            f'{prefix}.left': self.left,
+            f'{prefix}.right': self.right,
+            f'{prefix}.value': self.value,
+            f'{prefix}.roots': self.roots,
+            f'{prefix}.max_depth': np.array(self.max_depth),
+            f'{prefix}.feature_importances': self.feature_importances_
+        }
+        if self.classes_ is not None:
+            arrays[f'{prefix}.classes'] = self.classes_.astype(str)
+        return arrays
+    
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        classes = arrays.get(f'{prefix}.classes')
+        return cls(
+            feature=arrays[f'{prefix}.feature'],
+            threshold=arrays[f'{prefix}.threshold'],
+            left=arrays[f'{prefix}.left'],
+            right=arrays[f'{prefix}.right'],
+            value=arrays[f'{prefix}.value'],
+            roots=arrays[f'{prefix}.roots'],
+            max_depth=arrays[f'{prefix}.max_depth'],
+            classes=np.asarray(classes, dtype=object) if classes is not None else None,
+            feature_importances=arrays[f'{prefix}.feature_importances']
+        )
+
+
+class CompiledScaler:
+    """StandardScaler replacement holding only mean_ and scale_"""
+    
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+    
+    @classmethod
+    def from_sklearn(cls, scaler):
+        return cls(np.asarray(scaler.mean_, dtype=np.float64),
+                   np.asarray(scaler.scale_, dtype=np.float64))
+    
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+    
+    def inverse_transform(self, X):
+        return np.asarray(X, dtype=np.float64) * self.scale_ + self.mean_
+    
+    def to_arrays(self, prefix):
+        return {f'{prefix}.mean': self.mean_, f'{prefix}.scale': self.scale_}
+    
+    @classmethod
+    def from_arrays(cls, arrays, prefix):
+        return cls(arrays[f'{prefix}.mean'], arrays[f'{prefix}.scale'])
+
+
+def _floor_float32(threshold):
+    """
+    Largest float32 not above each float64 threshold
+    
+    sklearn compares float32 features against float64 thresholds; for a
+    float32 x, x <= t holds exactly when x <= floor32(t), so rounding down
+    keeps every split decision identical.
+    """
+    rounded = threshold.astype(np.float32)
+    too_high = rounded.astype(np.float64) > threshold
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def compile_model(ml_predictor):
+    """
+    Flatten every fitted component of an MLCropPredictor
+    
+    Returns:
+    --------
+    dict : Array name -> ndarray, ready for np.savez or a memory-mapped store
+    """
+    arrays = {
+        'format_version': np.array(COMPILED_FORMAT_VERSION),
+        'feature_names': np.array(ml_predictor.feature_names, dtype=str),
+        'regression_targets': np.array(ml_predictor.regression_targets, dtype=str)
+    }
+    for attr in FOREST_ATTRS:
+        forest = getattr(ml_predictor, attr)
+        if forest is not None:
+            compiled = forest if isinstance(forest, CompiledForest) else CompiledForest.from_sklearn(forest)
+            arrays.update(compiled.to_arrays(attr))
+    for attr in SCALER_ATTRS:
+        scaler = getattr(ml_predictor, attr)
+        if scaler is not None:
+            compiled = scaler if isinstance(scaler, CompiledScaler) else CompiledScaler.from_sklearn(scaler)
+            arrays.update(compiled.to_arrays(attr))
+    return arrays
+
+
+def apply_compiled_model(ml_predictor, arrays):
+    """Install compiled components from an array mapping onto an MLCropPredictor"""
+    version = int(arrays['format_version'])
+    if version != COMPILED_FORMAT_VERSION:
+        raise ValueError(f"Unsupported compiled model version {version}")
+    
+    for attr in FOREST_ATTRS:
+        present = f'{attr}.roots' in arrays
+        setattr(ml_predictor, attr, CompiledForest.from_arrays(arrays, attr) if present else None)
+    for attr in SCALER_ATTRS:
+        present = f'{attr}.mean' in arrays
+        setattr(ml_predictor, attr, CompiledScaler.from_arrays(arrays, attr) if present else None)
+    
+    ml_predictor.feature_names = [str(name) for name in arrays['feature_names']]
+    ml_predictor.regression_targets = [str(name) for name in arrays['regression_targets']]
+    return ml_predictor
+
+
+def export_compiled_model(ml_predictor, path):
+    """Write the compiled model as an uncompressed .npz (no pickled objects)"""
+    with open(path, 'wb') as f:
+        np.savez(f, **compile_model(ml_predictor))
+    return path
+
+
+def load_compiled_arrays(path):
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def verify_compiled_model(ml_predictor, compiled_predictor, data_path='data/crop_recommendation.csv'):
+    """
+    Compare compiled and sklearn outputs on a dataset
+    
+    Returns:
+    --------
+    dict : Label agreement and max absolute difference per output
+    """
+    from models.dataset_loader import load_dataset
+    
+    features = load_dataset(data_path)[ml_predictor.feature_names].to_numpy(dtype=np.float64)
+    reference_scaled = ml_predictor.scaler.transform(features)
+    compiled_scaled = compiled_predictor.scaler.transform(features)
+    
+    reference_proba = ml_predictor.classifier_model.predict_proba(reference_scaled)
+    compiled_proba = compiled_predictor.classifier_model.predict_proba(compiled_scaled)
+    
+    report = {
+        'rows': len(features),
+        'label_agreement': float(np.mean(
+            ml_predictor.classifier_model.classes_[reference_proba.argmax(axis=1)] ==
+            compiled_predictor.classifier_model.classes_[compiled_proba.argmax(axis=1)]
+        )),
+        'max_abs_diff': {'probabilities': float(np.abs(reference_proba - compiled_proba).max())}
+    }
+    
+    reference_regressions = ml_predictor._predict_regressions(reference_scaled)
+    compiled_regressions = compiled_predictor._predict_regressions(compiled_scaled)
+    for target, values in reference_regressions.items():
+        report['max_abs_diff'][target] = float(np.abs(values - compiled_regressions[target]).max())
+    
+    report['matches'] = report['label_agreement'] == 1.0 and all(
+        diff <= 1e-6 for diff in report['max_abs_diff'].values()
+    )
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    from models.ml_predictor import MLCropPredictor
+    
+    # Skip the array store so the reference really is the pickled sklearn model
+    source = MLCropPredictor(use_mmap=False)
+    if source.classifier_model is None:
+        print("❌ No trained model found. Run train_model.py first.")
+        sys.exit(1)
+    not_sklearn = [attr for attr in FOREST_ATTRS
+                   if getattr(source, attr) is not None and not hasattr(getattr(source, attr), 'estimators_')]
+    if not_sklearn:
+        print(f"❌ Reference models are not sklearn forests: {not_sklearn}")
+        sys.exit(1)
+    
+    target_path = sys.argv[1] if len(sys.argv) > 1 else 'models/crop_model.npz'
+    export_compiled_model(source, target_path)
+    print(f"💾 Compiled model written to {target_path}")
+    
+    compiled = MLCropPredictor(model_path=target_path)
+    report = verify_compiled_model(source, compiled)
+    print(f"🔍 Verified on {report['rows']} rows: label agreement {report['label_agreement'] * 100:.2f}%")
+    for name, diff in report['max_abs_diff'].items():
+        print(f"   • {name:18s} max |Δ| = {diff:.3g}")
+    print("✅ Outputs match sklearn" if report['matches'] else "⚠️ Outputs differ from sklearn")
@@ -0,0 +1,207 @@
+"""
+Hyperparameter search for the crop forests
+Successive halving over tree count and depth, scored on accuracy, p99 latency and model size
+"""
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import StandardScaler
+from models.forest_compiler import CompiledForest
+from models.ml_predictor import MLCropPredictor, DEFAULT_FOREST_PARAMS
+from models.training import SharedArrays
+
+# Candidate grid; the tree count is the halving budget, not a grid axis
+SEARCH_SPACE = {
+    'max_depth': [6, 10, 20, None],
+    'min_samples_split': [2, 5],
+    'min_samples_leaf': [1, 2]
+}
+
+# Single-row predictions timed per candidate for the p99 latency
+LATENCY_SAMPLES = 200
+
+
+def _score_job(job):
+    """Fit one candidate on one cached fold inside a worker process"""
+    shm, arrays = SharedArrays.attach(job['shared'])
+    try:
+        return _score(job, arrays)
+    finally:
+        del arrays
+        shm.close()
+
+
+def _score(job, arrays):
+    X, y, folds = arrays['X'], arrays['y_codes'], arrays['folds']
+    train, valid = folds != job['fold'], folds == job['fold']
+    
+    model = RandomForestClassifier(**job['params'], n_estimators=job['n_estimators'], n_jobs=1)
+    model.fit(X[train], y[train])
+    accuracy = float(np.mean(model.predict(X[valid]) == y[valid]))
+    
+    # Size of the compiled forest, which is what serving runs; the first
+    # fold's forest comes back so its latency can be timed on an idle machine
+    arrays = CompiledForest.from_sklearn(model).to_arrays('forest')
+    return {
+        'candidate': job['candidate'],
+        'n_estimators': job['n_estimators'],
+        'accuracy': accuracy,
+        'size_mb': sum(a.nbytes for a in arrays.values()) / 1e6,
+        'forest': arrays if job['fold'] == 0 else None
+    }
+
+
+def _p99_latency_ms(forest_arrays, rows):
+    """p99 single-row predict_proba time of a compiled forest"""
+    compiled = CompiledForest.from_arrays(forest_arrays, 'forest')
+    compiled.predict_proba(rows[:1])
+    timings = np.empty(len(rows))
+    for i in range(len(rows)):
+        start = time.perf_counter()
+        compiled.predict_proba(rows[i:i + 1])
+        timings[i] = time.perf_counter() - start
+    return float(np.percentile(timings, 99) * 1000)
+
+
+class HyperparameterSearch:
+    """
+    Successive-halving search over the crop classifier's forest settings
+    
+    Every depth/split candidate is first scored with `min_trees` trees.
+    Each round keeps the best 1/eta of them and multiplies the tree count
+    by eta; the last round always runs the survivors at `max_trees`, and
+    only those full-budget results are ranked for the winner. Candidates
+    are fit in a process pool on fold splits that are computed once and
+    shared through shared memory. Latency is timed after each round's
+    pool has shut down, so busy workers don't distort it.
+    
+    Configurations are ranked by a joint objective:
+        accuracy - latency_weight * p99_ms - size_weight * size_mb
+    so with the defaults 1 ms of p99 single-row latency costs as much as
+    one point of accuracy, and so do 10 MB of model arrays.
+    
+    Only the crop classifier is tuned; apply() leaves the regressors'
+    parameters alone.
+    """
+    
+    def __init__(self, search_space=None, min_trees=25, max_trees=400, eta=2, n_folds=3,
+                 n_workers=None, latency_weight=0.01, size_weight=0.001):
+        self.search_space = search_space or SEARCH_SPACE
+        self.min_trees = min_trees
+        self.max_trees = max_trees
+        self.eta = eta
+        self.n_folds = n_folds
+        self.n_workers = n_workers
+        self.latency_weight = latency_weight
+        self.size_weight = size_weight
+        self.leaderboard = []
+        self.best_params = None
+    
+    def candidates(self):
+        names = list(self.search_space)
+        return [dict(zip(names, values)) for values in itertools.product(*self.search_space.values())]
+    
+    def run(self, data_path='data/crop_recommendation.csv', test_size=0.2, predictor=None):
+        """
+        Search on the training split only, so the test split stays unseen
+        
+        Returns:
+        --------
+        dict : 'best_params' (ready for MLCropPredictor.classifier_params),
+               'leaderboard' of every configuration at the largest tree count
+               it reached (full-budget results first, best first within a
+               tree count), and 'rounds' with every round's ranking
+        """
+        predictor = predictor or MLCropPredictor(use_mmap=False)
+        df, _ = predictor._load_training_data(data_path)
+        X_train, _, y_train, _ = predictor._split(
+            df[predictor.feature_names].astype(np.float64), df['label'], test_size
+        )
+        X_train = StandardScaler().fit_transform(X_train)
+        _, y_codes = np.unique(y_train.to_numpy(), return_inverse=True)
+        
+        folds = np.empty(len(y_codes), dtype=np.int64)
+        splitter = StratifiedKFold(n_splits=self.n_folds, shuffle=True,
+                                   random_state=DEFAULT_FOREST_PARAMS['random_state'])
+        for fold, (_, valid) in enumerate(splitter.split(X_train, y_codes)):
+            folds[valid] = fold
+        
+        base_params = {key: value for key, value in predictor._classifier_params().items()
+                       if key != 'n_estimators'}
+        candidates = self.candidates()
+        survivors = list(range(len(candidates)))
+        n_trees = min(self.min_trees, self.max_trees)
+        latency_rows = X_train[folds == 0][:LATENCY_SAMPLES]
+        rounds = []
+        
+        shared = SharedArrays({'X': X_train, 'y_codes': y_codes.astype(np.int64), 'folds': folds})
+        try:
+            while True:
+                print(f"🔎 Scoring {len(survivors)} candidates with {n_trees} trees "
+                      f"on {self.n_folds} folds...")
+                jobs = [
+                    {'shared': shared.spec, 'candidate': c, 'n_estimators': n_trees, 'fold': fold,
+                     'params': {**base_params, **candidates[c]}}
+                    for c in survivors for fold in range(self.n_folds)
+                ]
+                with ProcessPoolExecutor(max_workers=self.n_workers or os.cpu_count() or 1) as pool:
+                    results = list(pool.map(_score_job, jobs))
+                
+                scores = {c: {'folds': [], 'p99_latency_ms': None} for c in survivors}
+                for result in results:
+                    forest = result.pop('forest')
+                    scores[result['candidate']]['folds'].append(result)
+                    if forest is not None:
+                        scores[result['candidate']]['p99_latency_ms'] = _p99_latency_ms(forest, latency_rows)
+                
+                ranking = sorted(
+                    (self._summarize(c, candidates[c], n_trees, scores[c]) for c in survivors),
+                    key=lambda row: row['objective'], reverse=True
+                )
+                rounds.append({'n_estimators': n_trees, 'candidates': len(survivors), 'ranking': ranking})
+                
+                if n_trees >= self.max_trees:
+                    break
+                survivors = [row['candidate'] for row in ranking[:max(1, math.ceil(len(survivors) / self.eta))]]
+                n_trees = min(n_trees * self.eta, self.max_trees)
+        finally:
+            shared.close()
+        
+        # Later rounds overwrite earlier ones, leaving each configuration's best-fidelity score
+        best_fidelity = {row['candidate']: row for r in rounds for row in r['ranking']}
+        self.leaderboard = sorted(best_fidelity.values(), key=lambda row: (-row['n_estimators'], -row['objective']))
+        best = self.leaderboard[0]
+        self.best_params = {**base_params, **best['params'], 'n_estimators': best['n_estimators']}
+        return {'best_params': self.best_params, 'leaderboard': self.leaderboard, 'rounds': rounds}
+    
+    def apply(self, predictor):
+        """
+        Use the best configuration for the predictor's next classifier fit
+        
+        The saved model records it; later runs reuse it only through
+        MLCropPredictor.reuse_search_params().
+        """
+        if self.best_params is None:
+            raise ValueError("Run the search before applying its result")
+        predictor.classifier_params = dict(self.best_params)
+    
+    def _objective(self, score):
+        accuracy = np.mean([r['accuracy'] for r in score['folds']])
+        size = np.mean([r['size_mb'] for r in score['folds']])
+        return accuracy - self.latency_weight * score['p99_latency_ms'] - self.size_weight * size
+    
+    def _summarize(self, candidate, params, n_trees, score):
+        return {
+            'candidate': candidate,
+            'params': params,
+            'n_estimators': n_trees,
+            'accuracy': round(np.mean([r['accuracy'] for r in score['folds']]) * 100, 2),
+            'p99_latency_ms': round(score['p99_latency_ms'], 3),
+            'size_mb': round(np.mean([r['size_mb'] for r in score['folds']]), 2),
+            'objective': round(self._objective(score), 4)
+        }
@@ -0,0 +1,158 @@
+"""
+Per-stage span timing
+Latency histograms for the stages of a prediction, readable programmatically
+"""
+import threading
+import time
+from config.settings import STAGE_TIMINGS
+
+# Four buckets per power of two from 256 ns up to ~34 s (bucket 0 is everything faster)
+MIN_BUCKET_EXP = 8
+MAX_BUCKET_EXP = 35
+SUB_BUCKETS = 4
+N_BUCKETS = 1 + (MAX_BUCKET_EXP - MIN_BUCKET_EXP) * SUB_BUCKETS
+
+
+def _bucket_index(duration_ns):
+    exp = duration_ns.bit_length() - 1
+    if exp < MIN_BUCKET_EXP:
+        return 0
+    sub = (duration_ns >> (exp - 2)) & (SUB_BUCKETS - 1)
+    return min(1 + (exp - MIN_BUCKET_EXP) * SUB_BUCKETS + sub, N_BUCKETS - 1)
+
+
+def _bucket_upper_ns(index):
+    if index == 0:
+        return 1 << MIN_BUCKET_EXP
+    exp, sub = divmod(index - 1, SUB_BUCKETS)
+    exp += MIN_BUCKET_EXP
+    return (1 << exp) + (sub + 1) * (1 << (exp - 2))
+
+
+class _NullSpan:
+    """Shared do-nothing span handed out while timing is disabled"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def null_span(name):
+    return NULL_SPAN
+
+
+class _Span:
+    __slots__ = ('timings', 'name', 'start')
+    
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.timings.record(self.name, time.perf_counter_ns() - self.start)
+        return False
+
+
+class LatencyHistogram:
+    """Log-bucketed durations with exact count, sum, min and max"""
+    
+    def __init__(self):
+        self.buckets = [0] * N_BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+    
+    def record(self, duration_ns):
+        self.buckets[_bucket_index(duration_ns)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        self.min_ns = duration_ns if self.min_ns is None else min(self.min_ns, duration_ns)
+        self.max_ns = max(self.max_ns, duration_ns)
+    
+    def percentile(self, q):
+        """Upper bound (ns) of the bucket holding the q-th percentile, capped at the max"""
+        if not self.count:
+            return 0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(_bucket_upper_ns(index), self.max_ns)
+        return self.max_ns
+    
+    def summary(self):
+        to_ms = 1e-6
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ns * to_ms, 4),
+            'mean_ms': round(self.total_ns / self.count * to_ms, 4) if self.count else 0.0,
+            'min_ms': round((self.min_ns or 0) * to_ms, 4),
+            'max_ms': round(self.max_ns * to_ms, 4),
+            'p50_ms': round(self.percentile(50) * to_ms, 4),
+            'p95_ms': round(self.percentile(95) * to_ms, 4),
+            'p99_ms': round(self.percentile(99) * to_ms, 4),
+            'buckets': [
+                {'le_ms': _bucket_upper_ns(i) * to_ms, 'count': n}
+                for i, n in enumerate(self.buckets) if n
+            ]
+        }
+
+
+class StageTimings:
+    """
+    Named latency histograms fed by `with stage_timings.span('stage'):`
+    
+    While disabled, span() returns one shared no-op object, so an
+    instrumented call costs a flag check and nothing is recorded.
+    """
+    
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._histograms = {}
+        self._lock = threading.Lock()
+    
+    def span(self, name):
+        return _Span(self, name) if self.enabled else NULL_SPAN
+    
+    def record(self, name, duration_ns):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram()
+            histogram.record(duration_ns)
+    
+    def enable(self):
+        self.enabled = True
+    
+    def disable(self):
+        self.enabled = False
+    
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+    
+    def snapshot(self):
+        """Stage name -> summary dict (count, mean/min/max, p50/p95/p99 and buckets, in ms)"""
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in self._histograms.items()}
+
+
+# Shared by every CropPredictor/MLCropPredictor in this process
+stage_timings = StageTimings(enabled=STAGE_TIMINGS['enabled'])
+
+
+def get_stage_timings():
+    return stage_timings.snapshot()
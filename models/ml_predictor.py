@@ -6,52 +6,123 @@ import pandas as pd
 import numpy as np
 import pickle
 import os
+import io
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from joblib import parallel_backend
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import accuracy_score, mean_squared_error, r2_score
+from models.forest_compiler import apply_compiled_model, compile_model, load_compiled_arrays
+from models.training_cache import column_fingerprint
+from models.dataset_loader import load_dataset, tail_sha1, TAIL_HASH_BYTES
+from models.instrumentation import stage_timings, null_span
+from models.model_store import (
+    arrays_version, open_store, store_is_fresh, store_path_for, write_store
+)
 import warnings
 warnings.filterwarnings('ignore')
 
+# Input dict keys in the same order as the model features
+INPUT_KEYS = ['nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity', 'ph', 'rainfall']
+
+# Below this many rows joblib thread start-up costs more than the forest walk itself
+PARALLEL_BATCH_THRESHOLD = 1000
+
+# Forest hyperparameters shared by the classifier and every regressor
+DEFAULT_FOREST_PARAMS = {
+    'n_estimators': 200,
+    'max_depth': 20,
+    'min_samples_split': 5,
+    'min_samples_leaf': 2,
+    'random_state': 42
+}
+
+# Rows kept per crop so warm-start refits always see every class
+REPLAY_ROWS_PER_CLASS = 10
+
+# Past this many trees per forest an incremental refresh falls back to a full retrain
+MAX_INCREMENTAL_ESTIMATORS = 1000
+
+# Optional regression targets: dataset column -> model attribute and training banner
+REGRESSION_TARGETS = {
+    'quality_score': {'attr': 'quality_model', 'title': '📊 Training Quality Score Model...'},
+    'yield_estimation': {'attr': 'yield_model', 'title': '🌾 Training Yield Estimation Model...'},
+    'growth_duration': {'attr': 'duration_model', 'title': '⏱️ Training Growth Duration Model...'}
+}
+
 
 class MLCropPredictor:
     """ML-based crop predictor with extended metrics support"""
     
-    def __init__(self, model_path='models/crop_model.pkl'):
+    def __init__(self, model_path='models/crop_model.pkl', use_mmap=True):
         self.model_path = model_path
+        self.store_path = store_path_for(model_path)
+        self.use_mmap = use_mmap
+        self.model_version = None
         self.classifier_model = None
         self.quality_model = None
         self.yield_model = None
         self.duration_model = None
+        self.regression_model = None
+        self.regression_scaler = None
+        self.regression_targets = []
         self.scaler = None
         self.feature_names = ['N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall']
+        self.model_params = dict(DEFAULT_FOREST_PARAMS)
+        # Classifier-only overrides of model_params for the next fit (set by the
+        # hyperparameter search), and the overrides the current classifier was fit with.
+        # Saved models only record the latter; reusing them is opt-in (reuse_search_params)
+        self.classifier_params = {}
+        self.trained_classifier_params = {}
+        self.data_watermark = None
+        self.replay_buffer = None
+        self.training_key = None
         
-        if os.path.exists(model_path):
-            self.load_model()
+        self.load_model()
     
-    def train(self, data_path='data/crop_recommendation.csv', test_size=0.2):
-        """Train all ML models"""
-        df = pd.read_csv(data_path)
+    def train(self, data_path='data/crop_recommendation.csv', test_size=0.2,
+              multi_output=False, compare_multi_output=True, cache=None, progress=None):
+        """
+        Train all ML models
+        
+        Parameters:
+        -----------
+        multi_output : bool
+            Fit one forest predicting quality, yield and duration together
+            instead of one forest per target
+        compare_multi_output : bool
+            In multi_output mode, also fit the per-target forests (not saved)
+            and report the accuracy, size and latency difference
+        cache : TrainingCache, optional
+            Reuse fitted models whose data, features and parameters are
+            unchanged; a fully unchanged run returns the saved results
+        progress : callable, optional
+            Called as progress(stage, fraction) when each stage starts
+        """
+        self._progress(progress, 'load', 0.0)
+        df, watermark = self._load_training_data(data_path)
         
         print(f"📊 Dataset loaded: {len(df)} samples")
         print(f"📋 Columns: {list(df.columns)}")
         print(f"🌾 Unique crops: {df['label'].nunique()}")
         
-        X = df[self.feature_names]
+        # Features load as float32; scale and fit in float64 as before
+        X = df[self.feature_names].astype(np.float64)
         y_crop = df['label']
         
-        has_quality = 'quality_score' in df.columns
-        has_yield = 'yield_estimation' in df.columns
-        has_duration = 'growth_duration' in df.columns
-        
-        print(f"\n📈 Extended features:")
-        print(f"   • Quality Score: {'✅' if has_quality else '❌'}")
-        print(f"   • Yield Estimation: {'✅' if has_yield else '❌'}")
-        print(f"   • Growth Duration: {'✅' if has_duration else '❌'}")
+        targets = [t for t in REGRESSION_TARGETS if t in df.columns]
+        keys = self._training_keys(cache, df, targets, test_size, multi_output, compare_multi_output)
+        if cache is not None and self.training_key == keys['run']:
+            cached_results = cache.get(keys['run'])
+            if cached_results is not None:
+                print("\n♻️ Data, features and parameters unchanged; keeping the saved models")
+                return cached_results
         
-        X_train, X_test, y_crop_train, y_crop_test = train_test_split(
-            X, y_crop, test_size=test_size, random_state=42, stratify=y_crop
-        )
+        self._progress(progress, 'split_and_scale', 0.1)
+        X_train, X_test, y_crop_train, y_crop_test = self._split(X, y_crop, test_size)
         
         self.scaler = StandardScaler()
         X_train_scaled = self.scaler.fit_transform(X_train)
@@ -61,102 +132,276 @@ class MLCropPredictor:
         
         # Crop Classification
         print("\n🎯 Training Crop Classification...")
-        self.classifier_model = RandomForestClassifier(
-            n_estimators=200, max_depth=20, min_samples_split=5,
-            min_samples_leaf=2, random_state=42, n_jobs=-1
-        )
-        self.classifier_model.fit(X_train_scaled, y_crop_train)
+        self._progress(progress, 'classifier', 0.15)
+        
+        def fit_classifier():
+            model = self._new_classifier()
+            model.fit(X_train_scaled, y_crop_train)
+            cv_scores = cross_val_score(model, X_train_scaled, y_crop_train, cv=5)
+            return {'model': model, 'cv_scores': cv_scores}
+        
+        fitted = self._fit_cached(cache, keys.get('classifier'), fit_classifier)
+        self._use_classifier(fitted['model'])
         y_pred = self.classifier_model.predict(X_test_scaled)
         
-        accuracy = accuracy_score(y_crop_test, y_pred)
-        cv_scores = cross_val_score(self.classifier_model, X_train_scaled, y_crop_train, cv=5)
-        
-        results['crop_classification'] = {
-            'accuracy': round(accuracy * 100, 2),
-            'cv_mean': round(cv_scores.mean() * 100, 2),
-            'cv_std': round(cv_scores.std() * 100, 2),
-            'feature_importance': dict(zip(
-                self.feature_names,
-                [round(imp * 100, 2) for imp in self.classifier_model.feature_importances_]
-            ))
-        }
-        print(f"   ✅ Accuracy: {results['crop_classification']['accuracy']}%")
+        results['crop_classification'] = self._classification_metrics(
+            y_crop_test, y_pred, cv_scores=fitted['cv_scores']
+        )
         
-        # Quality Score Model
-        if has_quality:
-            print("\n📊 Training Quality Score Model...")
-            y_quality_train = df.loc[X_train.index, 'quality_score']
-            y_quality_test = df.loc[X_test.index, 'quality_score']
-            
-            self.quality_model = RandomForestRegressor(
-                n_estimators=200, max_depth=20, min_samples_split=5,
-                min_samples_leaf=2, random_state=42, n_jobs=-1
-            )
-            self.quality_model.fit(X_train_scaled, y_quality_train)
-            y_pred_quality = self.quality_model.predict(X_test_scaled)
-            
-            rmse = np.sqrt(mean_squared_error(y_quality_test, y_pred_quality))
-            r2 = r2_score(y_quality_test, y_pred_quality)
-            
-            results['quality_score'] = {
-                'rmse': round(rmse, 2),
-                'r2_score': round(r2, 4),
-                'accuracy_percentage': round((1 - rmse/100) * 100, 2)
-            }
-            print(f"   ✅ RMSE: {rmse:.2f}, R²: {r2:.4f}")
+        # Regression targets
+        y_train_targets = df.loc[X_train.index, targets]
+        y_test_targets = df.loc[X_test.index, targets]
+        
+        if not multi_output or compare_multi_output:
+            for i, target in enumerate(targets):
+                print(f"\n{REGRESSION_TARGETS[target]['title']}")
+                self._progress(progress, target, 0.4 + 0.45 * i / len(targets))
+                
+                def fit_regressor(target=target):
+                    model = self._new_regressor()
+                    model.fit(X_train_scaled, y_train_targets[target])
+                    return {'model': model}
+                
+                model = self._fit_cached(cache, keys.get(target), fit_regressor)['model']
+                setattr(self, REGRESSION_TARGETS[target]['attr'], model)
+                
+                results[target] = self._regression_metrics(
+                    target, y_test_targets[target],
+                    model.predict(X_test_scaled), y_train_targets[target]
+                )
         
-        # Yield Estimation Model
-        if has_yield:
-            print("\n🌾 Training Yield Estimation Model...")
-            y_yield_train = df.loc[X_train.index, 'yield_estimation']
-            y_yield_test = df.loc[X_test.index, 'yield_estimation']
+        if multi_output and targets:
+            per_target_results = {t: results[t] for t in targets if t in results}
+            per_target_models = [getattr(self, REGRESSION_TARGETS[t]['attr']) for t in per_target_results]
             
-            self.yield_model = RandomForestRegressor(
-                n_estimators=200, max_depth=20, min_samples_split=5,
-                min_samples_leaf=2, random_state=42, n_jobs=-1
-            )
-            self.yield_model.fit(X_train_scaled, y_yield_train)
-            y_pred_yield = self.yield_model.predict(X_test_scaled)
+            print(f"\n🧩 Training Multi-Output Regression Model ({', '.join(targets)})...")
+            self._progress(progress, 'multi_output', 0.85)
             
-            rmse = np.sqrt(mean_squared_error(y_yield_test, y_pred_yield))
-            r2 = r2_score(y_yield_test, y_pred_yield)
+            def fit_multi_output():
+                scaler = StandardScaler()
+                model = self._new_regressor()
+                model.fit(X_train_scaled, scaler.fit_transform(y_train_targets))
+                return {'model': model, 'scaler': scaler}
             
-            results['yield_estimation'] = {
-                'rmse': round(rmse, 2),
-                'r2_score': round(r2, 4),
-                'mean_yield': round(y_yield_train.mean(), 2)
-            }
-            print(f"   ✅ RMSE: {rmse:.2f}, R²: {r2:.4f}")
-        
-        # Growth Duration Model
-        if has_duration:
-            print("\n⏱️ Training Growth Duration Model...")
-            y_duration_train = df.loc[X_train.index, 'growth_duration']
-            y_duration_test = df.loc[X_test.index, 'growth_duration']
+            fitted = self._fit_cached(cache, keys.get('multi_output'), fit_multi_output)
+            self.regression_targets = targets
+            self.regression_scaler = fitted['scaler']
+            self.regression_model = fitted['model']
+            y_pred_multi = self._predict_regressions(X_test_scaled)
             
-            self.duration_model = RandomForestRegressor(
-                n_estimators=200, max_depth=20, min_samples_split=5,
-                min_samples_leaf=2, random_state=42, n_jobs=-1
-            )
-            self.duration_model.fit(X_train_scaled, y_duration_train)
-            y_pred_duration = self.duration_model.predict(X_test_scaled)
+            for target in targets:
+                results[target] = self._regression_metrics(
+                    target, y_test_targets[target], y_pred_multi[target], y_train_targets[target]
+                )
             
-            rmse = np.sqrt(mean_squared_error(y_duration_test, y_pred_duration))
-            r2 = r2_score(y_duration_test, y_pred_duration)
+            if per_target_results:
+                results['multi_output_comparison'] = self._compare_regression_modes(
+                    per_target_results, results, per_target_models, X_test_scaled
+                )
             
-            results['growth_duration'] = {
-                'rmse': round(rmse, 2),
-                'r2_score': round(r2, 4),
-                'mean_duration': round(y_duration_train.mean(), 1)
-            }
-            print(f"   ✅ RMSE: {rmse:.2f} days, R²: {r2:.4f}")
+            # Per-target forests were only fit for the comparison report
+            self.quality_model = self.yield_model = self.duration_model = None
+        else:
+            self.regression_model = None
+            self.regression_scaler = None
+            self.regression_targets = []
         
         results['test_samples'] = len(X_test)
         results['train_samples'] = len(X_train)
         
+        self.data_watermark = watermark
+        self.replay_buffer = self._build_replay_buffer(
+            X_train_scaled, y_crop_train.to_numpy(), y_train_targets
+        )
+        self.training_key = keys.get('run')
+        self._progress(progress, 'save', 0.95)
         self.save_model()
+        if cache is not None:
+            cache.put(keys['run'], results)
         return results
     
+    def _training_keys(self, cache, df, targets, test_size, multi_output, compare_multi_output):
+        """
+        Cache keys for every model a training run fits
+        
+        The split depends on the features and labels, so every key includes
+        their fingerprint; a regression key adds only its own target column.
+        """
+        if cache is None:
+            return {}
+        
+        base = (column_fingerprint(df, self.feature_names + ['label']),
+                self.feature_names, test_size, self.model_params)
+        keys = {'classifier': cache.key('classifier', *base, self.classifier_params)}
+        for target in targets:
+            keys[target] = cache.key(target, *base, column_fingerprint(df, [target]))
+        if multi_output and targets:
+            keys['multi_output'] = cache.key('multi_output', *base, column_fingerprint(df, targets))
+        keys['run'] = cache.key('run', sorted(keys.items()), multi_output, compare_multi_output)
+        return keys
+    
+    def _progress(self, progress, stage, fraction):
+        if progress is not None:
+            progress(stage, fraction)
+    
+    def _fit_cached(self, cache, key, fit):
+        return fit() if cache is None else cache.get_or_fit(key, fit)
+    
+    def train_incremental(self, data_path='data/crop_recommendation.csv', min_new_trees=5, progress=None):
+        """
+        Grow the existing forests with trees fit on rows added since the last run
+        
+        Only the bytes past the saved data watermark are read and fit, so
+        the cost follows the new data rather than the whole history. Every
+        forest gets extra trees via warm_start, in proportion to how much
+        the data grew. The trees are fit on the new rows plus a small
+        per-crop replay buffer, so the classifier keeps every known class.
+        Falls back to a full train() when the earlier rows were rewritten,
+        a new crop label appears, or the forests grow too large.
+        
+        Returns:
+        --------
+        dict : New rows, trees added, prequential accuracy and the new watermark
+        """
+        if self.classifier_model is not None and not hasattr(self.classifier_model, 'estimators_'):
+            raise ValueError("Incremental training needs the pickled sklearn model; "
+                             "create MLCropPredictor(use_mmap=False)")
+        
+        if self.data_watermark is None or self.replay_buffer is None:
+            print("ℹ️ No data watermark recorded, running a full training")
+            return self.train(data_path, progress=progress)
+        
+        self._progress(progress, 'load', 0.0)
+        new_rows, raw_tail, new_hash = self._read_new_rows(data_path)
+        if new_rows is None:
+            print("⚠️ Training data changed before the watermark, running a full training")
+            return self.train(data_path, progress=progress)
+        if new_rows.empty:
+            print("✅ No new rows since the last training run")
+            return {'new_rows': 0, 'data_watermark': self.data_watermark}
+        
+        unseen = set(new_rows['label']) - set(self.classifier_model.classes_)
+        if unseen:
+            print(f"⚠️ New crop labels {sorted(unseen)}, running a full training")
+            return self.train(data_path, progress=progress)
+        
+        rows_seen = self.data_watermark['rows']
+        base_trees = self.model_params['n_estimators']
+        n_new_trees = max(min_new_trees, int(np.ceil(base_trees * len(new_rows) / rows_seen)))
+        if any(len(m.estimators_) + n_new_trees > MAX_INCREMENTAL_ESTIMATORS for m in self._forests()):
+            print("⚠️ Forests reached the incremental size limit, running a full training")
+            return self.train(data_path, progress=progress)
+        
+        print(f"📊 {len(new_rows)} new rows since row {rows_seen}; adding {n_new_trees} trees per forest")
+        X_new = self.scaler.transform(new_rows[self.feature_names])
+        y_new = new_rows['label'].to_numpy()
+        
+        # Prequential check: score the new rows before the model has seen them
+        prequential = accuracy_score(y_new, self.classifier_model.classes_[
+            self.classifier_model.predict_proba(X_new).argmax(axis=1)])
+        
+        self._progress(progress, 'grow_forests', 0.2)
+        buffer = self.replay_buffer
+        X_fit = np.vstack([X_new, buffer['X']])
+        y_fit = np.concatenate([y_new, buffer['labels']])
+        self._grow(self.classifier_model, X_fit, y_fit, n_new_trees)
+        
+        targets_new = new_rows.reindex(columns=list(buffer['targets']))
+        targets_fit = {t: np.concatenate([targets_new[t].to_numpy(dtype=np.float64), buffer['targets'][t]])
+                       for t in buffer['targets']}
+        if self.regression_model is not None:
+            Y_fit = np.column_stack([targets_fit[t] for t in self.regression_targets])
+            self._grow(self.regression_model, X_fit, self.regression_scaler.transform(Y_fit), n_new_trees)
+        for target, spec in REGRESSION_TARGETS.items():
+            model = getattr(self, spec['attr'])
+            if model is not None and target in targets_fit:
+                self._grow(model, X_fit, targets_fit[target], n_new_trees)
+        
+        self.data_watermark = self._watermark(
+            data_path, rows_seen + len(new_rows), self.data_watermark['bytes'] + len(raw_tail),
+            new_hash, increments=self.data_watermark.get('increments', 0) + 1
+        )
+        self.replay_buffer = self._build_replay_buffer(
+            X_fit, y_fit, pd.DataFrame(targets_fit)
+        )
+        # The grown forests no longer match any cached training run
+        self.training_key = None
+        self._progress(progress, 'save', 0.95)
+        self.save_model()
+        
+        print(f"   ✅ Accuracy on new rows before update: {prequential * 100:.2f}%")
+        return {
+            'new_rows': len(new_rows),
+            'trees_added': n_new_trees,
+            'classifier_trees': len(self.classifier_model.estimators_),
+            'prequential_accuracy': round(prequential * 100, 2),
+            'data_watermark': self.data_watermark
+        }
+    
+    def _grow(self, model, X, y, n_new_trees):
+        """Append n_new_trees to a fitted forest without refitting the old ones"""
+        model.set_params(warm_start=True, oob_score=False, n_jobs=-1,
+                         n_estimators=len(model.estimators_) + n_new_trees)
+        model.fit(X, y)
+        model.set_params(warm_start=False)
+    
+    def _load_training_data(self, data_path):
+        """Load the training dataset, returning it with its data watermark"""
+        df, meta = load_dataset(data_path, with_meta=True)
+        return df, self._watermark(data_path, meta['rows'], meta['bytes'], meta['tail_sha1'])
+    
+    def _watermark(self, data_path, rows, n_bytes, tail_hash, increments=0):
+        return {
+            'path': data_path,
+            'rows': rows,
+            'bytes': n_bytes,
+            'tail_sha1': tail_hash,
+            'trained_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'increments': increments
+        }
+    
+    def _read_new_rows(self, data_path):
+        """
+        Rows appended after the watermark
+        
+        Returns:
+        --------
+        tuple : (DataFrame, bytes read, tail hash of the file up to the
+                end of those bytes), or (None, None, None) when the file no
+                longer matches the watermark
+        """
+        watermark = self.data_watermark
+        offset = watermark['bytes']
+        with open(data_path, 'rb') as f:
+            header = f.readline().decode().strip().split(',')
+            if os.fstat(f.fileno()).st_size < offset:
+                return None, None, None
+            f.seek(max(0, offset - TAIL_HASH_BYTES))
+            before = f.read(offset - max(0, offset - TAIL_HASH_BYTES))
+            if tail_sha1(before) != watermark['tail_sha1']:
+                return None, None, None
+            raw_tail = f.read()
+        
+        new_hash = tail_sha1(before + raw_tail)
+        if not raw_tail.strip():
+            return pd.DataFrame(columns=header), raw_tail, new_hash
+        new_rows = pd.read_csv(io.BytesIO(raw_tail.lstrip(b'\r\n')), header=None, names=header)
+        return new_rows, raw_tail, new_hash
+    
+    def _build_replay_buffer(self, X_scaled, labels, targets_df):
+        """Keep up to REPLAY_ROWS_PER_CLASS random rows of every crop"""
+        rng = np.random.default_rng(self.model_params.get('random_state'))
+        keep = []
+        for label in np.unique(labels):
+            rows = np.flatnonzero(labels == label)
+            keep.extend(rng.choice(rows, size=min(len(rows), REPLAY_ROWS_PER_CLASS), replace=False))
+        keep = np.sort(np.asarray(keep, dtype=int))
+        return {
+            'X': np.asarray(X_scaled)[keep],
+            'labels': np.asarray(labels)[keep],
+            'targets': {t: targets_df[t].to_numpy(dtype=np.float64)[keep] for t in targets_df.columns}
+        }
+    
     def predict(self, input_data):
         """Predict crop and all metrics"""
         if self.classifier_model is None:
@@ -172,14 +417,14 @@ class MLCropPredictor:
             input_data['rainfall']
         ]])
         
-        features_scaled = self.scaler.transform(features)
-        
-        prediction = self.classifier_model.predict(features_scaled)[0]
-        probabilities = self.classifier_model.predict_proba(features_scaled)[0]
+        span = stage_timings.span
+        with span('ml.scaler'):
+            features_scaled = self.scaler.transform(features)
         
-        top_indices = np.argsort(probabilities)[-5:][::-1]
-        top_crops = self.classifier_model.classes_[top_indices]
-        top_probs = probabilities[top_indices]
+        # One walk of the classifier trees gives label, confidence and top-k
+        with span('ml.classifier'):
+            top_indices, top_probs = self._classify(features_scaled, top_k=5)
+        top_crops = self.classifier_model.classes_[top_indices[0]]
         
         recommendations = [
             {
@@ -187,30 +432,274 @@ class MLCropPredictor:
                 'confidence': round(prob * 100, 2),
                 'suitability': self._get_suitability_label(prob * 100)
             }
-            for crop, prob in zip(top_crops, top_probs)
+            for crop, prob in zip(top_crops, top_probs[0])
         ]
         
         result = {
-            'recommended_crop': prediction,
-            'confidence': round(max(probabilities) * 100, 2),
+            'recommended_crop': top_crops[0],
+            'confidence': round(top_probs[0, 0] * 100, 2),
             'all_recommendations': recommendations,
             'feature_contribution': self._analyze_feature_contribution(features[0])
         }
         
-        if self.quality_model:
-            result['quality_score'] = round(self.quality_model.predict(features_scaled)[0], 2)
+        regressions = self._predict_regressions(features_scaled, span)
+        
+        if 'quality_score' in regressions:
+            result['quality_score'] = round(regressions['quality_score'][0], 2)
             result['quality_grade'] = self._get_quality_grade(result['quality_score'])
         
-        if self.yield_model:
-            result['yield_estimation'] = round(self.yield_model.predict(features_scaled)[0], 2)
+        if 'yield_estimation' in regressions:
+            result['yield_estimation'] = round(regressions['yield_estimation'][0], 2)
             result['yield_unit'] = 'tonnes/hectare'
         
-        if self.duration_model:
-            result['growth_duration'] = round(self.duration_model.predict(features_scaled)[0], 1)
+        if 'growth_duration' in regressions:
+            result['growth_duration'] = round(regressions['growth_duration'][0], 1)
             result['duration_unit'] = 'days'
         
         return result
     
+    def predict_batch(self, input_data, top_k=5, classify=True):
+        """
+        Predict crop and all metrics for many rows at once
+        
+        Parameters:
+        -----------
+        input_data : DataFrame, ndarray or list of dicts
+            DataFrame columns may use either the model feature names
+            (N, P, K, ...) or the input keys (nitrogen, phosphorus, ...).
+            An ndarray must have the columns in feature order.
+        top_k : int
+            Number of ranked crop recommendations per row
+        classify : bool
+            Skip the classifier (regression targets only) when False
+            
+        Returns:
+        --------
+        dict : Column name -> ndarray with one entry per input row
+        """
+        if self.classifier_model is None:
+            raise ValueError("Model not trained")
+        
+        features = self._batch_features(input_data)
+        features_scaled = self.scaler.transform(features)
+        
+        result = {}
+        with _batch_parallelism(len(features)):
+            if classify:
+                top_indices, top_probs = self._classify(features_scaled, top_k)
+                classes = self.classifier_model.classes_
+                result['recommended_crop'] = classes[top_indices[:, 0]]
+                result['confidence'] = np.round(top_probs[:, 0] * 100, 2)
+                result['top_crops'] = classes[top_indices]
+                result['top_confidences'] = np.round(top_probs * 100, 2)
+            
+            regressions = self._predict_regressions(features_scaled)
+        
+        if 'quality_score' in regressions:
+            quality = np.round(regressions['quality_score'], 2)
+            result['quality_score'] = quality
+            result['quality_grade'] = np.select(
+                [quality >= 85, quality >= 70, quality >= 55],
+                ['Excellent', 'Good', 'Average'], default='Poor'
+            )
+        
+        if 'yield_estimation' in regressions:
+            result['yield_estimation'] = np.round(regressions['yield_estimation'], 2)
+        
+        if 'growth_duration' in regressions:
+            result['growth_duration'] = np.round(regressions['growth_duration'], 1)
+        
+        return result
+    
+    def _predict_regressions(self, features_scaled, span=null_span):
+        """Predict every available regression target, keyed by dataset column"""
+        if self.regression_model is not None:
+            with span('ml.regressor.multi_output'):
+                scaled = self.regression_model.predict(features_scaled).reshape(len(features_scaled), -1)
+                values = self.regression_scaler.inverse_transform(scaled)
+            return {target: values[:, i] for i, target in enumerate(self.regression_targets)}
+        
+        predictions = {}
+        for target, spec in REGRESSION_TARGETS.items():
+            model = getattr(self, spec['attr'])
+            if model:
+                with span(f'ml.regressor.{target}'):
+                    predictions[target] = model.predict(features_scaled)
+        return predictions
+    
+    def _classify(self, features_scaled, top_k=5):
+        """
+        Rank crops from a single predict_proba pass
+        
+        Returns:
+        --------
+        tuple : (top_indices, top_probs), both shaped (n_rows, top_k) and
+                ordered best first; column 0 matches classifier.predict
+        """
+        probabilities = self.classifier_model.predict_proba(features_scaled)
+        n_classes = probabilities.shape[1]
+        top_k = min(top_k, n_classes)
+        
+        # argpartition is O(n_classes); only the k survivors get sorted
+        if top_k < n_classes:
+            candidates = np.argpartition(-probabilities, top_k - 1, axis=1)[:, :top_k]
+        else:
+            candidates = np.tile(np.arange(n_classes), (len(probabilities), 1))
+        candidate_probs = np.take_along_axis(probabilities, candidates, axis=1)
+        
+        # Break ties on class index so the winner is the same one argmax picks
+        order = np.lexsort((candidates, -candidate_probs), axis=1)
+        top_indices = np.take_along_axis(candidates, order, axis=1)
+        top_probs = np.take_along_axis(candidate_probs, order, axis=1)
+        
+        # With more tied maxima than top_k, argpartition may drop argmax's pick
+        top_indices[:, 0] = probabilities.argmax(axis=1)
+        return top_indices, top_probs
+    
+    def _batch_features(self, input_data):
+        """Convert batch input to a float feature matrix in model order"""
+        if isinstance(input_data, list):
+            input_data = pd.DataFrame(input_data)
+        
+        if isinstance(input_data, pd.DataFrame):
+            if all(name in input_data.columns for name in self.feature_names):
+                columns = self.feature_names
+            else:
+                columns = INPUT_KEYS
+            return input_data[columns].to_numpy(dtype=np.float64)
+        
+        features = np.asarray(input_data, dtype=np.float64)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        if features.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"Expected {len(self.feature_names)} feature columns, got {features.shape[1]}"
+            )
+        return features
+    
+    def _forests(self):
+        return [m for m in (self.classifier_model, self.quality_model, self.yield_model,
+                            self.duration_model, self.regression_model) if m is not None]
+    
+    def _split(self, X, y_crop, test_size):
+        """Stratified train/test split shared by every training path"""
+        return train_test_split(X, y_crop, test_size=test_size, random_state=42, stratify=y_crop)
+    
+    def _classifier_params(self):
+        return {**self.model_params, **self.classifier_params}
+    
+    def _use_classifier(self, model):
+        """Install a freshly fit classifier and record the overrides it was fit with"""
+        self.classifier_model = model
+        self.trained_classifier_params = dict(self.classifier_params)
+        if self.classifier_params:
+            print(f"   • Classifier settings from the hyperparameter search: {self.classifier_params}")
+        else:
+            print("   • Classifier settings: defaults (model_params)")
+    
+    def reuse_search_params(self):
+        """Fit the next classifier with the search overrides the saved one was trained with"""
+        self.classifier_params = dict(self.trained_classifier_params)
+        return self.classifier_params
+    
+    def _new_classifier(self, **overrides):
+        return RandomForestClassifier(**{**self._classifier_params(), 'n_jobs': -1, **overrides})
+    
+    def _new_regressor(self, **overrides):
+        return RandomForestRegressor(**{**self.model_params, 'n_jobs': -1, **overrides})
+    
+    def _classification_metrics(self, y_true, y_pred, cv_scores=None, oob_score=None):
+        """Evaluation summary for the crop classifier (CV or out-of-bag)"""
+        metrics = {'accuracy': round(accuracy_score(y_true, y_pred) * 100, 2)}
+        if cv_scores is not None:
+            metrics['cv_mean'] = round(cv_scores.mean() * 100, 2)
+            metrics['cv_std'] = round(cv_scores.std() * 100, 2)
+        if oob_score is not None:
+            metrics['oob_accuracy'] = round(oob_score * 100, 2)
+        metrics['feature_importance'] = dict(zip(
+            self.feature_names,
+            [round(imp * 100, 2) for imp in self.classifier_model.feature_importances_]
+        ))
+        print(f"   ✅ Accuracy: {metrics['accuracy']}%")
+        return metrics
+    
+    def _regression_metrics(self, target, y_true, y_pred, y_train):
+        """Evaluation summary for one regression target"""
+        rmse = np.sqrt(mean_squared_error(y_true, y_pred))
+        r2 = r2_score(y_true, y_pred)
+        
+        rmse, r2 = float(rmse), float(r2)
+        metrics = {'rmse': round(rmse, 2), 'r2_score': round(r2, 4)}
+        if target == 'quality_score':
+            metrics['accuracy_percentage'] = round((1 - rmse/100) * 100, 2)
+        elif target == 'yield_estimation':
+            metrics['mean_yield'] = round(float(y_train.mean()), 2)
+        elif target == 'growth_duration':
+            metrics['mean_duration'] = round(float(y_train.mean()), 1)
+        
+        unit = ' days' if target == 'growth_duration' else ''
+        print(f"   ✅ RMSE: {rmse:.2f}{unit}, R²: {r2:.4f}")
+        return metrics
+    
+    def _compare_regression_modes(self, single_results, multi_results, single_models, X_test_scaled):
+        """Accuracy, size and single-row latency of multi-output vs per-target forests"""
+        comparison = {'targets': {}}
+        for target, single in single_results.items():
+            multi = multi_results[target]
+            comparison['targets'][target] = {
+                'rmse_single': single['rmse'],
+                'rmse_multi': multi['rmse'],
+                'rmse_delta': round(multi['rmse'] - single['rmse'], 2),
+                'r2_single': single['r2_score'],
+                'r2_multi': multi['r2_score'],
+                'r2_delta': round(multi['r2_score'] - single['r2_score'], 4)
+            }
+        
+        row = X_test_scaled[:1]
+        
+        def latency_ms(predict_fn, repeats=20):
+            predict_fn()
+            start = time.perf_counter()
+            for _ in range(repeats):
+                predict_fn()
+            return round((time.perf_counter() - start) / repeats * 1000, 2)
+        
+        comparison['size_mb_single'] = round(
+            sum(len(pickle.dumps(m)) for m in single_models) / 1e6, 2)
+        comparison['size_mb_multi'] = round(len(pickle.dumps(self.regression_model)) / 1e6, 2)
+        
+        # Time single-threaded, then give the models (possibly shared via the cache) their setting back
+        models = single_models + [self.regression_model]
+        saved_n_jobs = [model.n_jobs for model in models]
+        try:
+            for model in models:
+                model.n_jobs = 1
+            comparison['latency_ms_single'] = latency_ms(lambda: [m.predict(row) for m in single_models])
+            comparison['latency_ms_multi'] = latency_ms(lambda: self.regression_model.predict(row))
+        finally:
+            for model, n_jobs in zip(models, saved_n_jobs):
+                model.n_jobs = n_jobs
+        
+        print("\n⚖️ Multi-output vs per-target regression:")
+        for target, delta in comparison['targets'].items():
+            print(f"   • {target:16s}: RMSE {delta['rmse_single']} → {delta['rmse_multi']} "
+                  f"(Δ {delta['rmse_delta']:+}), R² Δ {delta['r2_delta']:+}")
+        print(f"   • Size: {comparison['size_mb_single']} MB → {comparison['size_mb_multi']} MB")
+        print(f"   • Single-row latency: {comparison['latency_ms_single']} ms → "
+              f"{comparison['latency_ms_multi']} ms")
+        return comparison
+    
+    def _reset_n_jobs(self):
+        """
+        Hand forest threading to the caller's joblib context
+        
+        Done once after loading or training: predictions never change
+        n_jobs, so threads can share one model (see _batch_parallelism).
+        """
+        for model in self._forests():
+            if hasattr(model, 'estimators_'):
+                model.n_jobs = None
+    
     def _get_suitability_label(self, score):
         if score >= 80: return 'Excellent'
         elif score >= 60: return 'Good'
@@ -236,19 +725,42 @@ class MLCropPredictor:
         return sorted(contributions, key=lambda x: x['importance'], reverse=True)
     
     def save_model(self):
+        """Write the pickle and publish the same model to the memory-mapped store"""
+        self._reset_n_jobs()
+        arrays = compile_model(self)
+        self.model_version = arrays_version(arrays)
+        
         model_data = {
             'classifier_model': self.classifier_model,
             'quality_model': self.quality_model,
             'yield_model': self.yield_model,
             'duration_model': self.duration_model,
+            'regression_model': self.regression_model,
+            'regression_scaler': self.regression_scaler,
+            'regression_targets': self.regression_targets,
             'scaler': self.scaler,
-            'feature_names': self.feature_names
+            'feature_names': self.feature_names,
+            'model_params': self.model_params,
+            'classifier_params': self.trained_classifier_params,
+            'data_watermark': self.data_watermark,
+            'replay_buffer': self.replay_buffer,
+            'training_key': self.training_key,
+            'model_version': self.model_version
         }
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        with open(self.model_path, 'wb') as f:
+        tmp_path = f'{self.model_path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
             pickle.dump(model_data, f)
+        os.replace(tmp_path, self.model_path)
+        
+        # Published after the pickle so a fresh store is never older than it
+        write_store(self.store_path, arrays)
     
     def load_model(self):
+        if self.model_path.endswith('.npz'):
+            return os.path.exists(self.model_path) and self.load_compiled(self.model_path)
+        if self.use_mmap and store_is_fresh(self.store_path, self.model_path) and self.load_mmap():
+            return True
         if not os.path.exists(self.model_path):
             return False
         try:
@@ -258,9 +770,82 @@ class MLCropPredictor:
             self.quality_model = model_data.get('quality_model')
             self.yield_model = model_data.get('yield_model')
             self.duration_model = model_data.get('duration_model')
+            self.regression_model = model_data.get('regression_model')
+            self.regression_scaler = model_data.get('regression_scaler')
+            self.regression_targets = model_data.get('regression_targets', [])
             self.scaler = model_data['scaler']
             self.feature_names = model_data['feature_names']
+            self.model_params = model_data.get('model_params', dict(DEFAULT_FOREST_PARAMS))
+            self.trained_classifier_params = model_data.get('classifier_params', {})
+            self.data_watermark = model_data.get('data_watermark')
+            self.replay_buffer = model_data.get('replay_buffer')
+            self.training_key = model_data.get('training_key')
+            self.model_version = model_data.get('model_version') or arrays_version(compile_model(self))
+            self._reset_n_jobs()
             return True
         except Exception as e:
             print(f"Error loading model: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def load_mmap(self):
+        """Map the current store version read-only (inference only, shared across processes)"""
+        try:
+            arrays, manifest = open_store(self.store_path)
+            apply_compiled_model(self, arrays)
+            self.model_version = manifest['model_version']
+            return True
+        except Exception as e:
+            print(f"Error loading memory-mapped model: {e}")
+            return False
+    
+    def memory_footprint(self):
+        """
+        Bytes held by the loaded forests and scalers
+        
+        Returns:
+        --------
+        dict : total bytes and how many of them are file-backed (mmap)
+        """
+        total = mapped = 0
+        for model in self._forests() + [self.scaler, self.regression_scaler]:
+            for array in _model_arrays(model):
+                total += array.nbytes
+                if isinstance(array, np.memmap):
+                    mapped += array.nbytes
+        return {'total_bytes': total, 'mapped_bytes': mapped}
+    
+    def load_compiled(self, path):
+        """Load flat-array forests written by forest_compiler (inference only)"""
+        try:
+            arrays = load_compiled_arrays(path)
+            apply_compiled_model(self, arrays)
+            self.model_version = arrays_version(arrays)
+            return True
+        except Exception as e:
+            print(f"Error loading compiled model: {e}")
+            return False
+
+
+def _batch_parallelism(n_rows):
+    """
+    joblib threads for batches big enough to pay for them
+    
+    The backend context is thread-local, so concurrent callers of a shared
+    model don't affect each other.
+    """
+    if n_rows >= PARALLEL_BATCH_THRESHOLD:
+        return parallel_backend('threading', n_jobs=-1)
+    return nullcontext()
+
+
+def _model_arrays(model):
+    """NumPy arrays that make up a fitted forest or scaler"""
+    if model is None:
+        return []
+    if hasattr(model, 'estimators_'):
+        arrays = []
+        for estimator in model.estimators_:
+            state = estimator.tree_.__getstate__()
+            arrays.extend([state['nodes'], state['values']])
+        return arrays
+    return [value for value in vars(model).values() if isinstance(value, np.ndarray)]
\ No newline at end of file
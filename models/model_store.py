@@ -0,0 +1,136 @@
+"""
+Memory-mapped model artifact store
+Versioned directories of raw .npy arrays that every process maps read-only
+"""
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+
+# Bump when the directory layout or manifest schema changes
+STORE_FORMAT_VERSION = 1
+
+MANIFEST_FILE = 'manifest.json'
+CURRENT_FILE = 'CURRENT'
+
+
+def store_path_for(model_path):
+    """Array store directory that sits next to a pickle model path"""
+    return os.path.splitext(model_path)[0] + '.arrays'
+
+
+def arrays_version(arrays):
+    """Content hash of an array mapping, used as the model version"""
+    digest = hashlib.sha1()
+    for name in sorted(arrays):
+        array = np.asarray(arrays[name], order='C')
+        digest.update(name.encode())
+        digest.update(str(array.dtype).encode())
+        digest.update(str(array.shape).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()[:12]
+
+
+def write_store(store_dir, arrays, keep=2):
+    """
+    Publish arrays as a new store version
+    
+    Files are written uncompressed into a temporary directory, renamed into
+    place, and only then is CURRENT switched over, so readers never see a
+    half-written version. Processes that still map an older version keep
+    their pages after it is pruned.
+    
+    Returns:
+    --------
+    str : The version that is now current
+    """
+    version = arrays_version(arrays)
+    version_dir = os.path.join(store_dir, version)
+    os.makedirs(store_dir, exist_ok=True)
+    
+    if not os.path.exists(os.path.join(version_dir, MANIFEST_FILE)):
+        tmp_dir = os.path.join(store_dir, f'.tmp-{os.getpid()}-{version}')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        
+        manifest = {'format_version': STORE_FORMAT_VERSION, 'model_version': version, 'arrays': {}}
+        for index, (name, array) in enumerate(sorted(arrays.items())):
+            filename = f'{index:03d}.npy'
+            np.save(os.path.join(tmp_dir, filename), np.asarray(array, order='C'), allow_pickle=False)
+            manifest['arrays'][name] = filename
+        
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        
+        shutil.rmtree(version_dir, ignore_errors=True)
+        os.replace(tmp_dir, version_dir)
+    
+    _write_atomic(os.path.join(store_dir, CURRENT_FILE), version)
+    _prune(store_dir, keep=keep, current=version)
+    return version
+
+
+def current_version(store_dir):
+    """Version named by CURRENT, or None when the store is missing"""
+    try:
+        with open(os.path.join(store_dir, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def store_is_fresh(store_dir, model_path):
+    """True when the store has a current version no older than the pickle"""
+    if current_version(store_dir) is None:
+        return False
+    if not os.path.exists(model_path):
+        return True
+    store_mtime = os.path.getmtime(os.path.join(store_dir, CURRENT_FILE))
+    return store_mtime >= os.path.getmtime(model_path)
+
+
+def open_store(store_dir, version=None):
+    """
+    Map a store version read-only
+    
+    Returns:
+    --------
+    tuple : (arrays, manifest) where arrays maps name -> np.memmap
+    """
+    version = version or current_version(store_dir)
+    if version is None:
+        raise FileNotFoundError(f"No model store at {store_dir}")
+    
+    version_dir = os.path.join(store_dir, version)
+    with open(os.path.join(version_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    
+    if manifest.get('format_version') != STORE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported model store version {manifest.get('format_version')}")
+    
+    arrays = {
+        name: np.load(os.path.join(version_dir, filename), mmap_mode='r', allow_pickle=False)
+        for name, filename in manifest['arrays'].items()
+    }
+    return arrays, manifest
+
+
+def _write_atomic(path, text):
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _prune(store_dir, keep, current):
+    """Remove all but the newest `keep` versions (never the current one)"""
+    versions = [
+        entry for entry in os.listdir(store_dir)
+        if not entry.startswith('.') and entry != CURRENT_FILE
+        and os.path.isdir(os.path.join(store_dir, entry))
+    ]
+    versions.sort(key=lambda v: os.path.getmtime(os.path.join(store_dir, v)), reverse=True)
+    for version in versions[keep:]:
+        if version != current:
+            shutil.rmtree(os.path.join(store_dir, version), ignore_errors=True)
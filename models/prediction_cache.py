@@ -0,0 +1,107 @@
+"""
+Bounded LRU/TTL cache with request coalescing for prediction results
+"""
+import threading
+import time
+from collections import OrderedDict
+from config.settings import PREDICTION_CACHE
+
+
+class _Pending:
+    """A computation in flight that other callers for the same key wait on"""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with optional expiry
+    
+    Concurrent misses on the same key are coalesced: the first caller
+    computes, the others block until it finishes and share its result
+    (or its exception).
+    """
+    
+    def __init__(self, maxsize=2048, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+    
+    def get_or_compute(self, key, compute):
+        """Cached value for `key`, calling `compute()` at most once per miss"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = _Pending()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+        
+        if not owner:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+        
+        try:
+            pending.value = compute()
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                if pending.error is None:
+                    self._store(key, pending.value)
+                del self._inflight[key]
+            pending.event.set()
+        return pending.value
+    
+    def _store(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'hit_rate': round((self.hits + self.coalesced) / lookups * 100, 2) if lookups else 0.0
+            }
+    
+    def __len__(self):
+        return len(self._data)
+
+
+# Shared across every CropPredictor/session in this process
+prediction_cache = PredictionCache(
+    maxsize=PREDICTION_CACHE['maxsize'], ttl=PREDICTION_CACHE['ttl_seconds']
+)
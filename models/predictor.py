@@ -1,57 +1,97 @@
 """
 Crop Quality Prediction Model - HYBRID VERSION
 """
+import copy
+import zlib
 import numpy as np
-from config.settings import CROP_PARAMETERS, ALERT_THRESHOLDS
+from config.settings import ALERT_THRESHOLDS
+from models.registry import model_registry, DEFAULT_MODEL_PATH
+from models.instrumentation import stage_timings
+from models.crop_catalog import get_crop_catalog
+from models.rule_engine import get_rule_engine, features_from, FACTOR_KEYS, FACTOR_NAMES, INPUT_COLUMNS
 
 class CropPredictor:
     """Hybrid crop quality predictor"""
     
-    def __init__(self, use_ml=True):
-        self.crop_params = CROP_PARAMETERS
+    def __init__(self, use_ml=True, model_path=DEFAULT_MODEL_PATH, seed=None, cache=None):
+        """
+        Parameters:
+        -----------
+        seed : int, optional
+            Makes the yield jitter a pure function of (seed, input) so
+            identical inputs always give identical results
+        cache : PredictionCache, optional
+            Memoizes predict(); requires a seed
+        """
+        if cache is not None and seed is None:
+            raise ValueError("Prediction caching requires a seed for deterministic results")
+        
+        self.crop_params = get_crop_catalog()
         self.alerts = ALERT_THRESHOLDS
         self.use_ml = use_ml
-        self.ml_predictor = None
+        self.model_path = model_path
+        self.seed = seed
+        self.cache = cache
         
-        if use_ml:
-            try:
-                from models.ml_predictor import MLCropPredictor
-                self.ml_predictor = MLCropPredictor()
-                if self.ml_predictor.classifier_model is None:
-                    print("⚠️ ML model not trained. Using rule-based predictions.")
-                    self.ml_predictor = None
-            except Exception as e:
-                print(f"⚠️ Could not load ML model: {e}")
-                self.ml_predictor = None
+        if use_ml and self.ml_predictor is None:
+            print("⚠️ ML model not trained. Using rule-based predictions.")
+    
+    @property
+    def ml_predictor(self):
+        """Shared model from the process-wide registry (picks up retrained models)"""
+        if not self.use_ml:
+            return None
+        return model_registry.get(self.model_path)
     
     def predict(self, input_data):
         """Predict crop quality"""
-        normalized_input = self._normalize_input(input_data)
+        with stage_timings.span('predict'):
+            with stage_timings.span('normalize_input'):
+                normalized_input = self._normalize_input(input_data)
+            ml_predictor = self.ml_predictor
+            
+            if self.cache is None:
+                return self._predict(normalized_input, ml_predictor)
+            
+            # Key on the model version too so a hot-reloaded model never serves stale results
+            model_version = ml_predictor.model_version if ml_predictor is not None else 'rule-based'
+            key = (self._input_key(normalized_input), model_version, self.seed)
+            result = self.cache.get_or_compute(key, lambda: self._predict(normalized_input, ml_predictor))
+            return copy.deepcopy(result)
+    
+    def _predict(self, normalized_input, ml_predictor):
+        span = stage_timings.span
         crop_type = normalized_input['crop_type']
+        rng = self._rng_for(normalized_input)
+        
+        # One engine pass gives both the rule-based score and the factor breakdown
+        with span('rule_based_score'):
+            rule_score, factor_scores = self._rule_scores(normalized_input, crop_type)
         
         # Try ML prediction first
-        if self.ml_predictor is not None:
+        if ml_predictor is not None:
             try:
-                ml_result = self.ml_predictor.predict({
-                    'nitrogen': normalized_input['N'],
-                    'phosphorus': normalized_input['P'],
-                    'potassium': normalized_input['K'],
-                    'temperature': normalized_input['temperature'],
-                    'humidity': normalized_input['humidity'],
-                    'ph': normalized_input['ph'],
-                    'rainfall': normalized_input['rainfall']
-                })
+                with span('ml_predict'):
+                    ml_result = ml_predictor.predict({
+                        'nitrogen': normalized_input['N'],
+                        'phosphorus': normalized_input['P'],
+                        'potassium': normalized_input['K'],
+                        'temperature': normalized_input['temperature'],
+                        'humidity': normalized_input['humidity'],
+                        'ph': normalized_input['ph'],
+                        'rainfall': normalized_input['rainfall']
+                    })
                 
                 if 'quality_score' in ml_result:
                     score = ml_result['quality_score']
                     quality = ml_result.get('quality_grade', self._score_to_quality(score))
                 else:
-                    score, quality = self._rule_based_score(normalized_input, crop_type)
+                    score, quality = rule_score, self._score_to_quality(rule_score)
                 
                 if 'yield_estimation' in ml_result:
                     estimated_yield = ml_result['yield_estimation']
                 else:
-                    estimated_yield = self._estimate_yield_from_score(score)
+                    estimated_yield = self._estimate_yield_from_score(score, rng)
                 
                 if 'growth_duration' in ml_result:
                     growth_duration = ml_result['growth_duration']
@@ -60,17 +100,19 @@ class CropPredictor:
                 
             except Exception as e:
                 print(f"⚠️ ML prediction failed: {e}")
-                score, quality = self._rule_based_score(normalized_input, crop_type)
-                estimated_yield = self._estimate_yield_from_score(score)
+                score, quality = rule_score, self._score_to_quality(rule_score)
+                estimated_yield = self._estimate_yield_from_score(score, rng)
                 growth_duration = None
         else:
-            score, quality = self._rule_based_score(normalized_input, crop_type)
-            estimated_yield = self._estimate_yield_from_score(score)
+            score, quality = rule_score, self._score_to_quality(rule_score)
+            estimated_yield = self._estimate_yield_from_score(score, rng)
             growth_duration = None
         
-        factors = self._calculate_factors(normalized_input, crop_type)
-        recommendations = self._generate_recommendations(factors, crop_type, normalized_input)
-        yield_percentage = score * 0.8 + np.random.uniform(5, 20)
+        with span('calculate_factors'):
+            factors = self._factor_details(normalized_input, crop_type, factor_scores)
+        with span('generate_recommendations'):
+            recommendations = self._generate_recommendations(factors, crop_type, normalized_input)
+        yield_percentage = score * 0.8 + rng.uniform(5, 20)
         
         result = {
             'score': round(score, 1),
@@ -87,6 +129,94 @@ class CropPredictor:
         
         return result
     
+    def compare_crops(self, input_data, crops=None):
+        """
+        Rank crops for one set of soil and climate conditions
+        
+        The ML models don't take the crop as a feature, so they run once;
+        every crop's rule-based fit is then scored in a single engine pass.
+        Each row's score, quality, yield and growth duration match what
+        predict() returns for that crop.
+        
+        Parameters:
+        -----------
+        input_data : dict
+            Soil and climate values as passed to predict(); crop_type is ignored
+        crops : list, optional
+            Crops to compare; every crop in the catalog when omitted.
+            Raises ValueError for names the catalog doesn't know.
+        
+        Returns:
+        --------
+        list : One dict per crop ('rank', 'crop', 'rule_score', 'rule_quality',
+               'score', 'quality', 'estimated_yield', 'yield_percentage' and,
+               from the ML models, 'growth_duration' and 'ml_confidence'),
+               best rule-based fit first
+        """
+        span = stage_timings.span
+        with span('compare_crops'):
+            normalized_input = self._normalize_input(input_data)
+            crops = list(crops) if crops is not None else list(self.crop_params)
+            unknown = [crop for crop in crops if crop not in self.crop_params]
+            if unknown:
+                raise ValueError(f"Unknown crops: {unknown}")
+            
+            ml_result = {}
+            ml_predictor = self.ml_predictor
+            if ml_predictor is not None:
+                try:
+                    with span('ml_predict'):
+                        ml_result = ml_predictor.predict({
+                            'nitrogen': normalized_input['N'],
+                            'phosphorus': normalized_input['P'],
+                            'potassium': normalized_input['K'],
+                            'temperature': normalized_input['temperature'],
+                            'humidity': normalized_input['humidity'],
+                            'ph': normalized_input['ph'],
+                            'rainfall': normalized_input['rainfall']
+                        })
+                except Exception as e:
+                    print(f"⚠️ ML prediction failed: {e}")
+                    ml_result = {}
+            
+            with span('rule_based_score'):
+                rule_scores = get_rule_engine().score(features_from(normalized_input), crops)['score'][0]
+            
+            confidence = {r['crop']: r['confidence'] for r in ml_result.get('all_recommendations', [])}
+            rows = []
+            for crop, rule_score in zip(crops, rule_scores.tolist()):
+                rng = self._rng_for({**normalized_input, 'crop_type': crop})
+                if 'quality_score' in ml_result:
+                    score = ml_result['quality_score']
+                    quality = ml_result.get('quality_grade', self._score_to_quality(score))
+                else:
+                    score, quality = rule_score, self._score_to_quality(rule_score)
+                
+                if 'yield_estimation' in ml_result:
+                    estimated_yield = ml_result['yield_estimation']
+                else:
+                    estimated_yield = self._estimate_yield_from_score(score, rng)
+                yield_percentage = score * 0.8 + rng.uniform(5, 20)
+                
+                row = {
+                    'crop': crop,
+                    'rule_score': round(rule_score, 1),
+                    'rule_quality': self._score_to_quality(rule_score),
+                    'score': round(score, 1),
+                    'quality': quality,
+                    'estimated_yield': round(estimated_yield, 2),
+                    'yield_percentage': round(yield_percentage, 1),
+                    'ml_confidence': confidence.get(crop)
+                }
+                if 'growth_duration' in ml_result:
+                    row['growth_duration'] = round(ml_result['growth_duration'], 1)
+                rows.append(row)
+            
+            rows.sort(key=lambda row: (-row['rule_score'], -row['score']))
+            for rank, row in enumerate(rows, 1):
+                row['rank'] = rank
+            return rows
+    
     def _normalize_input(self, input_data):
         """Normalize input keys"""
         normalized = {}
@@ -100,98 +230,55 @@ class CropPredictor:
         normalized['crop_type'] = input_data.get('crop_type', 'wheat')
         return normalized
     
+    def _input_key(self, normalized_input):
+        return tuple(
+            float(normalized_input[k]) for k in ('N', 'P', 'K', 'temperature', 'humidity', 'ph', 'rainfall')
+        ) + (normalized_input['crop_type'],)
+    
+    def _rng_for(self, normalized_input):
+        """Seeded generator derived from the input, or the global one when unseeded"""
+        if self.seed is None:
+            return np.random
+        return np.random.default_rng([self.seed, zlib.crc32(repr(self._input_key(normalized_input)).encode())])
+    
     def _rule_based_score(self, input_data, crop_type):
         """Calculate score using rule-based approach"""
-        optimal = self.crop_params[crop_type]
-        
-        total_score = 0
-        weights = {
-            'nitrogen': 0.20, 'phosphorus': 0.15, 'potassium': 0.15,
-            'temperature': 0.15, 'humidity': 0.15, 'ph': 0.10, 'rainfall': 0.10
-        }
-        
-        n_score = max(0, 100 - abs(input_data['N'] - optimal['nitrogen']) * 0.8)
-        total_score += n_score * weights['nitrogen']
-        
-        p_score = max(0, 100 - abs(input_data['P'] - optimal['phosphorus']) * 1.5)
-        total_score += p_score * weights['phosphorus']
-        
-        k_score = max(0, 100 - abs(input_data['K'] - optimal['potassium']) * 1.5)
-        total_score += k_score * weights['potassium']
-        
-        temp_score = max(0, 100 - abs(input_data['temperature'] - optimal['temperature']) * 3)
-        total_score += temp_score * weights['temperature']
-        
-        hum_optimal = optimal['humidity']
-        if 40 <= input_data['humidity'] <= 80:
-            hum_score = 100 - abs(input_data['humidity'] - hum_optimal) * 1.5
-        else:
-            hum_score = max(0, 50 - abs(input_data['humidity'] - hum_optimal) * 2)
-        total_score += hum_score * weights['humidity']
-        
-        if 6.0 <= input_data['ph'] <= 7.5:
-            ph_score = 100 - abs(input_data['ph'] - optimal['ph']) * 20
-        else:
-            ph_score = max(0, 60 - abs(input_data['ph'] - optimal['ph']) * 25)
-        total_score += ph_score * weights['ph']
-        
-        rain_score = max(0, 100 - abs(input_data['rainfall'] - optimal['rainfall']) * 0.5)
-        total_score += rain_score * weights['rainfall']
-        
+        total_score, _ = self._rule_scores(input_data, crop_type)
         quality = self._score_to_quality(total_score)
         return total_score, quality
     
+    def _rule_scores(self, input_data, crop_type):
+        """Weighted rule-based score and the seven factor scores for one input"""
+        scores = get_rule_engine().score(features_from(input_data), [crop_type])
+        return float(scores['score'][0, 0]), scores['factors'][0, 0]
+    
+    def _rule_based_score_batch(self, input_data, crop_type):
+        """Vectorized _rule_based_score: input_data maps N, P, K, ... to equal-length arrays"""
+        return get_rule_engine().score(features_from(input_data), [crop_type])['score'][:, 0]
+    
     def _score_to_quality(self, score):
         if score >= 80: return 'Excellent'
         elif score >= 65: return 'Good'
         elif score >= 50: return 'Average'
         else: return 'Poor'
     
-    def _estimate_yield_from_score(self, score):
-        yield_percentage = score * 0.8 + np.random.uniform(5, 20)
+    def _estimate_yield_from_score(self, score, rng=np.random):
+        yield_percentage = score * 0.8 + rng.uniform(5, 20)
         return (yield_percentage / 100) * 4.5
     
     def _calculate_factors(self, input_data, crop_type):
         """Calculate individual factor scores"""
+        _, factor_scores = self._rule_scores(input_data, crop_type)
+        return self._factor_details(input_data, crop_type, factor_scores)
+    
+    def _factor_details(self, input_data, crop_type, factor_scores):
+        """Factor dicts (name, score, current, optimal) from engine factor scores"""
         optimal = self.crop_params[crop_type]
-        factors = []
-        
-        n_score = max(0, 100 - abs(input_data['N'] - optimal['nitrogen']) * 0.8)
-        factors.append({'name': 'Nitrogen', 'score': round(n_score, 1),
-                       'current': input_data['N'], 'optimal': optimal['nitrogen']})
-        
-        p_score = max(0, 100 - abs(input_data['P'] - optimal['phosphorus']) * 1.5)
-        factors.append({'name': 'Phosphorus', 'score': round(p_score, 1),
-                       'current': input_data['P'], 'optimal': optimal['phosphorus']})
-        
-        k_score = max(0, 100 - abs(input_data['K'] - optimal['potassium']) * 1.5)
-        factors.append({'name': 'Potassium', 'score': round(k_score, 1),
-                       'current': input_data['K'], 'optimal': optimal['potassium']})
-        
-        temp_score = max(0, 100 - abs(input_data['temperature'] - optimal['temperature']) * 3)
-        factors.append({'name': 'Temperature', 'score': round(temp_score, 1),
-                       'current': input_data['temperature'], 'optimal': optimal['temperature']})
-        
-        hum_optimal = optimal['humidity']
-        if 40 <= input_data['humidity'] <= 80:
-            hum_score = 100 - abs(input_data['humidity'] - hum_optimal) * 1.5
-        else:
-            hum_score = max(0, 50 - abs(input_data['humidity'] - hum_optimal) * 2)
-        factors.append({'name': 'Humidity', 'score': round(hum_score, 1),
-                       'current': input_data['humidity'], 'optimal': hum_optimal})
-        
-        if 6.0 <= input_data['ph'] <= 7.5:
-            ph_score = 100 - abs(input_data['ph'] - optimal['ph']) * 20
-        else:
-            ph_score = max(0, 60 - abs(input_data['ph'] - optimal['ph']) * 25)
-        factors.append({'name': 'pH Level', 'score': round(ph_score, 1),
-                       'current': input_data['ph'], 'optimal': optimal['ph']})
-        
-        rain_score = max(0, 100 - abs(input_data['rainfall'] - optimal['rainfall']) * 0.5)
-        factors.append({'name': 'Rainfall', 'score': round(rain_score, 1),
-                       'current': input_data['rainfall'], 'optimal': optimal['rainfall']})
-        
-        return factors
+        return [
+            {'name': name, 'score': round(float(score), 1),
+             'current': input_data[column], 'optimal': optimal[key]}
+            for key, column, name, score in zip(FACTOR_KEYS, INPUT_COLUMNS, FACTOR_NAMES, factor_scores)
+        ]
     
     def _generate_recommendations(self, factors, crop_type, input_data):
         """Generate recommendations"""
@@ -0,0 +1,152 @@
+"""
+Process-wide model registry
+Loads each trained model once per process and hot-reloads it when training publishes a new one
+"""
+import hashlib
+import os
+import threading
+import time
+from models.model_store import current_version, store_is_fresh, store_path_for, CURRENT_FILE
+
+DEFAULT_MODEL_PATH = 'models/crop_model.pkl'
+
+
+class ReadOnlyModel:
+    """Thin proxy that exposes a loaded MLCropPredictor for inference only"""
+    
+    _blocked = ('train', 'train_incremental', 'save_model', 'load_model', 'load_mmap', 'load_compiled')
+    
+    def __init__(self, model):
+        object.__setattr__(self, '_model', model)
+    
+    def __getattr__(self, name):
+        if name in self._blocked:
+            raise AttributeError(f"'{name}' is not available on a shared registry model")
+        return getattr(self._model, name)
+    
+    def __setattr__(self, name, value):
+        raise AttributeError("Shared registry models are read-only")
+
+
+class ModelRegistry:
+    """
+    Shared, lazily loaded MLCropPredictor instances keyed by model path
+    
+    A cheap stat() signature of the pickle and the mmap store's CURRENT
+    file is checked at most every `check_interval` seconds. When it changes
+    the content hash is compared, and only a real change triggers a reload.
+    The new model is fully loaded before it replaces the old entry, so
+    callers never see a half-loaded model.
+    """
+    
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, model_path=DEFAULT_MODEL_PATH):
+        """Shared read-only model for `model_path`, or None if it is not trained"""
+        entry = self._entries.get(model_path)
+        if entry is not None and time.monotonic() - entry['checked_at'] < self.check_interval:
+            return entry['model']
+        
+        with self._lock:
+            entry = self._entries.get(model_path)
+            signature = _signature(model_path)
+            
+            if entry is not None and entry['signature'] == signature:
+                entry['checked_at'] = time.monotonic()
+                return entry['model']
+            
+            content_hash = _content_hash(model_path) if signature else None
+            if entry is not None and entry['content_hash'] == content_hash:
+                entry['signature'] = signature
+                entry['checked_at'] = time.monotonic()
+                return entry['model']
+            
+            new_entry = self._load(model_path, signature, content_hash)
+            if entry is not None:
+                new_entry['reloads'] = entry['reloads'] + 1
+            self._entries[model_path] = new_entry
+            return new_entry['model']
+    
+    def stats(self, model_path=DEFAULT_MODEL_PATH):
+        """Load time, memory size and version of the currently served model"""
+        entry = self._entries.get(model_path)
+        if entry is None:
+            return None
+        return {key: value for key, value in entry.items() if key not in ('model', 'signature')}
+    
+    def invalidate(self, model_path=None):
+        """Force the next get() to reload one path, or every path"""
+        with self._lock:
+            if model_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(model_path, None)
+    
+    def _load(self, model_path, signature, content_hash):
+        from models.ml_predictor import MLCropPredictor
+        
+        start = time.perf_counter()
+        model = None
+        try:
+            predictor = MLCropPredictor(model_path=model_path)
+            if predictor.classifier_model is not None:
+                model = ReadOnlyModel(predictor)
+        except Exception as e:
+            print(f"⚠️ Could not load ML model: {e}")
+        load_time = time.perf_counter() - start
+        
+        entry = {
+            'model': model,
+            'signature': signature,
+            'content_hash': content_hash,
+            'model_version': model.model_version if model else None,
+            'load_time_ms': round(load_time * 1000, 2),
+            'loaded_at': time.time(),
+            'checked_at': time.monotonic(),
+            'reloads': 0
+        }
+        if model is not None:
+            entry.update(model.memory_footprint())
+            print(f"🔄 Loaded ML model {entry['model_version']} in {entry['load_time_ms']} ms "
+                  f"({entry['total_bytes'] / 1e6:.1f} MB, {entry['mapped_bytes'] / 1e6:.1f} MB mapped)")
+        return entry
+
+
+def _signature(model_path):
+    """(mtime, size) of the pickle and of the store's CURRENT pointer"""
+    parts = []
+    for path in (model_path, os.path.join(store_path_for(model_path), CURRENT_FILE)):
+        try:
+            stat = os.stat(path)
+            parts.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            parts.append(None)
+    return tuple(parts) if any(parts) else None
+
+
+def _content_hash(model_path):
+    """Model store version when it is fresh, otherwise a hash of the pickle bytes"""
+    store_path = store_path_for(model_path)
+    if store_is_fresh(store_path, model_path):
+        return current_version(store_path)
+    
+    digest = hashlib.sha1()
+    with open(model_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+# Shared by every Streamlit session in this process
+model_registry = ModelRegistry()
+
+
+def get_model(model_path=DEFAULT_MODEL_PATH):
+    return model_registry.get(model_path)
+
+
+def get_model_stats(model_path=DEFAULT_MODEL_PATH):
+    return model_registry.stats(model_path)
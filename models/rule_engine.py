@@ -0,0 +1,115 @@
+"""
+Vectorized rule-based scoring engine
+Scores many input rows against every crop's optimum conditions in one broadcasted NumPy pass
+"""
+from functools import lru_cache
+import numpy as np
+from models.crop_catalog import get_crop_catalog, CropCatalog, PARAMETER_KEYS
+
+# (crop parameter key, normalized input key, display name, weight,
+#  in-range low, in-range high, in-range slope, clamp in range at 0,
+#  out-of-range base, out-of-range slope)
+# A factor without a range scores max(0, 100 - |x - optimum| * slope).
+RULE_FACTORS = [
+    ('nitrogen', 'N', 'Nitrogen', 0.20, -np.inf, np.inf, 0.8, True, 0, 0),
+    ('phosphorus', 'P', 'Phosphorus', 0.15, -np.inf, np.inf, 1.5, True, 0, 0),
+    ('potassium', 'K', 'Potassium', 0.15, -np.inf, np.inf, 1.5, True, 0, 0),
+    ('temperature', 'temperature', 'Temperature', 0.15, -np.inf, np.inf, 3, True, 0, 0),
+    ('humidity', 'humidity', 'Humidity', 0.15, 40, 80, 1.5, False, 50, 2),
+    ('ph', 'ph', 'pH Level', 0.10, 6.0, 7.5, 20, False, 60, 25),
+    ('rainfall', 'rainfall', 'Rainfall', 0.10, -np.inf, np.inf, 0.5, True, 0, 0)
+]
+
+FACTOR_KEYS = [factor[0] for factor in RULE_FACTORS]
+INPUT_COLUMNS = [factor[1] for factor in RULE_FACTORS]
+FACTOR_NAMES = [factor[2] for factor in RULE_FACTORS]
+
+
+class RuleEngine:
+    """
+    Crop catalog as an optimum matrix (crops x factors)
+    
+    score() broadcasts M input rows against the chosen crops, giving the
+    per-factor scores (M, crops, factors) and, from those same values, the
+    weighted total (M, crops). Results match CropPredictor's scalar rules.
+    """
+    
+    def __init__(self, crop_params=None):
+        if crop_params is None:
+            crop_params = get_crop_catalog()
+        self.crops = list(crop_params)
+        if isinstance(crop_params, CropCatalog):
+            # Same crop ids as the catalog; only the columns are put in factor order
+            self.crop_index = crop_params.crop_index
+            self.optimum = crop_params.table[:, [PARAMETER_KEYS.index(key) for key in FACTOR_KEYS]]
+        else:
+            self.crop_index = {crop: i for i, crop in enumerate(self.crops)}
+            self.optimum = np.array([[crop_params[crop][key] for key in FACTOR_KEYS] for crop in self.crops],
+                                    dtype=np.float64)
+        
+        columns = list(zip(*RULE_FACTORS))
+        self.weights = np.array(columns[3], dtype=np.float64)
+        self.low = np.array(columns[4], dtype=np.float64)
+        self.high = np.array(columns[5], dtype=np.float64)
+        self.slope = np.array(columns[6], dtype=np.float64)
+        self.clamp_inside = np.array(columns[7], dtype=bool)
+        self.out_base = np.array(columns[8], dtype=np.float64)
+        self.out_slope = np.array(columns[9], dtype=np.float64)
+    
+    def score(self, features, crops=None):
+        """
+        Score input rows against crops
+        
+        Parameters:
+        -----------
+        features : array-like
+            (M, 7) or (7,) values in INPUT_COLUMNS order (N, P, K,
+            temperature, humidity, ph, rainfall)
+        crops : list, optional
+            Crop names to score against; all crops when omitted
+        
+        Returns:
+        --------
+        dict : 'crops', 'score' (M, n_crops) weighted totals and
+               'factors' (M, n_crops, 7) per-factor scores
+        """
+        features = np.asarray(features, dtype=np.float64)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        
+        if crops is None:
+            crops, optimum = self.crops, self.optimum
+        else:
+            optimum = self.optimum[[self.crop_index[crop] for crop in crops]]
+        
+        x = features[:, None, :]
+        delta = np.abs(x - optimum[None, :, :])
+        inside = (x >= self.low) & (x <= self.high)
+        in_score = 100 - delta * self.slope
+        factors = np.where(
+            inside,
+            np.where(self.clamp_inside, np.maximum(0, in_score), in_score),
+            np.maximum(0, self.out_base - delta * self.out_slope)
+        )
+        return {'crops': list(crops), 'score': (factors * self.weights).sum(axis=-1), 'factors': factors}
+    
+    def optimum_for(self, crop):
+        """Optimum values for one crop in FACTOR_KEYS order"""
+        return self.optimum[self.crop_index[crop]]
+
+
+def features_from(input_data):
+    """Feature row in INPUT_COLUMNS order from normalized input, or columns of arrays"""
+    return np.stack([np.asarray(input_data[key], dtype=np.float64) for key in INPUT_COLUMNS], axis=-1)
+
+
+def quality_labels(score):
+    """Vectorized CropPredictor._score_to_quality"""
+    score = np.asarray(score)
+    return np.select([score >= 80, score >= 65, score >= 50], ['Excellent', 'Good', 'Average'], default='Poor')
+
+
+@lru_cache(maxsize=None)
+def get_rule_engine():
+    """Engine over the shared crop catalog, built on first use and shared by every CropPredictor"""
+    return RuleEngine()
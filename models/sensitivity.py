@@ -0,0 +1,100 @@
+"""
+What-if sensitivity sweeps
+Scores whole 1-D and 2-D parameter grids in one batched pass for line charts and heatmaps
+"""
+import numpy as np
+from models.ml_predictor import INPUT_KEYS
+from models.prediction_cache import PredictionCache
+
+# Sweepable input -> CropPredictor normalized key
+SWEEP_PARAMETERS = {
+    'nitrogen': 'N',
+    'phosphorus': 'P',
+    'potassium': 'K',
+    'temperature': 'temperature',
+    'humidity': 'humidity',
+    'ph': 'ph',
+    'rainfall': 'rainfall'
+}
+
+
+class SensitivityAnalyzer:
+    """Batched what-if analysis on top of a CropPredictor"""
+    
+    def __init__(self, predictor, cache_size=64):
+        self.predictor = predictor
+        self.cache = PredictionCache(maxsize=cache_size, ttl=None)
+    
+    def sweep(self, base_input, param, values):
+        """
+        Vary one parameter with everything else held at base_input
+        
+        Returns:
+        --------
+        dict : 'param', 'values' and one array per output
+               ('rule_score', plus 'quality_score'/'yield_estimation'/
+               'growth_duration' when the ML model provides them),
+               each aligned with 'values' for a line chart
+        """
+        values = np.asarray(values, dtype=float)
+        grid = self._grid(base_input, {param: values})
+        outputs = self._cached(('1d', param, tuple(values)), base_input, grid)
+        return {'param': param, 'values': values, **outputs}
+    
+    def sweep_2d(self, base_input, x_param, x_values, y_param, y_values):
+        """
+        Vary two parameters over their full cross product
+        
+        Returns:
+        --------
+        dict : 'x_param', 'x', 'y_param', 'y' and one (len(y), len(x))
+               array per output, the layout go.Heatmap(z=..., x=..., y=...)
+               expects
+        """
+        if x_param == y_param:
+            raise ValueError("x_param and y_param must differ")
+        x_values = np.asarray(x_values, dtype=float)
+        y_values = np.asarray(y_values, dtype=float)
+        xx, yy = np.meshgrid(x_values, y_values)
+        
+        grid = self._grid(base_input, {x_param: xx.ravel(), y_param: yy.ravel()})
+        key = ('2d', x_param, tuple(x_values), y_param, tuple(y_values))
+        outputs = self._cached(key, base_input, grid)
+        surfaces = {name: values.reshape(xx.shape) for name, values in outputs.items()}
+        return {'x_param': x_param, 'x': x_values, 'y_param': y_param, 'y': y_values, **surfaces}
+    
+    def _grid(self, base_input, overrides):
+        """(n_points, 7) feature matrix in model input order"""
+        for param in overrides:
+            if param not in SWEEP_PARAMETERS:
+                raise ValueError(f"Cannot sweep '{param}'; choose from {list(SWEEP_PARAMETERS)}")
+        
+        normalized = self.predictor._normalize_input(base_input)
+        n_points = len(next(iter(overrides.values())))
+        grid = np.empty((n_points, len(INPUT_KEYS)))
+        for column, key in enumerate(INPUT_KEYS):
+            grid[:, column] = overrides.get(key, normalized[SWEEP_PARAMETERS[key]])
+        return grid
+    
+    def _cached(self, sweep_key, base_input, grid):
+        ml_predictor = self.predictor.ml_predictor
+        normalized = self.predictor._normalize_input(base_input)
+        model_version = ml_predictor.model_version if ml_predictor is not None else 'rule-based'
+        key = (model_version, self.predictor._input_key(normalized)) + sweep_key
+        return self.cache.get_or_compute(
+            key, lambda: self._score(grid, normalized['crop_type'], ml_predictor)
+        )
+    
+    def _score(self, grid, crop_type, ml_predictor):
+        """One batched pass of the rule-based scorer and the ML regressors"""
+        columns = {SWEEP_PARAMETERS[key]: grid[:, i] for i, key in enumerate(INPUT_KEYS)}
+        outputs = {'rule_score': self.predictor._rule_based_score_batch(columns, crop_type)}
+        
+        if ml_predictor is not None:
+            outputs.update(ml_predictor.predict_batch(grid, classify=False))
+            outputs.pop('quality_grade', None)
+        
+        # Results are shared through the cache, so hand out read-only views
+        for values in outputs.values():
+            values.setflags(write=False)
+        return outputs
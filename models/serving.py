@@ -0,0 +1,218 @@
+"""
+Local model-serving daemon
+JSON-over-HTTP scoring server that micro-batches concurrent single-row requests into one forest pass
+"""
+import http.client
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import numpy as np
+from models.ml_predictor import INPUT_KEYS
+from models.registry import model_registry, DEFAULT_MODEL_PATH
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+
+class MicroBatcher:
+    """
+    Collects single rows from many threads and scores them together
+    
+    The first row of a batch opens a window of `window_ms`; every row
+    that arrives before it closes (up to `max_batch`) is scored in the
+    same score_batch call, and each caller gets back its own row.
+    """
+    
+    def __init__(self, score_batch, window_ms=3.0, max_batch=256):
+        self.score_batch = score_batch
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name='micro-batcher', daemon=True)
+        self._thread.start()
+    
+    def submit(self, features):
+        """Score one feature row, blocking until its batch has run"""
+        future = Future()
+        self._queue.put((features, future))
+        return future.result()
+    
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': round(self.rows / self.batches, 2) if self.batches else 0.0,
+            'largest_batch': self.largest_batch
+        }
+    
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            futures = [future for _, future in batch]
+            try:
+                results = self.score_batch(np.array([features for features, _ in batch], dtype=np.float64))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            
+            self.batches += 1
+            self.rows += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            for future, result in zip(futures, results):
+                future.set_result(result)
+
+
+class ScoringService:
+    """Scores feature matrices with the registry model and shapes JSON rows"""
+    
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, batching=True, window_ms=3.0, max_batch=256):
+        self.model_path = model_path
+        self.batcher = MicroBatcher(self.score, window_ms, max_batch) if batching else None
+    
+    def model(self):
+        model = model_registry.get(self.model_path)
+        if model is None:
+            raise LookupError(f"No trained model at {self.model_path}")
+        return model
+    
+    def score(self, features, top_k=5):
+        """One predict_batch pass; returns one JSON-ready dict per row"""
+        model = self.model()
+        outputs = model.predict_batch(features, top_k=top_k)
+        rows = [{'model_version': model.model_version} for _ in range(len(features))]
+        for name, values in outputs.items():
+            for row, value in zip(rows, values.tolist()):
+                row[name] = value
+        return rows
+    
+    def predict_one(self, input_data):
+        features = parse_features(input_data)
+        if self.batcher is not None:
+            return self.batcher.submit(features)
+        return self.score(features.reshape(1, -1))[0]
+    
+    def predict_many(self, rows):
+        return self.score(np.array([parse_features(row) for row in rows]))
+    
+    def health(self):
+        model = model_registry.get(self.model_path)
+        return {
+            'status': 'ok' if model is not None else 'no_model',
+            'model_version': model.model_version if model is not None else None,
+            'batching': self.batcher.stats() if self.batcher is not None else None
+        }
+
+
+def parse_features(input_data):
+    """Feature row in model order from a {'nitrogen': ..., ...} dict"""
+    missing = [key for key in INPUT_KEYS if key not in input_data]
+    if missing:
+        raise ValueError(f"Missing input fields: {missing}")
+    return np.array([float(input_data[key]) for key in INPUT_KEYS])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self._reply(200, self.server.service.health())
+        else:
+            self._reply(404, {'error': f'Unknown path {self.path}'})
+    
+    def do_POST(self):
+        if urlparse(self.path).path != '/predict':
+            self._reply(404, {'error': f'Unknown path {self.path}'})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if 'rows' in body:
+                self._reply(200, {'results': self.server.service.predict_many(body['rows'])})
+            else:
+                self._reply(200, self.server.service.predict_one(body))
+        except (ValueError, TypeError) as e:
+            self._reply(400, {'error': str(e)})
+        except LookupError as e:
+            self._reply(503, {'error': str(e)})
+        except Exception as e:
+            self._reply(500, {'error': f'{type(e).__name__}: {e}'})
+    
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """
+    HTTP scoring daemon
+    
+    POST /predict  {"nitrogen": .., "phosphorus": .., ...}  -> one result
+    POST /predict  {"rows": [{...}, ...]}                    -> {"results": [...]}
+    GET  /health                                             -> model version and batch stats
+    """
+    
+    daemon_threads = True
+    request_queue_size = 128
+    
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, service=None):
+        self.service = service or ScoringService()
+        super().__init__((host, port), _Handler)
+
+
+class ScoringClient:
+    """Minimal keep-alive client for the scoring daemon; one connection per thread"""
+    
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=10):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._local = threading.local()
+    
+    def predict(self, input_data):
+        return self._request('POST', '/predict', input_data)
+    
+    def predict_many(self, rows):
+        return self._request('POST', '/predict', {'rows': rows})['results']
+    
+    def health(self):
+        return self._request('GET', '/health')
+    
+    def _request(self, method, path, payload=None):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        body = json.dumps(payload).encode() if payload is not None else None
+        try:
+            conn.request(method, path, body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            result = json.loads(response.read())
+        except (http.client.HTTPException, OSError):
+            self._local.conn = None
+            conn.close()
+            raise
+        if response.status != 200:
+            raise RuntimeError(f"Scoring server returned {response.status}: {result.get('error')}")
+        return result
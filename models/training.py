@@ -0,0 +1,227 @@
+"""
+Parallel training orchestrator
+Fits the independent crop models concurrently over a shared-memory copy of the dataset
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.model_selection import cross_val_score
+from sklearn.preprocessing import StandardScaler
+from models.ml_predictor import MLCropPredictor, REGRESSION_TARGETS
+
+
+class SharedArrays:
+    """Several NumPy arrays packed into one shared-memory block"""
+    
+    def __init__(self, arrays):
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = (offset, array.shape, array.dtype.str)
+            offset += -(-array.nbytes // 8) * 8
+        
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 8))
+        for name, array in arrays.items():
+            start, shape, dtype = layout[name]
+            np.ndarray(shape, dtype, buffer=self._shm.buf, offset=start)[...] = array
+        self.spec = {'name': self._shm.name, 'layout': layout}
+    
+    @staticmethod
+    def attach(spec):
+        """Map a block created in another process; returns (handle, arrays)"""
+        shm = shared_memory.SharedMemory(name=spec['name'])
+        arrays = {
+            name: np.ndarray(shape, dtype, buffer=shm.buf, offset=start)
+            for name, (start, shape, dtype) in spec['layout'].items()
+        }
+        return shm, arrays
+    
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _fit_job(job):
+    """Fit one forest inside a worker process"""
+    shm, arrays = SharedArrays.attach(job['shared'])
+    try:
+        return _fit(job, arrays)
+    finally:
+        # Views into the block must be gone before it can be closed
+        del arrays
+        shm.close()
+
+
+def _fit(job, arrays):
+    start = time.perf_counter()
+    X_train, X_test = arrays['X_train'], arrays['X_test']
+    output = {'name': job['name'], 'cv_scores': None, 'oob_score': None}
+    
+    if job['name'] == 'classifier':
+        y_train = np.asarray(job['classes'], dtype=object)[arrays['y_train_codes']]
+        model = RandomForestClassifier(**job['params'], oob_score=job['use_oob'])
+        model.fit(X_train, y_train)
+        if not job['use_oob']:
+            output['cv_scores'] = cross_val_score(model, X_train, y_train, cv=5)
+    else:
+        y_train = arrays['Y_train'][:, job['columns']]
+        if y_train.shape[1] == 1:
+            y_train = y_train[:, 0]
+        model = RandomForestRegressor(**job['params'], oob_score=job['use_oob'])
+        model.fit(X_train, y_train)
+    
+    if job['use_oob']:
+        output['oob_score'] = model.oob_score_
+    output['y_pred'] = model.predict(X_test)
+    output['model'] = model
+    output['seconds'] = time.perf_counter() - start
+    return output
+
+
+class TrainingPipeline:
+    """
+    Train an MLCropPredictor with its forests fit concurrently
+    
+    The classifier and each regression target are independent, so each
+    one is a job in a process pool. The scaled feature matrices and
+    targets are copied once into shared memory instead of being pickled
+    to every worker. With use_oob=True the 5-fold cross-validation
+    (five extra classifier fits) is replaced by out-of-bag estimates.
+    """
+    
+    def __init__(self, predictor=None, n_workers=None, use_oob=False, multi_output=False):
+        self.predictor = predictor or MLCropPredictor(use_mmap=False)
+        self.n_workers = n_workers
+        self.use_oob = use_oob
+        self.multi_output = multi_output
+        self.timings = {}
+    
+    @contextmanager
+    def _stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.timings[name] = round(time.perf_counter() - start, 3)
+        print(f"   ⏱️ {name}: {self.timings[name]:.2f}s")
+    
+    def run(self, data_path='data/crop_recommendation.csv', test_size=0.2):
+        """Train, evaluate and save; returns the same results dict as MLCropPredictor.train"""
+        predictor = self.predictor
+        self.timings = {}
+        
+        with self._stage('load'):
+            df, watermark = predictor._load_training_data(data_path)
+        print(f"📊 Dataset loaded: {len(df)} samples, {df['label'].nunique()} crops")
+        
+        with self._stage('split_and_scale'):
+            X_train, X_test, y_crop_train, y_crop_test = predictor._split(
+                df[predictor.feature_names].astype(np.float64), df['label'], test_size
+            )
+            predictor.scaler = StandardScaler()
+            X_train_scaled = predictor.scaler.fit_transform(X_train)
+            X_test_scaled = predictor.scaler.transform(X_test)
+            
+            targets = [t for t in REGRESSION_TARGETS if t in df.columns]
+            Y_train = df.loc[X_train.index, targets].to_numpy(dtype=np.float64)
+            Y_test = df.loc[X_test.index, targets]
+            if self.multi_output and targets:
+                predictor.regression_scaler = StandardScaler()
+                Y_train = predictor.regression_scaler.fit_transform(Y_train)
+            classes, y_codes = np.unique(y_crop_train.to_numpy(), return_inverse=True)
+        
+        with self._stage('share_dataset'):
+            shared = SharedArrays({
+                'X_train': X_train_scaled, 'X_test': X_test_scaled,
+                'Y_train': Y_train.reshape(len(X_train_scaled), len(targets)),
+                'y_train_codes': y_codes.astype(np.int64)
+            })
+        
+        try:
+            jobs = self._jobs(shared.spec, classes, targets)
+            n_workers = min(len(jobs), self.n_workers or os.cpu_count() or 1)
+            threads_per_job = max(1, (os.cpu_count() or 1) // n_workers)
+            for job in jobs:
+                params = predictor._classifier_params() if job['name'] == 'classifier' else predictor.model_params
+                job['params'] = {**params, 'n_jobs': threads_per_job}
+            
+            print(f"\n🚀 Fitting {len(jobs)} models on {n_workers} worker processes "
+                  f"({'out-of-bag' if self.use_oob else '5-fold CV'} validation)...")
+            with self._stage('fit'):
+                with ProcessPoolExecutor(max_workers=n_workers) as pool:
+                    outputs = {out['name']: out for out in pool.map(_fit_job, jobs)}
+        finally:
+            shared.close()
+        
+        for name, out in outputs.items():
+            self.timings[f'fit:{name}'] = round(out['seconds'], 3)
+        
+        with self._stage('evaluate'):
+            results = self._collect(outputs, targets, y_crop_test, Y_test, df.loc[X_train.index])
+        
+        with self._stage('save'):
+            predictor.data_watermark = watermark
+            predictor.training_key = None
+            predictor.replay_buffer = predictor._build_replay_buffer(
+                X_train_scaled, y_crop_train.to_numpy(), df.loc[X_train.index, targets]
+            )
+            predictor.save_model()
+        
+        results['test_samples'] = len(X_test)
+        results['train_samples'] = len(X_train)
+        results['timings'] = dict(self.timings)
+        return results
+    
+    def _jobs(self, spec, classes, targets):
+        base = {'shared': spec, 'use_oob': self.use_oob}
+        jobs = [{**base, 'name': 'classifier', 'classes': list(classes)}]
+        if self.multi_output and targets:
+            jobs.append({**base, 'name': 'regression', 'columns': list(range(len(targets)))})
+        else:
+            jobs.extend({**base, 'name': target, 'columns': [i]} for i, target in enumerate(targets))
+        return jobs
+    
+    def _collect(self, outputs, targets, y_crop_test, Y_test, train_rows):
+        """Install fitted models on the predictor and build the metrics dict"""
+        predictor = self.predictor
+        results = {}
+        
+        classifier = outputs['classifier']
+        print("\n🎯 Crop Classification")
+        predictor._use_classifier(classifier['model'])
+        results['crop_classification'] = predictor._classification_metrics(
+            y_crop_test, classifier['y_pred'],
+            cv_scores=classifier['cv_scores'], oob_score=classifier['oob_score']
+        )
+        
+        predictor.quality_model = predictor.yield_model = predictor.duration_model = None
+        predictor.regression_model = None
+        if 'regression' in outputs:
+            regression = outputs['regression']
+            predictor.regression_model = regression['model']
+            predictor.regression_targets = targets
+            y_pred = predictor.regression_scaler.inverse_transform(
+                regression['y_pred'].reshape(len(Y_test), -1)
+            )
+            predictions = {target: y_pred[:, i] for i, target in enumerate(targets)}
+        else:
+            predictor.regression_scaler = None
+            predictor.regression_targets = []
+            predictions = {}
+            for target in targets:
+                setattr(predictor, REGRESSION_TARGETS[target]['attr'], outputs[target]['model'])
+                predictions[target] = outputs[target]['y_pred']
+        
+        for target in targets:
+            print(f"\n{REGRESSION_TARGETS[target]['title'].replace('Training ', '').rstrip('.')}")
+            results[target] = predictor._regression_metrics(
+                target, Y_test[target], predictions[target], train_rows[target]
+            )
+            oob_score = outputs.get(target, {}).get('oob_score')
+            if oob_score is not None:
+                results[target]['oob_r2'] = round(oob_score, 4)
+        
+        if outputs.get('regression', {}).get('oob_score') is not None:
+            results['multi_output_oob_r2'] = round(outputs['regression']['oob_score'], 4)
+        return results
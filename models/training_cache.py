@@ -0,0 +1,99 @@
+"""
+Training result cache
+Fitted forests and their metrics stored under a fingerprint of the data, features and hyperparameters
+"""
+import hashlib
+import json
+import os
+import pickle
+import pandas as pd
+
+# Bump when cached entries stop being compatible with the training code
+CACHE_FORMAT_VERSION = 1
+
+
+def cache_path_for(model_path):
+    """Training cache directory that sits next to a pickle model path"""
+    return os.path.splitext(model_path)[0] + '.cache'
+
+
+def column_fingerprint(df, columns):
+    """Content hash of some DataFrame columns, independent of the index"""
+    digest = hashlib.sha1()
+    for column in columns:
+        digest.update(column.encode())
+        digest.update(pd.util.hash_pandas_object(df[column], index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class TrainingCache:
+    """
+    On-disk store of fitted models keyed by what they were trained on
+    
+    Each classifier and regression target gets its own key, built from the
+    fingerprints of the columns it depends on and the forest parameters,
+    so a changed target column only invalidates that target's model.
+    The oldest entries are dropped beyond `max_entries`.
+    """
+    
+    def __init__(self, cache_dir, max_entries=32):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+    
+    def key(self, name, *parts):
+        """Stable key for a named component and everything it depends on"""
+        payload = json.dumps([CACHE_FORMAT_VERSION, name, parts], sort_keys=True, default=str)
+        return f"{name}-{hashlib.sha1(payload.encode()).hexdigest()[:16]}"
+    
+    def get(self, key):
+        """Cached entry for `key`, or None on a miss or an unreadable file"""
+        path = os.path.join(self.cache_dir, f'{key}.pkl')
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return entry
+    
+    def put(self, key, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = os.path.join(self.cache_dir, f'{key}.pkl')
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f)
+        os.replace(tmp_path, path)
+        self._prune()
+    
+    def get_or_fit(self, key, fit):
+        """Cached entry for `key`, calling `fit()` and storing its result on a miss"""
+        entry = self.get(key)
+        if entry is None:
+            entry = fit()
+            self.put(key, entry)
+        else:
+            print(f"   ♻️ Reusing cached {key.split('-')[0]} model")
+        return entry
+    
+    def clear(self):
+        for name in self._entries():
+            os.remove(os.path.join(self.cache_dir, name))
+    
+    def stats(self):
+        return {'entries': len(self._entries()), 'hits': self.hits, 'misses': self.misses}
+    
+    def _entries(self):
+        try:
+            return [name for name in os.listdir(self.cache_dir) if name.endswith('.pkl')]
+        except OSError:
+            return []
+    
+    def _prune(self):
+        entries = self._entries()
+        entries.sort(key=lambda name: os.path.getmtime(os.path.join(self.cache_dir, name)), reverse=True)
+        for name in entries[self.max_entries:]:
+            os.remove(os.path.join(self.cache_dir, name))
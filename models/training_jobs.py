@@ -0,0 +1,255 @@
+"""
+Background training jobs
+Runs model training off the request path and tracks each run in a persistent SQLite job table
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from models.registry import model_registry, DEFAULT_MODEL_PATH
+
+DEFAULT_JOB_DB = 'models/training_jobs.db'
+
+JOB_MODES = ('full', 'incremental')
+ACTIVE_STATUSES = ('queued', 'running')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS training_jobs (
+    id TEXT PRIMARY KEY,
+    mode TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    progress REAL NOT NULL DEFAULT 0,
+    stages TEXT NOT NULL DEFAULT '[]',
+    params TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    model_version TEXT,
+    pid INTEGER,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+
+class JobStore:
+    """Job table in SQLite, shared by every process that trains or serves the model"""
+    
+    def __init__(self, db_path=DEFAULT_JOB_DB):
+        self.db_path = db_path
+        self._ready = False
+    
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            if not self._ready:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(_SCHEMA)
+                self._ready = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def create(self, mode, params):
+        job_id = uuid.uuid4().hex[:12]
+        with self._connect() as conn:
+            self._insert(conn, job_id, mode, params)
+        return job_id
+    
+    def create_if_idle(self, mode, params):
+        """
+        Queue a job unless one is already queued or running
+        
+        The check and the insert share one write transaction, so two
+        processes submitting at once can't both start a training run.
+        
+        Returns:
+        --------
+        (str, bool) : The new job id and True, or the active job's id and False
+        """
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                "SELECT id FROM training_jobs WHERE status IN ('queued', 'running') "
+                "ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                return row['id'], False
+            job_id = uuid.uuid4().hex[:12]
+            self._insert(conn, job_id, mode, params)
+        return job_id, True
+    
+    def _insert(self, conn, job_id, mode, params):
+        conn.execute(
+            "INSERT INTO training_jobs (id, mode, status, params, pid, created_at) "
+            "VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, mode, json.dumps(params), os.getpid(), time.time())
+        )
+    
+    def update(self, job_id, **fields):
+        columns = ', '.join(f'{name} = ?' for name in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE training_jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+    
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM training_jobs WHERE id = ?", (job_id,)).fetchone()
+        return _to_dict(row)
+    
+    def list(self, limit=20):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM training_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [_to_dict(row) for row in rows]
+    
+    def active(self):
+        """Oldest queued or running job, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM training_jobs WHERE status IN ('queued', 'running') "
+                "ORDER BY created_at LIMIT 1"
+            ).fetchone()
+        return _to_dict(row)
+    
+    def fail_orphaned(self, live_ids=()):
+        """
+        Mark jobs whose process died mid-run as failed
+        
+        live_ids are the jobs this process is running. Any other active job
+        recorded under this process's pid was left by an earlier process
+        that had the same pid (common after a container restart).
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, pid FROM training_jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+        for row in rows:
+            if row['id'] in live_ids:
+                continue
+            if row['pid'] is None or row['pid'] == os.getpid() or not _process_alive(row['pid']):
+                self.update(row['id'], status='failed', error='Interrupted: the training process exited',
+                            finished_at=time.time())
+
+
+class TrainingJobRunner:
+    """
+    Queue of training runs executed one at a time on a background thread
+    
+    Each job trains a private MLCropPredictor, so the registry keeps
+    serving the current model for the whole run. save_model publishes the
+    memory-mapped store version and the pickle with atomic renames, and the
+    job then loads the new model into the registry before it is marked
+    succeeded, so the first request after that is already served by it.
+    """
+    
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, db_path=DEFAULT_JOB_DB):
+        self.model_path = model_path
+        self.store = JobStore(db_path)
+        self._executor = None
+        self._job_ids = set()
+        self._lock = threading.Lock()
+    
+    def submit(self, mode='full', data_path='data/crop_recommendation.csv', multi_output=False):
+        """
+        Queue a training run
+        
+        Returns:
+        --------
+        str : Job id; if a run is already queued or running, its id instead
+        """
+        if mode not in JOB_MODES:
+            raise ValueError(f"Unknown training mode '{mode}'; choose from {list(JOB_MODES)}")
+        
+        with self._lock:
+            self.store.fail_orphaned(self._job_ids)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='training-job')
+            
+            params = {'data_path': data_path, 'multi_output': multi_output}
+            job_id, created = self.store.create_if_idle(mode, params)
+            if not created:
+                return job_id
+            self._job_ids.add(job_id)
+            self._executor.submit(self._run, job_id, mode, params)
+            return job_id
+    
+    def status(self, job_id):
+        return self.store.get(job_id)
+    
+    def latest(self):
+        """Most recent job; a run left active by a dead process is marked failed first"""
+        with self._lock:
+            self.store.fail_orphaned(self._job_ids)
+        jobs = self.store.list(limit=1)
+        return jobs[0] if jobs else None
+    
+    def _run(self, job_id, mode, params):
+        from models.ml_predictor import MLCropPredictor
+        from models.training_cache import TrainingCache, cache_path_for
+        
+        stages = []
+        
+        def progress(stage, fraction):
+            now = time.time()
+            if stages:
+                stages[-1]['seconds'] = round(now - stages[-1]['started_at'], 3)
+            stages.append({'stage': stage, 'started_at': now})
+            self.store.update(job_id, stage=stage, progress=fraction, stages=json.dumps(stages))
+        
+        self.store.update(job_id, status='running', started_at=time.time())
+        try:
+            predictor = MLCropPredictor(model_path=self.model_path, use_mmap=False)
+            if mode == 'incremental':
+                results = predictor.train_incremental(params['data_path'], progress=progress)
+            else:
+                results = predictor.train(params['data_path'], multi_output=params['multi_output'],
+                                          cache=TrainingCache(cache_path_for(self.model_path)),
+                                          progress=progress)
+            
+            # Load the new model now rather than on the next request
+            progress('publish', 0.98)
+            model_registry.invalidate(self.model_path)
+            model_registry.get(self.model_path)
+            progress('done', 1.0)
+            self.store.update(job_id, status='succeeded', result=json.dumps(results, default=_json_default),
+                              model_version=predictor.model_version, finished_at=time.time())
+        except Exception as e:
+            self.store.update(job_id, status='failed', error=f'{type(e).__name__}: {e}',
+                              finished_at=time.time())
+
+
+def _to_dict(row):
+    if row is None:
+        return None
+    job = dict(row)
+    for name in ('stages', 'params', 'result'):
+        if job[name] is not None:
+            job[name] = json.loads(job[name])
+    return job
+
+
+def _json_default(value):
+    return value.tolist() if hasattr(value, 'tolist') else str(value)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# One queue per process; the job table itself is shared through SQLite
+training_jobs = TrainingJobRunner()
@@ -5,19 +5,21 @@ Main Streamlit Application - COMPLETE ENHANCED VERSION
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from datetime import datetime
 
 
 # Import custom modules
-from models import CropPredictor, FertilizerCalculator, IrrigationCalculator, ProfitCalculator
+from models import CropPredictor, FertilizerCalculator, IrrigationCalculator, ProfitCalculator, prediction_cache
+from models import training_jobs, get_model_stats, ACTIVE_STATUSES, get_crop_catalog, SensitivityAnalyzer
 from utils import (
-    fetch_weather_data, save_to_history, load_history, get_statistics, export_data,
+    fetch_weather_data, save_to_history, load_history_page, get_statistics,
     create_radar_chart, create_comparison_chart, create_yield_comparison_chart,
     create_history_trend_chart, create_cost_breakdown_pie, create_npk_comparison_chart,
-    create_weather_forecast_chart
+    create_weather_forecast_chart, create_sensitivity_line_chart, create_sensitivity_heatmap
 )
-from config import CROP_PARAMETERS, REGIONAL_DATA, QUALITY_COLORS
+from config import CROP_PARAMETERS, REGIONAL_DATA, QUALITY_COLORS, PREDICTION_CACHE
 
 # =============================================================================
 # PAGE CONFIGURATION
@@ -279,17 +281,61 @@ if 'input_params' not in st.session_state:
         'nitrogen': 50, 'phosphorus': 50, 'potassium': 50, 'ph': 6.5,
         'temperature': 25, 'humidity': 65, 'rainfall': 100}
 if 'comparison_results' not in st.session_state: st.session_state['comparison_results'] = None
+# Cursors of the history pages walked so far; [None] is the newest page
+if 'history_cursors' not in st.session_state: st.session_state['history_cursors'] = [None]
 
 # INITIALIZE MODELS
-predictor = CropPredictor()
+predictor = CropPredictor(seed=PREDICTION_CACHE['seed'], cache=prediction_cache)
 fert_calculator = FertilizerCalculator()
 irrig_calculator = IrrigationCalculator()
 profit_calculator = ProfitCalculator()
+sensitivity = SensitivityAnalyzer(predictor)
+
+# What-if sweep ranges, matching the input widgets
+SWEEP_RANGES = {'nitrogen': (0, 140), 'phosphorus': (0, 100), 'potassium': (0, 100),
+                'temperature': (0, 50), 'humidity': (0, 100), 'ph': (3.0, 10.0), 'rainfall': (0, 300)}
+SWEEP_METRICS = ['quality_score', 'rule_score', 'yield_estimation', 'growth_duration']
+
+# Saved predictions per history page
+HISTORY_PAGE_ROWS = 25
 
 def navigate_to(page_name):
     st.session_state['page'] = page_name
     st.rerun()
 
+# MODEL TRAINING (sidebar)
+with st.sidebar:
+    st.markdown("### 🧠 ML Model")
+    model_stats = get_model_stats()
+    if model_stats and model_stats['model_version']:
+        st.caption(f"Serving version **{model_stats['model_version']}** "
+                   f"(loaded in {model_stats['load_time_ms']} ms)")
+    else:
+        st.caption("No trained model, using rule-based predictions")
+    
+    job = training_jobs.latest()
+    training_active = job is not None and job['status'] in ACTIVE_STATUSES
+    if training_active:
+        st.progress(job['progress'], text=f"⏳ {job['mode'].title()} training: {job['stage'] or 'queued'}")
+        st.caption("The current model keeps serving until the new one is published")
+        if st.button("🔄 Refresh Status", use_container_width=True):
+            st.rerun()
+    elif job is not None and job['status'] == 'succeeded':
+        st.success(f"✅ Last training published version {job['model_version']}")
+    elif job is not None and job['status'] == 'failed':
+        st.error(f"❌ Last training failed: {job['error']}")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("🚀 Retrain", use_container_width=True, disabled=training_active):
+            training_jobs.submit('full')
+            st.rerun()
+    with col2:
+        if st.button("➕ New Data", use_container_width=True, disabled=training_active,
+                     help="Grow the current model with rows added since it was trained"):
+            training_jobs.submit('incremental')
+            st.rerun()
+
 # HEADER
 st.markdown("""
 <div style='text-align: center; padding: 40px 20px 20px 20px;'>
@@ -307,9 +353,10 @@ st.markdown("""
 st.markdown("---")
 
 # NAVIGATION
-menu_cols = st.columns(6)
+menu_cols = st.columns(7)
 pages = [("📝 Input", 'input'), ("🔮 Prediction", 'prediction'), ("⚖️ Compare", 'compare'),
-         ("🌱 Fertilizer", 'fertilizer'), ("💧 Irrigation", 'irrigation'), ("💰 Profit", 'profit')]
+         ("🌱 Fertilizer", 'fertilizer'), ("💧 Irrigation", 'irrigation'), ("💰 Profit", 'profit'),
+         ("📜 History", 'history')]
 for col, (label, page) in zip(menu_cols, pages):
     with col:
         if st.button(label, use_container_width=True, 
@@ -364,10 +411,9 @@ if st.session_state['page'] == 'input':
     
     st.markdown('<div class="custom-card">', unsafe_allow_html=True)
     st.markdown('<h3 style="color: #10b981; margin-bottom: 20px;">🌾 CROP SELECTION</h3>', unsafe_allow_html=True)
-    crop_type = st.selectbox("Select Crop Type",
-        ['wheat', 'rice', 'maize', 'cotton', 'sugarcane', 'potato', 'tomato', 'soybean'],
-        index=['wheat', 'rice', 'maize', 'cotton', 'sugarcane', 'potato', 'tomato', 'soybean'].index(
-            st.session_state['input_params']['crop_type']))
+    crop_type = st.selectbox("Select Crop Type", get_crop_catalog().crops,
+        index=get_crop_catalog().index_of(st.session_state['input_params']['crop_type']),
+        format_func=lambda crop: crop.replace('_', ' ').title())
     st.session_state['input_params']['crop_type'] = crop_type
     st.markdown('</div>', unsafe_allow_html=True)
     st.markdown("<br>", unsafe_allow_html=True)
@@ -612,6 +658,28 @@ elif st.session_state['page'] == 'prediction':
         st.markdown('</div>', unsafe_allow_html=True)
         st.markdown("<br>", unsafe_allow_html=True)
         
+        # WHAT-IF SENSITIVITY
+        st.markdown('<div class="custom-card">', unsafe_allow_html=True)
+        st.markdown('<h3 style="color: #10b981; margin-bottom: 25px;">🔬 WHAT-IF SENSITIVITY</h3>', unsafe_allow_html=True)
+        base_input = {**{key: params[key] for key in SWEEP_RANGES}, 'crop_type': params['crop_type']}
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            x_param = st.selectbox("Vary", list(SWEEP_RANGES), format_func=str.title, key="sweep_x")
+        with col2:
+            y_param = st.selectbox("Against (heatmap)", ['none'] + [p for p in SWEEP_RANGES if p != x_param],
+                                   format_func=str.title, key="sweep_y")
+        sweep = sensitivity.sweep(base_input, x_param, np.linspace(*SWEEP_RANGES[x_param], 29))
+        with col3:
+            metric = st.selectbox("Output", [m for m in SWEEP_METRICS if m in sweep],
+                                  format_func=lambda m: m.replace('_', ' ').title(), key="sweep_metric")
+        st.plotly_chart(create_sensitivity_line_chart(sweep, metric), use_container_width=True)
+        if y_param != 'none':
+            surface = sensitivity.sweep_2d(base_input, x_param, np.linspace(*SWEEP_RANGES[x_param], 21),
+                                           y_param, np.linspace(*SWEEP_RANGES[y_param], 21))
+            st.plotly_chart(create_sensitivity_heatmap(surface, metric), use_container_width=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+        st.markdown("<br>", unsafe_allow_html=True)
+        
         # ENHANCED ACTIONABLE INSIGHTS SECTION
         st.markdown('<div class="custom-card">', unsafe_allow_html=True)
         st.markdown("""
@@ -671,22 +739,18 @@ elif st.session_state['page'] == 'compare':
     st.markdown('<div class="custom-card">', unsafe_allow_html=True)
     st.markdown('<h3 style="color: #10b981; margin-bottom: 20px;">🌾 SELECT CROPS TO COMPARE</h3>', unsafe_allow_html=True)
     
-    col1, col2, col3 = st.columns(3)
-    crops = ['wheat', 'rice', 'maize', 'cotton', 'sugarcane', 'potato', 'tomato', 'soybean']
-    with col1: crop1 = st.selectbox("Select Crop 1", crops, key='crop1')
-    with col2: crop2 = st.selectbox("Select Crop 2", crops, index=1, key='crop2')
-    with col3: crop3 = st.selectbox("Select Crop 3", crops, index=2, key='crop3')
+    selected_crops = st.multiselect("Select Crops", get_crop_catalog().crops, default=list(CROP_PARAMETERS),
+                                    key='compare_crops', format_func=lambda crop: crop.replace('_', ' ').title())
     
     st.markdown("<br>", unsafe_allow_html=True)
-    if st.button("🔄 COMPARE CROPS", use_container_width=True, type="primary"):
-        comparison_results = []
-        for crop in [crop1, crop2, crop3]:
-            input_data = {**{k: params[k] for k in ['nitrogen', 'phosphorus', 'potassium', 
-                            'temperature', 'humidity', 'ph', 'rainfall']}, 'crop_type': crop}
-            pred = predictor.predict(input_data)
-            comparison_results.append({'crop': crop, 'score': pred['score'], 
-                                       'quality': pred['quality'], 'yield': pred['estimated_yield']})
-        st.session_state['comparison_results'] = comparison_results
+    if st.button("🔄 COMPARE CROPS", use_container_width=True, type="primary", disabled=not selected_crops):
+        # One ML pass and one rule-engine pass for every selected crop
+        ranked = predictor.compare_crops(params, selected_crops)
+        st.session_state['comparison_results'] = [
+            {'crop': row['crop'], 'score': row['score'], 'quality': row['quality'],
+             'yield': row['estimated_yield'], 'fit': row['rule_score']}
+            for row in ranked
+        ]
     st.markdown('</div>', unsafe_allow_html=True)
     
     if st.session_state['comparison_results']:
@@ -694,8 +758,8 @@ elif st.session_state['page'] == 'compare':
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown('<h3 style="color: #10b981; margin-bottom: 20px;">📊 COMPARISON RESULTS</h3>', unsafe_allow_html=True)
         
-        cols = st.columns(3)
-        for idx, result in enumerate(results):
+        cols = st.columns(min(3, len(results)))
+        for idx, result in enumerate(results[:3]):
             with cols[idx]:
                 color = QUALITY_COLORS.get(result['quality'], '#888888')
                 st.markdown(f"""
@@ -719,6 +783,13 @@ elif st.session_state['page'] == 'compare':
                 </div>
                 """, unsafe_allow_html=True)
         
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.dataframe(pd.DataFrame([
+            {'Rank': rank, 'Crop': r['crop'].title(), 'Crop Fit (%)': r['fit'],
+             'Quality Score (%)': r['score'], 'Quality Grade': r['quality'], 'Expected Yield (t/ha)': r['yield']}
+            for rank, r in enumerate(results, 1)
+        ]), hide_index=True, use_container_width=True)
+        
         st.markdown("<br><br>", unsafe_allow_html=True)
         st.markdown('<div class="custom-card">', unsafe_allow_html=True)
         col1, col2 = st.columns(2)
@@ -735,11 +806,12 @@ elif st.session_state['page'] == 'compare':
         st.markdown("<br>", unsafe_allow_html=True)
         st.markdown('<div class="custom-card">', unsafe_allow_html=True)
         st.markdown('<h3 style="color: #10b981; margin-bottom: 20px;">🏆 BEST CROP RECOMMENDATION</h3>', unsafe_allow_html=True)
-        best_crop = max(results, key=lambda x: x['score'])
+        best_crop = results[0]
         st.success(f"""
             ### 🎯 Recommended: {best_crop['crop'].title()}
             
             Based on current conditions, **{best_crop['crop'].title()}** shows the best performance:
+            - **Crop Fit:** {best_crop['fit']}%
             - **Quality Score:** {best_crop['score']}%
             - **Quality Grade:** {best_crop['quality']}
             - **Expected Yield:** {best_crop['yield']} tonnes/hectare
@@ -1062,3 +1134,50 @@ elif st.session_state['page'] == 'profit':
         if st.button("📝 Go to Input Parameters", type="primary"):
             navigate_to('input')
 
+# ============= HISTORY PAGE =============
+elif st.session_state['page'] == 'history':
+    st.markdown('<div class="section-header">📜 PREDICTION HISTORY</div>', unsafe_allow_html=True)
+    st.markdown("Saved predictions, newest first, one page at a time")
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Running aggregates and one page of rows: the cost doesn't grow with the history
+    stats = get_statistics()
+    if stats is None:
+        st.info("📭 No saved predictions yet. Run a prediction to start the history.")
+    else:
+        st.markdown('<div class="custom-card">', unsafe_allow_html=True)
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Predictions", f"{stats['total_predictions']:,}")
+        col2.metric("Crops Analyzed", stats['crops_analyzed'])
+        col3.metric("Average Score", f"{stats['average_score']:.1f}%" if stats['average_score'] is not None else "—")
+        col4.metric("Average Yield", f"{stats['average_yield']:.2f} t/ha" if stats['average_yield'] is not None else "—")
+        st.markdown('</div>', unsafe_allow_html=True)
+        st.markdown("<br>", unsafe_allow_html=True)
+        
+        cursors = st.session_state['history_cursors']
+        page_rows, older_cursor = load_history_page(HISTORY_PAGE_ROWS, cursors[-1])
+        
+        st.markdown('<div class="custom-card">', unsafe_allow_html=True)
+        st.markdown(f'<h3 style="color: #10b981; margin-bottom: 20px;">🗂️ PAGE {len(cursors)}</h3>', unsafe_allow_html=True)
+        if page_rows is not None:
+            newest_first = page_rows.iloc[::-1].reset_index(drop=True)
+            trend = create_history_trend_chart(newest_first.to_dict('records'))
+            if trend is not None:
+                st.plotly_chart(trend, use_container_width=True)
+            st.dataframe(newest_first, use_container_width=True, hide_index=True)
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("⬅️ Newer", use_container_width=True, disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
+        with col2:
+            if st.button("⏮️ Latest", use_container_width=True, disabled=len(cursors) == 1):
+                st.session_state['history_cursors'] = [None]
+                st.rerun()
+        with col3:
+            if st.button("Older ➡️", use_container_width=True, disabled=older_cursor is None):
+                cursors.append(older_cursor)
+                st.rerun()
+        st.markdown('</div>', unsafe_allow_html=True)
+
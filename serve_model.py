@@ -0,0 +1,42 @@
+"""
+Local scoring daemon for the ML crop prediction model
+Run alongside the Streamlit app: python serve_model.py --port 8765
+"""
+import argparse
+from models.serving import ScoringServer, ScoringService, DEFAULT_HOST, DEFAULT_PORT
+from models.registry import DEFAULT_MODEL_PATH
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the ML crop model over local HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="Pickle model path")
+    parser.add_argument('--window-ms', type=float, default=3.0,
+                        help="How long a micro-batch waits for more rows")
+    parser.add_argument('--max-batch', type=int, default=256, help="Largest micro-batch")
+    parser.add_argument('--no-batching', action='store_true',
+                        help="Score every request on its own (for comparison)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    service = ScoringService(args.model, batching=not args.no_batching,
+                             window_ms=args.window_ms, max_batch=args.max_batch)
+    
+    health = service.health()
+    if health['status'] != 'ok':
+        print(f"❌ No trained model at '{args.model}'. Run: python train_model.py")
+        return
+    
+    server = ScoringServer(args.host, args.port, service)
+    mode = "per-request" if args.no_batching else f"micro-batched ({args.window_ms} ms window)"
+    print(f"🚀 Serving model {health['model_version']} on http://{args.host}:{args.port} [{mode}]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Scoring server stopped")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
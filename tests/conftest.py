@@ -0,0 +1,51 @@
+"""
+Shared fixtures: a small forest trained on a copy of the bundled dataset
+"""
+import os
+import shutil
+import pytest
+from models.ml_predictor import MLCropPredictor
+from models.model_store import store_path_for
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET = os.path.join(REPO_ROOT, 'data', 'crop_recommendation.csv')
+
+# Enough trees for non-trivial ensembles while keeping the suite fast
+TEST_TREES = 8
+
+SAMPLE_INPUT = {
+    'nitrogen': 90, 'phosphorus': 42, 'potassium': 43, 'temperature': 21,
+    'humidity': 82, 'ph': 6.5, 'rainfall': 203
+}
+
+
+@pytest.fixture(scope='session')
+def dataset_csv(tmp_path_factory):
+    """Private copy of the training CSV (loaders write sidecars next to it)"""
+    path = tmp_path_factory.mktemp('data') / 'crop_recommendation.csv'
+    shutil.copy(DATASET, path)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def trained_model_path(tmp_path_factory, dataset_csv):
+    """Pickle (and array store) of a small model trained on dataset_csv"""
+    model_path = str(tmp_path_factory.mktemp('models') / 'crop_model.pkl')
+    predictor = MLCropPredictor(model_path=model_path, use_mmap=False)
+    predictor.model_params['n_estimators'] = TEST_TREES
+    predictor.train(dataset_csv)
+    return model_path
+
+
+@pytest.fixture
+def ml_predictor(trained_model_path):
+    return MLCropPredictor(model_path=trained_model_path, use_mmap=False)
+
+
+@pytest.fixture
+def model_copy(tmp_path, trained_model_path):
+    """Private copy of the trained pickle and its array store, safe to overwrite"""
+    model_path = str(tmp_path / 'crop_model.pkl')
+    shutil.copy2(trained_model_path, model_path)
+    shutil.copytree(store_path_for(trained_model_path), store_path_for(model_path))
+    return model_path
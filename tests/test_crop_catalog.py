@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import pandas as pd
+from config.settings import CROP_PARAMETERS
+from models.crop_catalog import PARAMETER_KEYS, build_crop_catalog, catalog_path_for
+from models.dataset_loader import FEATURE_COLUMNS
+from tests.conftest import REPO_ROOT
+
+
+def test_curated_crops_come_first_and_keep_their_values(dataset_csv):
+    catalog = build_crop_catalog(dataset_csv)
+    
+    assert catalog.crops[:len(CROP_PARAMETERS)] == list(CROP_PARAMETERS)
+    for crop, params in CROP_PARAMETERS.items():
+        assert catalog[crop] == params
+        assert catalog.source(crop) == 'settings'
+        assert catalog.row(crop).tolist() == [params[key] for key in PARAMETER_KEYS]
+
+
+def test_data_crops_get_the_median_of_their_best_rows(dataset_csv):
+    catalog = build_crop_catalog(dataset_csv, use_cache=False)
+    df = pd.read_csv(dataset_csv)
+    crop = next(c for c in catalog if catalog.source(c) == 'data')
+    
+    rows = df[df['label'] == crop]
+    best = rows[rows['quality_score'] >= rows['quality_score'].quantile(0.75)]
+    np.testing.assert_allclose(catalog.row(crop), best[FEATURE_COLUMNS].median().to_numpy(), atol=0.051)
+
+
+def test_profiles_are_cached_next_to_the_dataset(dataset_csv):
+    first = build_crop_catalog(dataset_csv)
+    assert os.path.exists(catalog_path_for(dataset_csv))
+    np.testing.assert_array_equal(build_crop_catalog(dataset_csv).table, first.table)
+
+
+def test_import_is_lazy_and_independent_of_the_working_directory(tmp_path):
+    script = (
+        "import os, models\n"
+        "from models.crop_catalog import get_crop_catalog\n"
+        "assert get_crop_catalog.cache_info().currsize == 0\n"
+        "assert os.listdir('.') == []\n"
+        "assert 'papaya' in get_crop_catalog()\n"
+        "assert os.listdir('.') == []\n"
+    )
+    env = {**os.environ, 'PYTHONPATH': REPO_ROOT}
+    subprocess.run([sys.executable, '-c', script], cwd=tmp_path, env=env, check=True)
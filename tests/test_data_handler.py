@@ -0,0 +1,187 @@
+"""
+Prediction history: CSV appends and older file layouts
+"""
+import pandas as pd
+import pytest
+from utils import data_handler
+from utils.data_handler import DataHandler, HISTORY_COLUMNS
+
+PREDICTION = {'score': 81.5, 'quality': 'Good', 'estimated_yield': 4.2, 'growth_duration': 120}
+
+INPUT = {
+    'crop_type': 'rice', 'nitrogen': 90, 'phosphorus': 42, 'potassium': 43,
+    'temperature': 21, 'humidity': 82, 'ph': 6.5, 'rainfall': 203
+}
+
+# Written before growth_duration existed, with crop and timestamp swapped
+LEGACY_CSV = (
+    'crop,timestamp,nitrogen,phosphorus,potassium,temperature,humidity,ph,rainfall,score,quality,estimated_yield\n'
+    'maize,2024-01-05 10:00:00,80,40,40,22,65,6.2,90,70.0,Fair,3.1\n'
+    'rice,2024-02-05 10:00:00,95,45,40,23,83,6.4,210,88.0,Excellent,4.8'
+)
+
+
+@pytest.fixture(autouse=True)
+def no_archive(monkeypatch):
+    monkeypatch.setitem(data_handler.HISTORY_ARCHIVE, 'enabled', False)
+
+
+def make_handler(tmp_path, legacy=False):
+    if legacy:
+        (tmp_path / 'historical_data.csv').write_text(LEGACY_CSV)
+    return DataHandler(data_dir=str(tmp_path), backend='csv')
+
+
+def test_new_file_uses_history_columns(tmp_path):
+    handler = make_handler(tmp_path)
+    handler.save_prediction(PREDICTION, INPUT)
+
+    history = handler.load_history()
+    assert list(history.columns) == HISTORY_COLUMNS
+    assert history['growth_duration'].tolist() == [120]
+
+
+def test_legacy_header_is_upgraded_once_and_rows_kept(tmp_path):
+    handler = make_handler(tmp_path, legacy=True)
+    handler.save_prediction(PREDICTION, INPUT)
+    handler.save_prediction(PREDICTION, INPUT)
+
+    header, old_rows = LEGACY_CSV.split('\n', 1)
+    lines = (tmp_path / 'historical_data.csv').read_text().split('\n')
+    assert lines[0] == header + ',growth_duration'
+    assert '\n'.join(lines[1:3]) == old_rows
+    assert len(lines) == 6 and lines[-1] == ''
+
+
+def test_legacy_layout_is_mapped_on_read(tmp_path):
+    handler = make_handler(tmp_path, legacy=True)
+    handler.save_prediction(PREDICTION, INPUT)
+
+    for history in (handler.load_history(), handler.query_history()):
+        assert list(history.columns) == HISTORY_COLUMNS
+        assert history['crop'].tolist() == ['maize', 'rice', 'rice']
+        assert history['timestamp'].iloc[0] == '2024-01-05 10:00:00'
+        assert history['estimated_yield'].tolist() == [3.1, 4.8, 4.2]
+        assert history['growth_duration'].iloc[:2].isna().all()
+        assert history['growth_duration'].iloc[2] == 120
+
+
+def test_legacy_layout_statistics_match_rebuild(tmp_path):
+    handler = make_handler(tmp_path, legacy=True)
+    handler.save_prediction(PREDICTION, INPUT)
+    handler.save_prediction({**PREDICTION, 'growth_duration': 100}, INPUT)
+
+    stats = handler.get_statistics()
+    assert stats['total_predictions'] == 4
+    assert stats['average_growth_duration'] == 110.0
+    assert handler.rebuild_statistics() == stats
+
+
+def test_convenience_functions_share_one_handler(tmp_path, monkeypatch):
+    created = []
+    original_init = DataHandler.__init__
+
+    def counting_init(self, *args, **kwargs):
+        created.append(self)
+        original_init(self, data_dir=str(tmp_path), backend='csv')
+
+    monkeypatch.setattr(DataHandler, '__init__', counting_init)
+    data_handler._default_handler.cache_clear()
+    try:
+        data_handler.save_to_history(PREDICTION, INPUT)
+        data_handler.save_to_history(PREDICTION, INPUT)
+        assert len(data_handler.load_history()) == 2
+        assert data_handler.get_statistics()['total_predictions'] == 2
+        assert len(created) == 1
+    finally:
+        data_handler._default_handler.cache_clear()
+
+
+def seed_history(handler, rows):
+    """Write `rows` history lines directly, score i for row i"""
+    lines = [','.join(HISTORY_COLUMNS)]
+    for i in range(rows):
+        lines.append(f'2024-03-{1 + i % 28:02d} 08:00:00,crop{i % 5},90,42,43,21,82,6.5,203,{i},Good,4.2,120')
+    with open(handler.history_file, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def walk_pages(handler, limit):
+    pages, cursor = [], None
+    while True:
+        page, cursor = handler.load_history_page(limit, cursor)
+        if page is not None:
+            pages.append(page['score'].tolist())
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize('block_bytes', [7, 64, 64 * 1024])
+@pytest.mark.parametrize('limit', [1, 3, 10, 25, 40])
+def test_csv_pages_walk_back_through_every_row(tmp_path, monkeypatch, block_bytes, limit):
+    monkeypatch.setattr(data_handler, 'TAIL_BLOCK_BYTES', block_bytes)
+    handler = make_handler(tmp_path)
+    seed_history(handler, 25)
+
+    pages = walk_pages(handler, limit)
+    assert all(len(page) == limit for page in pages[:-1])
+    assert [score for page in reversed(pages) for score in page] == list(range(25))
+
+
+def test_csv_page_skips_a_row_still_being_written(tmp_path):
+    handler = make_handler(tmp_path)
+    seed_history(handler, 5)
+    with open(handler.history_file, 'a') as f:
+        f.write('2024-03-09 08:00:00,rice,90,42')
+
+    page, cursor = handler.load_history_page(3)
+    assert page['score'].tolist() == [2, 3, 4]
+    assert handler.load_history_page(3, cursor)[0]['score'].tolist() == [0, 1]
+
+
+def test_sqlite_pages_match_csv_pages(tmp_path):
+    csv_handler = make_handler(tmp_path)
+    seed_history(csv_handler, 25)
+    sqlite_handler = DataHandler(data_dir=str(tmp_path), backend='sqlite')
+
+    for limit in (1, 4, 25, 30):
+        assert walk_pages(sqlite_handler, limit) == walk_pages(csv_handler, limit)
+
+
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_page_limit_must_be_positive(tmp_path, backend):
+    handler = DataHandler(data_dir=str(tmp_path), backend=backend)
+    with pytest.raises(ValueError):
+        handler.load_history_page(0)
+
+
+def test_empty_history_has_no_page(tmp_path):
+    assert make_handler(tmp_path).load_history_page(10) == (None, None)
+
+
+@pytest.mark.parametrize('chunk_rows', [4, 1000])
+def test_csv_query_matches_a_full_scan(tmp_path, monkeypatch, chunk_rows):
+    monkeypatch.setattr(data_handler, 'SCAN_CHUNK_ROWS', chunk_rows)
+    handler = make_handler(tmp_path)
+    seed_history(handler, 40)
+    sqlite_handler = DataHandler(data_dir=str(tmp_path), backend='sqlite')
+    
+    full = handler.load_history(limit=100)
+    for crop, start, end, limit in [(None, None, None, None), ('crop2', None, None, None),
+                                    (None, '2024-03-05', '2024-03-20', None), ('crop1', '2024-03-03', None, 3),
+                                    (None, None, None, 7)]:
+        mask = pd.Series(True, index=full.index)
+        if crop is not None:
+            mask &= full['crop'] == crop
+        if start is not None:
+            mask &= full['timestamp'] >= start
+        if end is not None:
+            mask &= full['timestamp'] <= end
+        expected = full[mask].sort_values('timestamp', kind='stable')
+        expected = expected.tail(limit) if limit is not None else expected
+        
+        for result in (handler.query_history(crop, start, end, limit),
+                       sqlite_handler.query_history(crop, start, end, limit)):
+            assert result['score'].tolist() == expected['score'].tolist()
+    
+    assert handler.query_history(crop='rice').empty
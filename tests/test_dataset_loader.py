@@ -0,0 +1,48 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from models.dataset_loader import FEATURE_COLUMNS, TARGET_COLUMNS, load_dataset, sidecar_path_for
+from tests.conftest import DATASET
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'crops.csv'
+    path.write_bytes(open(DATASET, 'rb').read())
+    return str(path)
+
+
+def test_features_are_float32_and_targets_keep_their_values(csv_path):
+    df = load_dataset(csv_path)
+    reference = pd.read_csv(csv_path)
+    
+    assert all(df[c].dtype == np.float32 for c in FEATURE_COLUMNS)
+    assert all(df[c].dtype == np.float64 for c in TARGET_COLUMNS)
+    for column in TARGET_COLUMNS:
+        np.testing.assert_array_equal(df[column].to_numpy(), reference[column].to_numpy(dtype=np.float64))
+
+
+def test_sidecar_round_trips_and_refreshes_on_append(csv_path):
+    first = load_dataset(csv_path)
+    assert os.path.isdir(sidecar_path_for(csv_path))
+    cached = load_dataset(csv_path)
+    pd.testing.assert_frame_equal(cached, first)
+    
+    with open(csv_path, 'rb+') as f:
+        f.seek(-1, os.SEEK_END)
+        newline = b'' if f.read(1) == b'\n' else b'\n'
+        f.write(newline + b'90,42,43,20.9,82,6.5,203,rice,71.3,4.25,120\n')
+    df, meta = load_dataset(csv_path, with_meta=True)
+    assert meta['rows'] == len(first) + 1
+    assert df['yield_estimation'].iloc[-1] == 4.25
+    assert df['yield_estimation'].dtype == np.float64
+
+
+def test_regression_metrics_are_python_floats(ml_predictor):
+    y_true = pd.Series([4.1, 5.2, 6.3], dtype=np.float64)
+    metrics = ml_predictor._regression_metrics('yield_estimation', y_true, np.array([4.0, 5.0, 6.5]),
+                                               pd.Series([16.28, 16.28], dtype=np.float32))
+    
+    assert all(type(value) is float for value in metrics.values())
+    assert metrics['mean_yield'] == 16.28
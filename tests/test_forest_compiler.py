@@ -0,0 +1,37 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from models.forest_compiler import CompiledForest, CompiledScaler, export_compiled_model, verify_compiled_model
+from models.ml_predictor import MLCropPredictor
+from tests.conftest import SAMPLE_INPUT
+
+
+def test_compiled_model_matches_sklearn(ml_predictor, dataset_csv, tmp_path):
+    assert hasattr(ml_predictor.classifier_model, 'estimators_')
+    path = export_compiled_model(ml_predictor, str(tmp_path / 'crop_model.npz'))
+    compiled = MLCropPredictor(model_path=path)
+    
+    assert isinstance(compiled.classifier_model, CompiledForest)
+    assert isinstance(compiled.scaler, CompiledScaler)
+    report = verify_compiled_model(ml_predictor, compiled, dataset_csv)
+    assert report['label_agreement'] == 1.0
+    assert report['matches'], report['max_abs_diff']
+
+
+def test_compiled_predict_matches_sklearn_predict(ml_predictor, tmp_path):
+    compiled = MLCropPredictor(model_path=export_compiled_model(ml_predictor, str(tmp_path / 'm.npz')))
+    expected, actual = ml_predictor.predict(SAMPLE_INPUT), compiled.predict(SAMPLE_INPUT)
+    
+    assert actual['recommended_crop'] == expected['recommended_crop']
+    assert actual['all_recommendations'] == expected['all_recommendations']
+    assert actual['yield_estimation'] == expected['yield_estimation']
+
+
+def test_multi_output_regressor_compiles():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(300, 4))
+    Y = np.column_stack([X[:, 0] + X[:, 1], X[:, 2] * 3, -X[:, 3]])
+    forest = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, Y)
+    
+    X_new = rng.normal(size=(50, 4))
+    np.testing.assert_allclose(CompiledForest.from_sklearn(forest).predict(X_new), forest.predict(X_new),
+                               rtol=0, atol=1e-9)
@@ -0,0 +1,122 @@
+"""
+Parquet history archive: compaction and filtered queries
+"""
+import pandas as pd
+import pytest
+from utils import data_handler
+from utils.data_handler import DataHandler, HISTORY_COLUMNS
+
+pytest.importorskip('pyarrow')
+
+CROPS = ['rice', 'maize', 'cotton']
+
+
+@pytest.fixture(autouse=True)
+def manual_compaction(monkeypatch):
+    monkeypatch.setitem(data_handler.HISTORY_ARCHIVE, 'enabled', True)
+    monkeypatch.setitem(data_handler.HISTORY_ARCHIVE, 'compact_interval_seconds', float('inf'))
+
+
+def append_rows(handler, months, per_month, first_score=0):
+    """Append history lines directly, spread over `months` and CROPS; returns the next score"""
+    with open(handler.history_file, 'a') as f:
+        if f.tell() == 0:
+            f.write(','.join(HISTORY_COLUMNS) + '\n')
+        score = first_score
+        for month in months:
+            for i in range(per_month):
+                f.write(f'{month}-{1 + i % 28:02d} 08:{i % 60:02d}:00,{CROPS[score % 3]},'
+                        f'90,42,43,21,82,6.5,203,{score},Good,4.2,120\n')
+                score += 1
+    return score
+
+
+def archived_scores(handler, **filters):
+    return sorted(handler.query_archive(columns=['score'], **filters)['score'].astype(int))
+
+
+@pytest.fixture
+def handler(tmp_path):
+    return DataHandler(str(tmp_path), backend='csv')
+
+
+def test_compaction_archives_every_row_by_month(handler):
+    rows = append_rows(handler, ['2025-01', '2025-02', '2025-03'], 20)
+
+    summary = handler.compact_archive()
+    assert summary['rows'] == rows
+    assert summary['partitions'] == ['2025-01', '2025-02', '2025-03']
+    assert archived_scores(handler) == list(range(rows))
+
+    history = handler.query_history()
+    archived = handler.query_archive()
+    assert list(archived.columns) == HISTORY_COLUMNS
+    assert archived['timestamp'].tolist() == history['timestamp'].tolist()
+
+
+def test_compaction_is_incremental(handler):
+    rows = append_rows(handler, ['2025-01', '2025-02'], 10)
+    handler.compact_archive()
+
+    assert handler.compact_archive()['rows'] == 0
+    total = append_rows(handler, ['2025-02', '2025-04'], 5, first_score=rows)
+    summary = handler.compact_archive()
+
+    assert summary['rows'] == total - rows
+    assert summary['partitions'] == ['2025-02', '2025-04']
+    assert archived_scores(handler) == list(range(total))
+    info = handler.archive.info()
+    assert [part['month'] for part in info['partitions']] == ['2025-01', '2025-02', '2025-04']
+    assert [part['rows'] for part in info['partitions']] == [10, 15, 5]
+
+
+def test_row_still_being_written_waits_for_next_compaction(handler):
+    rows = append_rows(handler, ['2025-01'], 5)
+    with open(handler.history_file, 'a') as f:
+        f.write('2025-01-09 08:00:00,rice,90,42')
+
+    assert handler.compact_archive()['rows'] == rows
+    with open(handler.history_file, 'a') as f:
+        f.write(',43,21,82,6.5,203,99,Good,4.2,120\n')
+    assert handler.compact_archive()['rows'] == 1
+    assert archived_scores(handler) == list(range(rows)) + [99]
+
+
+def test_query_filters_by_crop_and_time(handler):
+    append_rows(handler, ['2025-01', '2025-02', '2025-03'], 12)
+    handler.compact_archive()
+    history = handler.query_history()
+
+    def expected(crops, start, end):
+        mask = history['crop'].isin(crops) & (history['timestamp'] >= start) & (history['timestamp'] <= end)
+        return sorted(history.loc[mask, 'score'].astype(int))
+
+    assert archived_scores(handler, crop='rice') == expected(['rice'], '', '~')
+    assert archived_scores(handler, crop=['rice', 'cotton'], start='2025-02') == \
+        expected(['rice', 'cotton'], '2025-02', '~')
+    assert archived_scores(handler, start='2025-02-05 00:00:00', end='2025-02') == \
+        expected(CROPS, '2025-02-05 00:00:00', '2025-02-99')
+    assert archived_scores(handler, crop='maize', end='2025-01-10') == \
+        expected(['maize'], '', '2025-01-10 99')
+    assert handler.query_archive(start='2026-01').empty
+
+
+def test_source_change_rebuilds_archive(tmp_path):
+    archive = data_handler.HistoryArchive(str(tmp_path / 'archive'))
+    frame = pd.DataFrame({'timestamp': ['2025-01-02 08:00:00', '2025-02-03 08:00:00'],
+                          'crop': ['rice', 'maize'], 'score': [1.0, 2.0]})
+    reads = []
+
+    def read_since(position):
+        reads.append(position)
+        return (frame, 2) if position == 0 else (None, position)
+
+    archive.compact('source-a', read_since)
+    archive.compact('source-a', read_since)
+    assert archive.info()['rows'] == 2
+
+    archive.compact('source-b', read_since)
+    assert reads == [0, 2, 0]
+    assert archive.info()['source'] == 'source-b'
+    assert archive.info()['rows'] == 2
+    assert sorted(archive.query(columns=['score'])['score']) == [1.0, 2.0]
@@ -0,0 +1,68 @@
+"""
+Running history statistics against a full recomputation
+"""
+import pytest
+from utils import data_handler
+from utils.data_handler import DataHandler
+from tests.test_data_handler import INPUT
+
+PREDICTIONS = [
+    ('rice', {'score': 81.5, 'quality': 'Good', 'estimated_yield': 4.2, 'growth_duration': 120}),
+    ('maize', {'score': 62.0, 'quality': 'Fair', 'estimated_yield': 3.1}),
+    ('rice', {'score': 93.25, 'quality': 'Excellent', 'estimated_yield': 5.0, 'growth_duration': 115}),
+    ('cotton', {'score': 62.0, 'quality': 'Fair', 'estimated_yield': 2.4, 'growth_duration': 160}),
+    ('maize', {'score': 74.0, 'quality': 'Good', 'estimated_yield': 3.6, 'growth_duration': 95})
+]
+
+
+@pytest.fixture(autouse=True)
+def no_archive(monkeypatch):
+    monkeypatch.setitem(data_handler.HISTORY_ARCHIVE, 'enabled', False)
+
+
+def full_scan_statistics(df):
+    """get_statistics as computed from the whole history before running aggregates"""
+    best, worst = df['score'].idxmax(), df['score'].idxmin()
+    stats = {
+        'total_predictions': len(df),
+        'crops_analyzed': df['crop'].nunique(),
+        'average_score': round(df['score'].mean(), 2),
+        'average_yield': round(df['estimated_yield'].mean(), 2),
+        'quality_distribution': df['quality'].value_counts().to_dict(),
+        'crop_distribution': df['crop'].value_counts().to_dict(),
+        'best_prediction': {'score': df['score'].max(), 'crop': df.loc[best, 'crop'],
+                            'date': df.loc[best, 'timestamp']},
+        'worst_prediction': {'score': df['score'].min(), 'crop': df.loc[worst, 'crop'],
+                             'date': df.loc[worst, 'timestamp']}
+    }
+    if not df['growth_duration'].isna().all():
+        stats['average_growth_duration'] = round(df['growth_duration'].mean(), 1)
+    return stats
+
+
+@pytest.mark.parametrize('backend', ['csv', 'sqlite'])
+def test_running_statistics_match_full_scan(tmp_path, backend):
+    handler = DataHandler(str(tmp_path), backend=backend)
+    assert handler.get_statistics() is None
+
+    for count, (crop, prediction) in enumerate(PREDICTIONS, start=1):
+        handler.save_prediction(prediction, {**INPUT, 'crop_type': crop})
+        expected = full_scan_statistics(handler.load_history(limit=100))
+        assert handler.get_statistics() == expected
+        assert handler.get_statistics()['total_predictions'] == count
+
+    assert handler.rebuild_statistics() == expected
+    assert handler.get_statistics() == expected
+
+
+def test_csv_statistics_rebuild_after_outside_edit(tmp_path):
+    handler = DataHandler(str(tmp_path), backend='csv')
+    for crop, prediction in PREDICTIONS[:3]:
+        handler.save_prediction(prediction, {**INPUT, 'crop_type': crop})
+
+    lines = (tmp_path / 'historical_data.csv').read_text().splitlines(keepends=True)
+    (tmp_path / 'historical_data.csv').write_text(''.join(lines[:-1]))
+
+    stats = handler.get_statistics()
+    assert stats['total_predictions'] == 2
+    assert stats == full_scan_statistics(handler.load_history())
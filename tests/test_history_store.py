@@ -0,0 +1,40 @@
+"""
+SQLite history store: one-time CSV import
+"""
+import pytest
+from utils import data_handler
+from utils.data_handler import DataHandler
+from utils.history_store import SQLiteHistoryStore
+from tests.test_data_handler import LEGACY_CSV, PREDICTION, INPUT
+
+
+@pytest.fixture(autouse=True)
+def no_archive(monkeypatch):
+    monkeypatch.setitem(data_handler.HISTORY_ARCHIVE, 'enabled', False)
+
+
+@pytest.fixture
+def history_csv(tmp_path):
+    path = tmp_path / 'historical_data.csv'
+    path.write_text(LEGACY_CSV)
+    return str(path)
+
+
+def test_import_csv_runs_once(tmp_path, history_csv):
+    store = SQLiteHistoryStore(str(tmp_path / 'history.db'))
+
+    assert store.import_csv(history_csv) == 2
+    assert store.import_csv(history_csv) == 0
+    assert store.count() == 2
+    assert store.import_csv(history_csv, force=True) == 2
+    assert store.count() == 4
+
+
+def test_reopening_the_handler_does_not_duplicate_rows(tmp_path, history_csv):
+    handler = DataHandler(str(tmp_path), backend='sqlite')
+    handler.save_prediction(PREDICTION, INPUT)
+
+    reopened = DataHandler(str(tmp_path), backend='sqlite')
+    assert reopened.store.count() == 3
+    assert reopened.get_statistics()['total_predictions'] == 3
+    assert reopened.load_history()['crop'].tolist() == ['maize', 'rice', 'rice']
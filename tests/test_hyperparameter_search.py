@@ -0,0 +1,70 @@
+import pytest
+from models.hyperparameter_search import HyperparameterSearch
+from models.ml_predictor import MLCropPredictor, DEFAULT_FOREST_PARAMS
+
+SPACE = {'max_depth': [4, 8, None], 'min_samples_leaf': [1, 2]}
+
+
+@pytest.fixture(scope='module')
+def search(dataset_csv, tmp_path_factory):
+    predictor = MLCropPredictor(model_path=str(tmp_path_factory.mktemp('search') / 'm.pkl'), use_mmap=False)
+    search = HyperparameterSearch(search_space=SPACE, min_trees=2, max_trees=10, eta=2, n_folds=2, n_workers=2)
+    outcome = search.run(dataset_csv, predictor=predictor)
+    return search, outcome
+
+
+def test_rounds_end_at_the_full_tree_budget(search):
+    _, outcome = search
+    assert [r['n_estimators'] for r in outcome['rounds']] == [2, 4, 8, 10]
+    assert [r['candidates'] for r in outcome['rounds']] == [6, 3, 2, 1]
+
+
+def test_winner_is_ranked_on_full_budget_results_only(search):
+    search, outcome = search
+    leaderboard = outcome['leaderboard']
+    assert sorted(row['candidate'] for row in leaderboard) == list(range(6))
+    assert [row['n_estimators'] for row in leaderboard] == [10, 8, 4, 2, 2, 2]
+    objectives = [row['objective'] for row in leaderboard[3:]]
+    assert objectives == sorted(objectives, reverse=True)
+    assert outcome['best_params']['n_estimators'] == 10
+    assert outcome['leaderboard'][0]['candidate'] == outcome['rounds'][-2]['ranking'][0]['candidate']
+    assert all(row['p99_latency_ms'] > 0 for r in outcome['rounds'] for row in r['ranking'])
+
+
+def test_apply_only_changes_the_classifier(search, tmp_path):
+    search, outcome = search
+    predictor = MLCropPredictor(model_path=str(tmp_path / 'm.pkl'), use_mmap=False)
+    search.apply(predictor)
+    
+    assert predictor.model_params == DEFAULT_FOREST_PARAMS
+    assert predictor._new_classifier().n_estimators == 10
+    assert predictor._new_regressor().n_estimators == DEFAULT_FOREST_PARAMS['n_estimators']
+    assert predictor._new_regressor().max_depth == DEFAULT_FOREST_PARAMS['max_depth']
+
+
+def test_classifier_params_survive_training_and_reload(search, dataset_csv, tmp_path):
+    search, _ = search
+    model_path = str(tmp_path / 'm.pkl')
+    predictor = MLCropPredictor(model_path=model_path, use_mmap=False)
+    predictor.model_params['n_estimators'] = 4
+    search.apply(predictor)
+    predictor.train(dataset_csv)
+    
+    reloaded = MLCropPredictor(model_path=model_path, use_mmap=False)
+    assert reloaded.trained_classifier_params == search.best_params
+    assert len(reloaded.classifier_model.estimators_) == 10
+    assert len(reloaded.yield_model.estimators_) == 4
+    
+    # A plain retrain uses the defaults; reusing the search is opt-in
+    assert reloaded.classifier_params == {}
+    reloaded.train(dataset_csv)
+    assert len(reloaded.classifier_model.estimators_) == 4
+    assert reloaded.trained_classifier_params == {}
+    
+    predictor = MLCropPredictor(model_path=model_path, use_mmap=False)
+    assert predictor.reuse_search_params() == {}
+    predictor.classifier_params = dict(search.best_params)
+    predictor.train(dataset_csv)
+    reopened = MLCropPredictor(model_path=model_path, use_mmap=False)
+    assert reopened.reuse_search_params() == search.best_params
+    assert reopened._new_classifier().n_estimators == 10
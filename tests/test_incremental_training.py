@@ -0,0 +1,110 @@
+"""
+Incremental training: watermark, replay buffer and fallbacks to a full train
+"""
+import shutil
+import pytest
+from models.ml_predictor import MLCropPredictor
+from tests.conftest import DATASET, TEST_TREES
+
+
+@pytest.fixture
+def setup(tmp_path):
+    """A model trained on a private dataset copy, and that copy's path"""
+    data_path = str(tmp_path / 'crop_recommendation.csv')
+    shutil.copy(DATASET, data_path)
+    predictor = MLCropPredictor(model_path=str(tmp_path / 'crop_model.pkl'), use_mmap=False)
+    predictor.model_params['n_estimators'] = TEST_TREES
+    predictor.train(data_path, compare_multi_output=False)
+    return predictor, data_path
+
+
+def dataset_lines(count, label=None):
+    """The first `count` data lines of the bundled dataset, optionally relabelled"""
+    with open(DATASET) as f:
+        lines = f.read().splitlines()[1:count + 1]
+    if label is not None:
+        lines = [','.join(line.split(',')[:7] + [label] + line.split(',')[8:]) for line in lines]
+    return lines
+
+
+def append_lines(data_path, lines):
+    with open(data_path, 'a') as f:
+        f.write('\n' + '\n'.join(lines))
+
+
+@pytest.fixture
+def full_trains(monkeypatch):
+    calls = []
+    original = MLCropPredictor.train
+
+    def spy(self, *args, **kwargs):
+        calls.append(args)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(MLCropPredictor, 'train', spy)
+    return calls
+
+
+def test_appended_rows_grow_the_forests(setup, full_trains, monkeypatch):
+    predictor, data_path = setup
+    old_trees = list(predictor.classifier_model.estimators_)
+    rows_seen = predictor.data_watermark['rows']
+    buffer_rows = len(predictor.replay_buffer['labels'])
+    fit_sizes = []
+    original_grow = predictor._grow
+    monkeypatch.setattr(predictor, '_grow',
+                        lambda model, X, y, n: fit_sizes.append(len(X)) or original_grow(model, X, y, n))
+
+    append_lines(data_path, dataset_lines(30))
+    result = predictor.train_incremental(data_path)
+
+    assert not full_trains
+    assert result['new_rows'] == 30
+    assert result['classifier_trees'] == TEST_TREES + result['trees_added']
+    assert predictor.classifier_model.estimators_[:TEST_TREES] == old_trees
+    assert fit_sizes and all(size == 30 + buffer_rows for size in fit_sizes)
+    assert predictor.data_watermark['rows'] == rows_seen + 30
+    assert predictor.data_watermark['increments'] == 1
+    for model in predictor._forests():
+        assert len(model.estimators_) == TEST_TREES + result['trees_added']
+
+    assert predictor.train_incremental(data_path)['new_rows'] == 0
+
+
+def test_rewritten_rows_fall_back_to_full_training(setup, full_trains):
+    predictor, data_path = setup
+    with open(data_path) as f:
+        content = f.read()
+    lines = content.split('\n')
+    lines[-1] = lines[-1].replace(',', ',9', 1)
+    with open(data_path, 'w') as f:
+        f.write('\n'.join(lines))
+
+    predictor.train_incremental(data_path)
+    assert len(full_trains) == 1
+    assert predictor.data_watermark['increments'] == 0
+
+
+def test_new_crop_label_falls_back_to_full_training(setup, full_trains):
+    predictor, data_path = setup
+    append_lines(data_path, dataset_lines(12, label='quinoa'))
+
+    predictor.train_incremental(data_path)
+    assert len(full_trains) == 1
+    assert 'quinoa' in predictor.classifier_model.classes_
+
+
+def test_watermark_survives_save_and_load(setup, full_trains):
+    predictor, data_path = setup
+    append_lines(data_path, dataset_lines(20))
+    predictor.train_incremental(data_path)
+
+    reloaded = MLCropPredictor(model_path=predictor.model_path, use_mmap=False)
+    assert reloaded.data_watermark == predictor.data_watermark
+    assert (reloaded.replay_buffer['labels'] == predictor.replay_buffer['labels']).all()
+    assert len(reloaded.classifier_model.estimators_) == len(predictor.classifier_model.estimators_)
+
+    assert reloaded.train_incremental(data_path)['new_rows'] == 0
+    append_lines(data_path, dataset_lines(10))
+    assert reloaded.train_incremental(data_path)['new_rows'] == 10
+    assert not full_trains
@@ -0,0 +1,65 @@
+"""
+Stage timings: histogram buckets, percentiles and the disabled fast path
+"""
+import pytest
+from models.instrumentation import (
+    LatencyHistogram, StageTimings, NULL_SPAN, N_BUCKETS, MIN_BUCKET_EXP, MAX_BUCKET_EXP,
+    SUB_BUCKETS, _bucket_index, _bucket_upper_ns
+)
+
+
+@pytest.mark.parametrize('duration_ns', [0, 1, 100, (1 << MIN_BUCKET_EXP) - 1])
+def test_durations_below_256ns_share_bucket_zero(duration_ns):
+    assert _bucket_index(duration_ns) == 0
+    assert _bucket_index(1 << MIN_BUCKET_EXP) == 1
+
+
+@pytest.mark.parametrize('exp', [MIN_BUCKET_EXP, 9, 20, MAX_BUCKET_EXP - 1])
+def test_powers_of_two_start_a_bucket(exp):
+    index = _bucket_index(1 << exp)
+    assert index == 1 + (exp - MIN_BUCKET_EXP) * SUB_BUCKETS
+    assert _bucket_index((1 << exp) - 1) == index - 1
+    assert _bucket_upper_ns(index - 1) == 1 << exp
+
+
+def test_each_duration_is_below_its_bucket_upper_bound():
+    for duration_ns in list(range(200, 5000)) + [(1 << 30) + 12345, (1 << MAX_BUCKET_EXP) - 1]:
+        index = _bucket_index(duration_ns)
+        assert duration_ns < _bucket_upper_ns(index)
+        if index:
+            assert duration_ns >= _bucket_upper_ns(index - 1)
+
+
+@pytest.mark.parametrize('duration_ns', [1 << MAX_BUCKET_EXP, (1 << MAX_BUCKET_EXP) + 1, 1 << 50])
+def test_durations_above_the_top_bucket_are_clamped(duration_ns):
+    assert _bucket_index(duration_ns) == N_BUCKETS - 1
+
+
+def test_percentile_is_capped_at_the_max():
+    histogram = LatencyHistogram()
+    for duration_ns in (1000, 1000, 1000, 1100):
+        histogram.record(duration_ns)
+
+    # 1100 ns falls in the 1024-1280 ns bucket; its upper bound overshoots the max
+    assert _bucket_upper_ns(_bucket_index(1100)) > 1100
+    assert histogram.percentile(99) == 1100
+    assert histogram.percentile(100) == 1100
+    assert histogram.percentile(50) == _bucket_upper_ns(_bucket_index(1000))
+    assert LatencyHistogram().percentile(50) == 0
+
+
+def test_span_is_shared_no_op_while_disabled():
+    timings = StageTimings(enabled=False)
+    assert timings.span('predict') is NULL_SPAN
+    with timings.span('predict'):
+        pass
+    assert timings.snapshot() == {}
+
+    timings.enable()
+    with timings.span('predict'):
+        pass
+    assert timings.span('predict') is not NULL_SPAN
+    assert timings.snapshot()['predict']['count'] == 1
+
+    timings.disable()
+    assert timings.span('predict') is NULL_SPAN
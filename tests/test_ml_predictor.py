@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from models.ml_predictor import INPUT_KEYS, PARALLEL_BATCH_THRESHOLD
+from tests.conftest import SAMPLE_INPUT
+
+
+def _rows(n=25, seed=0):
+    rng = np.random.default_rng(seed)
+    base = np.array([SAMPLE_INPUT[key] for key in INPUT_KEYS], dtype=float)
+    return base * rng.uniform(0.5, 1.5, size=(n, len(INPUT_KEYS)))
+
+
+def test_predict_batch_matches_predict(ml_predictor):
+    rows = _rows()
+    batch = ml_predictor.predict_batch(rows)
+    
+    for i, row in enumerate(rows):
+        single = ml_predictor.predict(dict(zip(INPUT_KEYS, row)))
+        assert batch['recommended_crop'][i] == single['recommended_crop']
+        assert batch['confidence'][i] == single['confidence']
+        assert list(batch['top_crops'][i]) == [r['crop'] for r in single['all_recommendations']]
+        for target in ('quality_score', 'yield_estimation', 'growth_duration'):
+            assert batch[target][i] == single[target]
+
+
+def test_predict_batch_accepts_frames_and_dicts(ml_predictor):
+    rows = _rows(5)
+    expected = ml_predictor.predict_batch(rows)['recommended_crop']
+    
+    by_keys = pd.DataFrame(rows, columns=INPUT_KEYS)
+    by_features = pd.DataFrame(rows, columns=ml_predictor.feature_names)
+    for data in (by_keys, by_features, by_keys.to_dict('records')):
+        assert list(ml_predictor.predict_batch(data)['recommended_crop']) == list(expected)
+
+
+def test_predict_batch_top_k_is_ranked(ml_predictor):
+    result = ml_predictor.predict_batch(_rows(10), top_k=3)
+    
+    assert result['top_crops'].shape == (10, 3)
+    assert (np.diff(result['top_confidences'], axis=1) <= 0).all()
+    assert (result['top_crops'][:, 0] == result['recommended_crop']).all()
+
+
+def test_predictions_leave_n_jobs_alone(ml_predictor):
+    forests = ml_predictor._forests()
+    assert forests and all(model.n_jobs is None for model in forests)
+    
+    rows = _rows(PARALLEL_BATCH_THRESHOLD)
+    ml_predictor.predict(SAMPLE_INPUT)
+    large = ml_predictor.predict_batch(rows)
+    small = ml_predictor.predict_batch(rows[:10])
+    
+    assert all(model.n_jobs is None for model in forests)
+    assert list(large['recommended_crop'][:10]) == list(small['recommended_crop'])
+
+
+def test_multi_output_predicts_in_target_units(tmp_path, dataset_csv, ml_predictor):
+    from models.dataset_loader import load_dataset
+    from models.ml_predictor import MLCropPredictor
+    from tests.conftest import TEST_TREES
+    
+    model_path = str(tmp_path / 'crop_model.pkl')
+    multi = MLCropPredictor(model_path=model_path, use_mmap=False)
+    multi.model_params['n_estimators'] = TEST_TREES
+    results = multi.train(dataset_csv, multi_output=True)
+    
+    assert multi.regression_model is not None and multi.quality_model is None
+    assert 'multi_output_comparison' in results
+    assert all(model.n_jobs is None for model in multi._forests())
+    
+    rows = _rows()
+    single = ml_predictor.predict_batch(rows)
+    batch = multi.predict_batch(rows)
+    df = load_dataset(dataset_csv)
+    for target in multi.regression_targets:
+        assert batch[target].shape == single[target].shape == (len(rows),)
+        # Forest outputs average training targets, so they stay inside the target's range
+        low, high = df[target].min(), df[target].max()
+        assert ((batch[target] >= low - 0.1) & (batch[target] <= high + 0.1)).all()
+        assert abs(batch[target].mean() - single[target].mean()) < 0.25 * (high - low)
+    
+    reloaded = MLCropPredictor(model_path=model_path, use_mmap=False)
+    assert reloaded.regression_targets == multi.regression_targets
+    for target in multi.regression_targets:
+        assert np.allclose(reloaded.predict_batch(rows)[target], batch[target])
@@ -0,0 +1,111 @@
+"""
+Memory-mapped model store: versions, the CURRENT pointer and the pickle fallback
+"""
+import os
+import time
+import numpy as np
+import pytest
+from models.forest_compiler import CompiledForest
+from models.ml_predictor import MLCropPredictor
+from models.model_store import (write_store, open_store, current_version, store_is_fresh, store_path_for,
+                                arrays_version, CURRENT_FILE)
+
+
+def arrays_for(seed):
+    rng = np.random.default_rng(seed)
+    return {'weights': rng.normal(size=(4, 3)), 'labels': np.array(['a', 'b'])}
+
+
+def versions_on_disk(store_dir):
+    return sorted(entry for entry in os.listdir(store_dir)
+                  if not entry.startswith('.') and os.path.isdir(os.path.join(store_dir, entry)))
+
+
+def test_round_trip_maps_read_only(tmp_path):
+    store_dir = str(tmp_path / 'store')
+    arrays = arrays_for(0)
+    version = write_store(store_dir, arrays)
+    
+    mapped, manifest = open_store(store_dir)
+    assert version == manifest['model_version'] == arrays_version(arrays) == current_version(store_dir)
+    assert np.array_equal(mapped['weights'], arrays['weights'])
+    assert isinstance(mapped['weights'], np.memmap)
+    with pytest.raises(ValueError):
+        mapped['weights'][0, 0] = 1.0
+
+
+def test_current_moves_to_each_new_version_and_old_ones_are_pruned(tmp_path):
+    store_dir = str(tmp_path / 'store')
+    versions = []
+    for seed in range(4):
+        versions.append(write_store(store_dir, arrays_for(seed), keep=2))
+        assert current_version(store_dir) == versions[-1]
+        time.sleep(0.01)
+    
+    assert versions_on_disk(store_dir) == sorted(versions[-2:])
+    assert not [entry for entry in os.listdir(store_dir) if '.tmp-' in entry]
+    # An older version that is still on disk can still be opened explicitly
+    assert np.array_equal(open_store(store_dir, versions[-2])[0]['weights'], arrays_for(2)['weights'])
+
+
+def test_republishing_an_old_version_keeps_it_current(tmp_path):
+    store_dir = str(tmp_path / 'store')
+    first = write_store(store_dir, arrays_for(0))
+    time.sleep(0.01)
+    write_store(store_dir, arrays_for(1), keep=1)
+    time.sleep(0.01)
+    
+    assert write_store(store_dir, arrays_for(0), keep=1) == first
+    assert current_version(store_dir) == first
+    assert versions_on_disk(store_dir) == [first]
+
+
+def test_interrupted_write_is_invisible(tmp_path):
+    store_dir = str(tmp_path / 'store')
+    version = write_store(store_dir, arrays_for(0))
+    
+    # A writer that died before renaming its directory or switching CURRENT
+    os.makedirs(os.path.join(store_dir, '.tmp-999-deadbeef0000'))
+    with open(os.path.join(store_dir, f'{CURRENT_FILE}.tmp-999'), 'w') as f:
+        f.write('deadbeef0000')
+    
+    assert current_version(store_dir) == version
+    assert np.array_equal(open_store(store_dir)[0]['weights'], arrays_for(0)['weights'])
+    assert versions_on_disk(store_dir) == [version]
+    with pytest.raises(FileNotFoundError):
+        open_store(str(tmp_path / 'missing'))
+
+
+def test_store_older_than_the_pickle_is_stale(model_copy):
+    store_dir = store_path_for(model_copy)
+    assert store_is_fresh(store_dir, model_copy)
+    
+    later = os.path.getmtime(os.path.join(store_dir, CURRENT_FILE)) + 5
+    os.utime(model_copy, (later, later))
+    assert not store_is_fresh(store_dir, model_copy)
+    assert not store_is_fresh(os.path.join(os.path.dirname(model_copy), 'none.arrays'), model_copy)
+
+
+def test_load_model_prefers_a_fresh_store(model_copy):
+    predictor = MLCropPredictor(model_path=model_copy)
+    assert isinstance(predictor.classifier_model, CompiledForest)
+    assert predictor.model_version == current_version(store_path_for(model_copy))
+
+
+def test_load_model_falls_back_to_the_pickle(model_copy):
+    expected = MLCropPredictor(model_path=model_copy, use_mmap=False)
+    store_dir = store_path_for(model_copy)
+    
+    # Stale store: the pickle was replaced after the store was published
+    later = os.path.getmtime(os.path.join(store_dir, CURRENT_FILE)) + 5
+    os.utime(model_copy, (later, later))
+    stale = MLCropPredictor(model_path=model_copy)
+    assert hasattr(stale.classifier_model, 'estimators_')
+    
+    # Broken store: CURRENT names a version that is not on disk
+    os.utime(model_copy, (later - 10, later - 10))
+    with open(os.path.join(store_dir, CURRENT_FILE), 'w') as f:
+        f.write('000000000000')
+    broken = MLCropPredictor(model_path=model_copy)
+    assert hasattr(broken.classifier_model, 'estimators_')
+    assert broken.model_version == expected.model_version
@@ -0,0 +1,127 @@
+import sys
+import threading
+import time
+import pytest
+from models.prediction_cache import PredictionCache
+from models.predictor import CropPredictor
+from tests.conftest import SAMPLE_INPUT
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    # models/__init__ re-exports the prediction_cache instance over the module name
+    monkeypatch.setattr(sys.modules['models.prediction_cache'], 'time', clock)
+    return clock
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+
+def test_hit_after_miss():
+    cache = PredictionCache(maxsize=4, ttl=None)
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute('k', lambda: calls.append(1) or 'v') == 'v'
+    
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PredictionCache(maxsize=4, ttl=10)
+    cache.get_or_compute('k', lambda: 'old')
+    
+    clock.now += 9.9
+    assert cache.get_or_compute('k', lambda: 'new') == 'old'
+    clock.now += 0.2
+    assert cache.get_or_compute('k', lambda: 'new') == 'new'
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(maxsize=2, ttl=None)
+    cache.get_or_compute('a', lambda: 1)
+    cache.get_or_compute('b', lambda: 2)
+    cache.get_or_compute('a', lambda: 1)
+    cache.get_or_compute('c', lambda: 3)
+    
+    assert len(cache) == 2
+    assert cache.get_or_compute('a', lambda: 'recomputed') == 1
+    assert cache.get_or_compute('b', lambda: 'recomputed') == 'recomputed'
+
+
+def test_concurrent_misses_are_coalesced():
+    cache = PredictionCache(maxsize=4, ttl=None)
+    release = threading.Event()
+    calls, results = [], []
+    
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return 'shared'
+    
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: cache.stats()['coalesced'] == 3)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert calls == [1]
+    assert results == ['shared'] * 4
+
+
+def test_errors_reach_waiters_and_are_not_cached():
+    cache = PredictionCache(maxsize=4, ttl=None)
+    release = threading.Event()
+    errors = []
+    
+    def failing():
+        release.wait(5)
+        raise RuntimeError("boom")
+    
+    def call():
+        try:
+            cache.get_or_compute('k', failing)
+        except RuntimeError as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    _wait_for(lambda: cache.stats()['coalesced'] == 1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert len(errors) == 2
+    assert cache.get_or_compute('k', lambda: 'ok') == 'ok'
+
+
+def test_crop_predictor_serves_cached_copies():
+    predictor = CropPredictor(use_ml=False, seed=7, cache=PredictionCache(maxsize=8, ttl=None))
+    first = predictor.predict({**SAMPLE_INPUT, 'crop_type': 'rice'})
+    first['score'] = -1
+    second = predictor.predict({**SAMPLE_INPUT, 'crop_type': 'rice'})
+    
+    assert second['score'] != -1
+    assert predictor.cache.stats()['hits'] == 1
+
+
+def test_caching_requires_a_seed():
+    with pytest.raises(ValueError):
+        CropPredictor(use_ml=False, cache=PredictionCache())
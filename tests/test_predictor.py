@@ -0,0 +1,51 @@
+"""
+CropPredictor.compare_crops against per-crop predict()
+"""
+import pytest
+from models.predictor import CropPredictor
+from models.crop_catalog import get_crop_catalog
+from tests.conftest import SAMPLE_INPUT
+
+MATCHED_KEYS = ['score', 'quality', 'estimated_yield', 'yield_percentage', 'growth_duration']
+
+
+@pytest.fixture(params=['rules', 'ml'])
+def predictor(request, trained_model_path):
+    if request.param == 'rules':
+        return CropPredictor(use_ml=False, seed=42)
+    predictor = CropPredictor(model_path=trained_model_path, seed=42)
+    assert predictor.ml_predictor is not None
+    return predictor
+
+
+def test_rows_match_predict_for_each_crop(predictor):
+    crops = ['rice', 'maize', 'cotton', 'coffee']
+    rows = predictor.compare_crops({**SAMPLE_INPUT, 'crop_type': 'ignored'}, crops)
+
+    assert sorted(row['crop'] for row in rows) == sorted(crops)
+    for row in rows:
+        single = predictor.predict({**SAMPLE_INPUT, 'crop_type': row['crop']})
+        assert {key: row.get(key) for key in MATCHED_KEYS} == {key: single.get(key) for key in MATCHED_KEYS}
+        if predictor.ml_predictor is None:
+            assert row['rule_score'] == single['score']
+            assert row['ml_confidence'] is None
+        else:
+            assert row['growth_duration'] is not None
+
+
+def test_rows_are_ranked_by_rule_score_then_score(predictor):
+    rows = predictor.compare_crops(SAMPLE_INPUT)
+
+    assert [row['rank'] for row in rows] == list(range(1, len(rows) + 1))
+    keys = [(-row['rule_score'], -row['score']) for row in rows]
+    assert keys == sorted(keys)
+
+
+def test_all_catalog_crops_by_default(predictor):
+    rows = predictor.compare_crops(SAMPLE_INPUT)
+    assert sorted(row['crop'] for row in rows) == sorted(get_crop_catalog())
+
+
+def test_unknown_crops_are_rejected(predictor):
+    with pytest.raises(ValueError, match="kale"):
+        predictor.compare_crops(SAMPLE_INPUT, ['rice', 'kale'])
@@ -0,0 +1,74 @@
+"""
+Model registry: hot reload and the read-only proxy
+"""
+import os
+import time
+import pytest
+from models.ml_predictor import MLCropPredictor
+from models.model_store import store_path_for, CURRENT_FILE
+from models.registry import ModelRegistry, ReadOnlyModel
+
+
+@pytest.fixture
+def registry():
+    return ModelRegistry(check_interval=0)
+
+
+def retrain_smaller(model_path, n_trees=4):
+    """Publish a different model at model_path by dropping trees from the classifier"""
+    predictor = MLCropPredictor(model_path=model_path, use_mmap=False)
+    predictor.classifier_model.estimators_ = predictor.classifier_model.estimators_[:n_trees]
+    predictor.classifier_model.n_estimators = n_trees
+    predictor.save_model()
+    return predictor.model_version
+
+
+def test_get_loads_once_and_shares_the_model(registry, model_copy):
+    model = registry.get(model_copy)
+    assert isinstance(model, ReadOnlyModel)
+    assert registry.get(model_copy) is model
+    assert registry.stats(model_copy)['reloads'] == 0
+    assert registry.get(model_copy + '.missing') is None
+
+
+def test_rewritten_model_is_reloaded(registry, model_copy):
+    old = registry.get(model_copy)
+    new_version = retrain_smaller(model_copy)
+    
+    model = registry.get(model_copy)
+    assert model is not old
+    assert model.model_version == new_version != old.model_version
+    assert model.classifier_model.n_trees == 4
+    assert registry.stats(model_copy)['reloads'] == 1
+
+
+def test_touch_without_content_change_does_not_reload(registry, model_copy):
+    model = registry.get(model_copy)
+    later = time.time() + 5
+    for path in (model_copy, os.path.join(store_path_for(model_copy), CURRENT_FILE)):
+        os.utime(path, (later, later))
+    
+    assert registry.get(model_copy) is model
+    assert registry.stats(model_copy)['reloads'] == 0
+
+
+def test_check_interval_skips_the_stat(model_copy):
+    registry = ModelRegistry(check_interval=60)
+    model = registry.get(model_copy)
+    retrain_smaller(model_copy)
+    assert registry.get(model_copy) is model
+    registry.invalidate(model_copy)
+    assert registry.get(model_copy).classifier_model.n_trees == 4
+
+
+def test_proxy_is_read_only(registry, model_copy):
+    model = registry.get(model_copy)
+    with pytest.raises(AttributeError):
+        model.classifier_model = None
+    with pytest.raises(AttributeError):
+        model.model_params = {}
+    for name in ('train', 'train_incremental', 'save_model', 'load_model'):
+        with pytest.raises(AttributeError):
+            getattr(model, name)
+    assert model.predict({'nitrogen': 90, 'phosphorus': 42, 'potassium': 43, 'temperature': 21,
+                          'humidity': 82, 'ph': 6.5, 'rainfall': 203})['recommended_crop']
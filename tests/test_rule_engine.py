@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+from config.settings import CROP_PARAMETERS
+from models.predictor import CropPredictor
+from models.rule_engine import RuleEngine, INPUT_COLUMNS, quality_labels
+
+
+def scalar_factors(x, optimal):
+    """The per-factor rules as CropPredictor scored them before the engine"""
+    if 40 <= x['humidity'] <= 80:
+        humidity = 100 - abs(x['humidity'] - optimal['humidity']) * 1.5
+    else:
+        humidity = max(0, 50 - abs(x['humidity'] - optimal['humidity']) * 2)
+    if 6.0 <= x['ph'] <= 7.5:
+        ph = 100 - abs(x['ph'] - optimal['ph']) * 20
+    else:
+        ph = max(0, 60 - abs(x['ph'] - optimal['ph']) * 25)
+    return [
+        max(0, 100 - abs(x['N'] - optimal['nitrogen']) * 0.8),
+        max(0, 100 - abs(x['P'] - optimal['phosphorus']) * 1.5),
+        max(0, 100 - abs(x['K'] - optimal['potassium']) * 1.5),
+        max(0, 100 - abs(x['temperature'] - optimal['temperature']) * 3),
+        humidity,
+        ph,
+        max(0, 100 - abs(x['rainfall'] - optimal['rainfall']) * 0.5)
+    ]
+
+
+WEIGHTS = [0.20, 0.15, 0.15, 0.15, 0.15, 0.10, 0.10]
+
+
+@pytest.fixture(scope='module')
+def inputs():
+    rng = np.random.default_rng(3)
+    rows = np.column_stack([
+        rng.uniform(0, 200, 300), rng.uniform(0, 120, 300), rng.uniform(0, 120, 300),
+        rng.uniform(0, 50, 300), rng.uniform(0, 100, 300), rng.uniform(3, 10, 300), rng.uniform(0, 400, 300)
+    ])
+    # Exact range edges take the in-range branch
+    rows[:4, 4] = [40, 80, 39.999, 80.001]
+    rows[:4, 5] = [6.0, 7.5, 5.999, 7.501]
+    return rows
+
+
+def test_engine_matches_scalar_rules(inputs):
+    engine = RuleEngine(CROP_PARAMETERS)
+    result = engine.score(inputs)
+    
+    for i, row in enumerate(inputs):
+        x = dict(zip(INPUT_COLUMNS, row))
+        for j, crop in enumerate(result['crops']):
+            expected = scalar_factors(x, CROP_PARAMETERS[crop])
+            np.testing.assert_allclose(result['factors'][i, j], expected, rtol=0, atol=1e-9)
+            assert result['score'][i, j] == pytest.approx(sum(s * w for s, w in zip(expected, WEIGHTS)), abs=1e-9)
+
+
+def test_crop_subset_keeps_the_requested_order(inputs):
+    engine = RuleEngine(CROP_PARAMETERS)
+    full = engine.score(inputs)
+    crops = ['rice', 'wheat']
+    subset = engine.score(inputs, crops)
+    
+    assert subset['crops'] == crops
+    for j, crop in enumerate(crops):
+        np.testing.assert_array_equal(subset['score'][:, j], full['score'][:, full['crops'].index(crop)])
+
+
+def test_quality_labels_match_scalar_thresholds():
+    predictor = CropPredictor(use_ml=False)
+    scores = np.array([0, 49.99, 50, 64.99, 65, 79.99, 80, 100])
+    assert list(quality_labels(scores)) == [predictor._score_to_quality(s) for s in scores]
+
+
+def test_predictor_uses_engine_scores(inputs):
+    predictor = CropPredictor(use_ml=False)
+    row = dict(zip(INPUT_COLUMNS, inputs[7]))
+    score, quality = predictor._rule_based_score(row, 'rice')
+    
+    expected = scalar_factors(row, predictor.crop_params['rice'])
+    assert score == pytest.approx(sum(s * w for s, w in zip(expected, WEIGHTS)), abs=1e-9)
+    assert quality == predictor._score_to_quality(score)
+    assert [f['score'] for f in predictor._calculate_factors(row, 'rice')] == [round(s, 1) for s in expected]
@@ -0,0 +1,116 @@
+"""
+What-if sweeps: grid layout, caching and agreement with predict()
+"""
+import numpy as np
+import pytest
+from models.predictor import CropPredictor
+from models.sensitivity import SensitivityAnalyzer
+from tests.conftest import SAMPLE_INPUT
+
+BASE_INPUT = {**SAMPLE_INPUT, 'crop_type': 'rice'}
+
+
+class FakeModel:
+    """Stands in for the registry model; output depends on model_version"""
+    
+    def __init__(self, version):
+        self.model_version = version
+        self.calls = 0
+    
+    def predict_batch(self, grid, classify=True):
+        self.calls += 1
+        offset = 1.0 if self.model_version == 'v1' else 2.0
+        return {'quality_score': grid[:, 0] + offset, 'quality_grade': np.full(len(grid), 'Good')}
+
+
+class FakeModelPredictor(CropPredictor):
+    def __init__(self, model):
+        super().__init__(use_ml=False, seed=42)
+        self.model = model
+    
+    @property
+    def ml_predictor(self):
+        return self.model
+
+
+@pytest.fixture
+def rules_analyzer():
+    return SensitivityAnalyzer(CropPredictor(use_ml=False, seed=42))
+
+
+def test_sweep_layout(rules_analyzer):
+    values = np.linspace(0, 140, 8)
+    result = rules_analyzer.sweep(BASE_INPUT, 'nitrogen', values)
+    
+    assert result['param'] == 'nitrogen'
+    assert np.array_equal(result['values'], values)
+    assert result['rule_score'].shape == (8,)
+
+
+def test_sweep_2d_layout(rules_analyzer):
+    x, y = np.linspace(0, 100, 5), np.linspace(10, 30, 3)
+    result = rules_analyzer.sweep_2d(BASE_INPUT, 'humidity', x, 'temperature', y)
+    
+    assert (result['x_param'], result['y_param']) == ('humidity', 'temperature')
+    assert np.array_equal(result['x'], x) and np.array_equal(result['y'], y)
+    assert result['rule_score'].shape == (3, 5)
+    # Row j, column i is the 1-D humidity sweep at temperature y[j]
+    row = rules_analyzer.sweep({**BASE_INPUT, 'temperature': y[1]}, 'humidity', x)['rule_score']
+    assert np.allclose(result['rule_score'][1], row)
+
+
+def test_invalid_parameters_are_rejected(rules_analyzer):
+    with pytest.raises(ValueError):
+        rules_analyzer.sweep(BASE_INPUT, 'crop_type', [1, 2])
+    with pytest.raises(ValueError):
+        rules_analyzer.sweep_2d(BASE_INPUT, 'ph', [5, 6], 'ph', [5, 6])
+
+
+def test_outputs_are_read_only(rules_analyzer):
+    result = rules_analyzer.sweep(BASE_INPUT, 'ph', [5.0, 6.0, 7.0])
+    with pytest.raises(ValueError):
+        result['rule_score'][0] = 0
+    surface = rules_analyzer.sweep_2d(BASE_INPUT, 'ph', [5.0, 6.0], 'rainfall', [100, 200])['rule_score']
+    with pytest.raises(ValueError):
+        surface[0, 0] = 0
+
+
+def test_cache_is_reused_within_a_model_version():
+    model = FakeModel('v1')
+    analyzer = SensitivityAnalyzer(FakeModelPredictor(model))
+    
+    first = analyzer.sweep(BASE_INPUT, 'nitrogen', [10, 20, 30])
+    second = analyzer.sweep(BASE_INPUT, 'nitrogen', [10, 20, 30])
+    assert model.calls == 1
+    assert second['quality_score'] is first['quality_score']
+    assert 'quality_grade' not in first
+    
+    analyzer.sweep({**BASE_INPUT, 'ph': 7.0}, 'nitrogen', [10, 20, 30])
+    analyzer.sweep(BASE_INPUT, 'nitrogen', [10, 20, 40])
+    assert model.calls == 3
+
+
+def test_new_model_version_invalidates_the_cache():
+    model = FakeModel('v1')
+    predictor = FakeModelPredictor(model)
+    analyzer = SensitivityAnalyzer(predictor)
+    
+    assert analyzer.sweep(BASE_INPUT, 'nitrogen', [10, 20])['quality_score'].tolist() == [11, 21]
+    predictor.model = FakeModel('v2')
+    assert analyzer.sweep(BASE_INPUT, 'nitrogen', [10, 20])['quality_score'].tolist() == [12, 22]
+    assert predictor.model.calls == 1
+
+
+@pytest.mark.parametrize('use_ml', [False, True])
+def test_sweep_at_the_base_input_matches_predict(use_ml, trained_model_path):
+    predictor = CropPredictor(use_ml=use_ml, model_path=trained_model_path, seed=42)
+    analyzer = SensitivityAnalyzer(predictor)
+    base = BASE_INPUT['rainfall']
+    
+    result = analyzer.sweep(BASE_INPUT, 'rainfall', [base - 50, base, base + 50])
+    single = predictor.predict(BASE_INPUT)
+    if use_ml:
+        assert round(result['quality_score'][1], 1) == single['score']
+        assert round(result['growth_duration'][1], 1) == single['growth_duration']
+    else:
+        assert round(result['rule_score'][1], 1) == single['score']
@@ -0,0 +1,112 @@
+"""
+Scoring daemon: micro-batching and the HTTP round trip
+"""
+import threading
+import time
+import numpy as np
+import pytest
+from models.serving import MicroBatcher, ScoringService, ScoringServer, ScoringClient
+from tests.conftest import SAMPLE_INPUT
+
+
+def submit_concurrently(batcher, rows):
+    """Submit each row from its own thread; returns results (or exceptions) in row order"""
+    results = [None] * len(rows)
+
+    def worker(i):
+        try:
+            results[i] = batcher.submit(rows[i])
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(rows))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_full_batch_runs_without_waiting_for_the_window():
+    sizes = []
+
+    def score_batch(features):
+        sizes.append(len(features))
+        return features.sum(axis=1).tolist()
+
+    batcher = MicroBatcher(score_batch, window_ms=60_000, max_batch=4)
+    start = time.monotonic()
+    results = submit_concurrently(batcher, [[i, 1.0] for i in range(8)])
+
+    assert time.monotonic() - start < 10
+    assert results == [i + 1.0 for i in range(8)]
+    assert sizes == [4, 4]
+    assert batcher.stats() == {'batches': 2, 'rows': 8, 'mean_batch_size': 4.0, 'largest_batch': 4}
+
+
+def test_partial_batch_runs_when_the_window_closes():
+    batcher = MicroBatcher(lambda features: features[:, 0].tolist(), window_ms=50, max_batch=256)
+
+    start = time.monotonic()
+    assert batcher.submit([7.0]) == 7.0
+    assert time.monotonic() - start >= 0.045
+    assert submit_concurrently(batcher, [[1.0], [2.0], [3.0]]) == [1.0, 2.0, 3.0]
+    assert batcher.stats()['rows'] == 4
+
+
+def test_scoring_error_reaches_every_waiting_caller():
+    def score_batch(features):
+        if len(features) == 3:
+            raise RuntimeError('model exploded')
+        return features[:, 0].tolist()
+
+    batcher = MicroBatcher(score_batch, window_ms=60_000, max_batch=3)
+    results = submit_concurrently(batcher, [[1.0], [2.0], [3.0]])
+
+    assert all(isinstance(result, RuntimeError) and str(result) == 'model exploded' for result in results)
+    assert batcher.stats()['batches'] == 0
+    batcher.max_batch = 1
+    assert batcher.submit([5.0]) == 5.0
+
+
+@pytest.fixture
+def server(trained_model_path):
+    server = ScoringServer(port=0, service=ScoringService(trained_model_path, window_ms=1.0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_round_trip_matches_predict_batch(server, ml_predictor):
+    client = ScoringClient(port=server.server_address[1])
+    rows = [SAMPLE_INPUT, {**SAMPLE_INPUT, 'rainfall': 60, 'temperature': 30}]
+    expected = ml_predictor.predict_batch(rows)
+
+    single = client.predict(rows[0])
+    many = client.predict_many(rows)
+    for i, result in enumerate([single] + many):
+        row = i - 1 if i else 0
+        assert result['recommended_crop'] == expected['recommended_crop'][row]
+        assert result['top_crops'] == expected['top_crops'][row].tolist()
+        assert np.isclose(result['quality_score'], expected['quality_score'][row])
+        assert result['model_version'] == ml_predictor.model_version
+
+    health = client.health()
+    assert health['status'] == 'ok'
+    assert health['batching']['rows'] == 1
+
+
+def test_http_errors_are_json(server, monkeypatch):
+    client = ScoringClient(port=server.server_address[1])
+    with pytest.raises(RuntimeError, match='400: Missing input fields'):
+        client.predict({'nitrogen': 90})
+
+    def broken(features, top_k=5):
+        raise MemoryError('out of memory')
+
+    monkeypatch.setattr(server.service, 'score', broken)
+    with pytest.raises(RuntimeError, match='500: MemoryError: out of memory'):
+        client.predict_many([SAMPLE_INPUT])
+    assert client.health()['status'] == 'ok'
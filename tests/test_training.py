@@ -0,0 +1,93 @@
+"""
+Parallel training pipeline: agreement with a serial train and shared-memory cleanup
+"""
+from multiprocessing import shared_memory
+import numpy as np
+import pytest
+from models import training
+from models.ml_predictor import MLCropPredictor, REGRESSION_TARGETS
+from models.training import TrainingPipeline
+from tests.conftest import TEST_TREES
+
+
+def make_predictor(tmp_path, name):
+    predictor = MLCropPredictor(model_path=str(tmp_path / f'{name}.pkl'), use_mmap=False)
+    predictor.model_params['n_estimators'] = TEST_TREES
+    return predictor
+
+
+@pytest.fixture
+def shared_blocks(monkeypatch):
+    """Names of every shared-memory block the pipeline creates"""
+    names = []
+    original_init = training.SharedArrays.__init__
+
+    def recording_init(self, arrays):
+        original_init(self, arrays)
+        names.append(self.spec['name'])
+
+    monkeypatch.setattr(training.SharedArrays, '__init__', recording_init)
+    return names
+
+
+def assert_unlinked(names):
+    assert names
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_pipeline_matches_a_serial_train(tmp_path, dataset_csv, shared_blocks):
+    serial = make_predictor(tmp_path, 'serial')
+    expected = serial.train(dataset_csv)
+    parallel = make_predictor(tmp_path, 'parallel')
+    results = TrainingPipeline(parallel, n_workers=2).run(dataset_csv)
+
+    assert_unlinked(shared_blocks)
+    assert results['crop_classification']['accuracy'] == expected['crop_classification']['accuracy']
+    assert results['crop_classification']['cv_mean'] == expected['crop_classification']['cv_mean']
+    for target in REGRESSION_TARGETS:
+        assert results[target]['rmse'] == expected[target]['rmse']
+        assert results[target]['r2_score'] == expected[target]['r2_score']
+
+    features = np.random.default_rng(0).uniform(0, 200, size=(20, len(serial.feature_names)))
+    scaled = serial.scaler.transform(features)
+    assert np.allclose(parallel.scaler.transform(features), scaled)
+    assert (parallel.classifier_model.predict(scaled) == serial.classifier_model.predict(scaled)).all()
+    for target, spec in REGRESSION_TARGETS.items():
+        assert np.allclose(getattr(parallel, spec['attr']).predict(scaled),
+                           getattr(serial, spec['attr']).predict(scaled))
+
+    reloaded = MLCropPredictor(model_path=parallel.model_path, use_mmap=False)
+    assert len(reloaded.classifier_model.estimators_) == TEST_TREES
+
+
+def test_out_of_bag_replaces_cross_validation(tmp_path, dataset_csv, shared_blocks):
+    results = TrainingPipeline(make_predictor(tmp_path, 'oob'), n_workers=2, use_oob=True).run(dataset_csv)
+
+    assert_unlinked(shared_blocks)
+    classification = results['crop_classification']
+    assert 'cv_mean' not in classification
+    assert 0 < classification['oob_accuracy'] <= 100
+    for target in REGRESSION_TARGETS:
+        assert 'oob_r2' in results[target]
+
+
+def test_shared_block_is_unlinked_when_a_fit_fails(tmp_path, dataset_csv, shared_blocks, monkeypatch):
+    class BrokenPool:
+        def __init__(self, max_workers):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def map(self, fn, jobs):
+            raise RuntimeError('worker died')
+
+    monkeypatch.setattr(training, 'ProcessPoolExecutor', BrokenPool)
+    with pytest.raises(RuntimeError, match='worker died'):
+        TrainingPipeline(make_predictor(tmp_path, 'broken'), n_workers=2).run(dataset_csv)
+    assert_unlinked(shared_blocks)
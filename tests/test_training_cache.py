@@ -0,0 +1,91 @@
+"""
+Training cache: fingerprints, full hits and per-target invalidation
+"""
+import pandas as pd
+import pytest
+from models.ml_predictor import MLCropPredictor, REGRESSION_TARGETS
+from models.training_cache import TrainingCache, column_fingerprint
+from tests.conftest import DATASET, TEST_TREES
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """The bundled dataset rewritten by pandas, so edited copies format identically"""
+    df = pd.read_csv(DATASET)
+    path = tmp_path / 'crop_recommendation.csv'
+    df.to_csv(path, index=False)
+    return df, str(path)
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    """Names of the forests actually fit (not served from the cache)"""
+    names = []
+    original_classifier = MLCropPredictor._new_classifier
+    original_regressor = MLCropPredictor._new_regressor
+
+    def new_classifier(self, **overrides):
+        names.append('classifier')
+        return original_classifier(self, **overrides)
+
+    def new_regressor(self, **overrides):
+        names.append('regressor')
+        return original_regressor(self, **overrides)
+
+    monkeypatch.setattr(MLCropPredictor, '_new_classifier', new_classifier)
+    monkeypatch.setattr(MLCropPredictor, '_new_regressor', new_regressor)
+    return names
+
+
+def make_predictor(tmp_path, name='crop_model'):
+    predictor = MLCropPredictor(model_path=str(tmp_path / f'{name}.pkl'), use_mmap=False)
+    predictor.model_params['n_estimators'] = TEST_TREES
+    return predictor
+
+
+def test_column_fingerprint_ignores_the_index():
+    df = pd.DataFrame({'a': [1.0, 2.0, 3.0], 'b': ['x', 'y', 'z']})
+    shifted = df.set_axis([10, 11, 12])
+
+    assert column_fingerprint(df, ['a', 'b']) == column_fingerprint(shifted, ['a', 'b'])
+    assert column_fingerprint(df, ['a']) != column_fingerprint(df, ['b'])
+    assert column_fingerprint(df, ['a']) != column_fingerprint(df.assign(a=[1.0, 2.0, 4.0]), ['a'])
+
+
+def test_unchanged_dataset_is_a_full_hit(tmp_path, dataset, fits):
+    _, data_path = dataset
+    cache = TrainingCache(str(tmp_path / 'cache'))
+    predictor = make_predictor(tmp_path)
+    first = predictor.train(data_path, cache=cache)
+    fit_count = len(fits)
+    assert fit_count == 1 + len(REGRESSION_TARGETS)
+
+    # Same predictor: the run key matches and nothing is refit or rescored
+    assert predictor.train(data_path, cache=cache) == first
+    assert len(fits) == fit_count
+
+    # A fresh predictor misses the run key but reuses every fitted model
+    hits = cache.hits
+    second = make_predictor(tmp_path, 'fresh').train(data_path, cache=cache)
+    assert len(fits) == fit_count
+    assert cache.hits == hits + 1 + len(REGRESSION_TARGETS)
+    assert second['crop_classification']['accuracy'] == first['crop_classification']['accuracy']
+    for target in REGRESSION_TARGETS:
+        assert second[target]['rmse'] == first[target]['rmse']
+
+
+def test_changed_target_only_refits_that_target(tmp_path, dataset, fits):
+    df, data_path = dataset
+    cache = TrainingCache(str(tmp_path / 'cache'))
+    predictor = make_predictor(tmp_path)
+    first = predictor.train(data_path, cache=cache)
+    del fits[:]
+
+    df.assign(yield_estimation=df['yield_estimation'] * 1.1).to_csv(data_path, index=False)
+    second = predictor.train(data_path, cache=cache)
+
+    assert fits == ['regressor']
+    assert second['crop_classification'] == first['crop_classification']
+    assert second['quality_score'] == first['quality_score']
+    assert second['growth_duration'] == first['growth_duration']
+    assert second['yield_estimation'] != first['yield_estimation']
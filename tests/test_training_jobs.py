@@ -0,0 +1,73 @@
+import subprocess
+import sys
+import threading
+import pytest
+from models.training_jobs import JobStore, TrainingJobRunner
+from tests.conftest import REPO_ROOT
+
+
+@pytest.fixture
+def runner(tmp_path):
+    return TrainingJobRunner(model_path=str(tmp_path / 'm.pkl'), db_path=str(tmp_path / 'jobs.db'))
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_latest_fails_a_job_left_running_by_a_dead_process(runner):
+    job_id = runner.store.create('full', {})
+    runner.store.update(job_id, status='running', pid=_dead_pid())
+    
+    job = runner.latest()
+    assert job['id'] == job_id
+    assert job['status'] == 'failed'
+    assert 'Interrupted' in job['error']
+
+
+def test_latest_fails_a_job_from_an_earlier_process_with_the_same_pid(runner, tmp_path):
+    job_id = JobStore(str(tmp_path / 'jobs.db')).create('full', {})
+    assert runner.latest()['status'] == 'failed'
+    assert runner.store.get(job_id)['status'] == 'failed'
+
+
+def test_a_running_job_of_this_runner_is_left_alone(runner, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(runner, '_run', lambda job_id, mode, params: release.wait(5))
+    
+    job_id = runner.submit('full')
+    try:
+        assert runner.latest()['status'] == 'queued'
+        assert runner.submit('incremental') == job_id
+    finally:
+        release.set()
+
+
+def test_submit_after_an_orphan_starts_a_new_job(runner, monkeypatch):
+    orphan = runner.store.create('full', {})
+    runner.store.update(orphan, status='running', pid=_dead_pid())
+    monkeypatch.setattr(runner, '_run', lambda job_id, mode, params: None)
+    
+    assert runner.submit('full') != orphan
+    assert runner.store.get(orphan)['status'] == 'failed'
+
+
+def test_concurrent_processes_queue_a_single_job(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    JobStore(db_path).list()
+    script = (
+        "import sys\n"
+        "from models.training_jobs import JobStore\n"
+        "job_id, created = JobStore(sys.argv[1]).create_if_idle('full', {})\n"
+        "print(job_id, created)\n"
+    )
+    processes = [subprocess.Popen([sys.executable, '-c', script, db_path], stdout=subprocess.PIPE,
+                                  text=True, cwd=str(REPO_ROOT)) for _ in range(4)]
+    outputs = [process.communicate(timeout=60)[0].split() for process in processes]
+    
+    assert all(process.returncode == 0 for process in processes)
+    assert sum(created == 'True' for _, created in outputs) == 1
+    assert len({job_id for job_id, _ in outputs}) == 1
+    assert len(JobStore(db_path).list()) == 1
@@ -4,10 +4,36 @@ COMPLETE VERSION FOR EXTENDED DATASET
 """
 import sys
 import os
+import argparse
 from models.ml_predictor import MLCropPredictor
+from models.training import TrainingPipeline
+from models.hyperparameter_search import HyperparameterSearch
+from models.training_cache import TrainingCache, cache_path_for
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the ML crop prediction models")
+    parser.add_argument('--multi-output', action='store_true',
+                        help="Fit one multi-output forest for quality, yield and duration")
+    parser.add_argument('--parallel', action='store_true',
+                        help="Fit the independent models concurrently in a process pool")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Worker processes for --parallel/--search (default: CPU count)")
+    parser.add_argument('--oob', action='store_true',
+                        help="With --parallel, use out-of-bag estimates instead of 5-fold CV")
+    parser.add_argument('--search', action='store_true',
+                        help="Pick forest settings by successive halving on accuracy, p99 latency and size")
+    parser.add_argument('--reuse-search', action='store_true',
+                        help="Refit the classifier with the settings the last --search picked (saved with the model)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Refit every model even when the data and parameters are unchanged")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Grow the saved forests with trees fit on rows appended since the last run")
+    return parser.parse_args()
 
 def main():
     """Train the ML model"""
+    args = parse_args()
+    
     print("=" * 60)
     print("CROP PREDICTION MODEL TRAINING")
     print("Extended Dataset with Quality, Yield & Growth Duration")
@@ -34,14 +60,47 @@ def main():
     print(f"✅ Dataset found: {dataset_path}")
     print()
     
-    predictor = MLCropPredictor()
+    predictor = MLCropPredictor(use_mmap=False)
+    if args.reuse_search and not args.search:
+        params = predictor.reuse_search_params()
+        print(f"♻️ Reusing searched classifier settings: {params or 'none saved, using the defaults'}")
+        print()
     
     print("🚀 Starting model training...")
     print("This may take a few moments...")
     print()
     
     try:
-        results = predictor.train(dataset_path)
+        if args.search:
+            search = HyperparameterSearch(n_workers=args.workers)
+            outcome = search.run(dataset_path, predictor=predictor)
+            print()
+            print("🏆 TOP CONFIGURATIONS at the largest tree count each reached (accuracy / p99 latency / size):")
+            for row in outcome['leaderboard'][:5]:
+                print(f"   • {row['n_estimators']:4d} trees {row['params']}: {row['accuracy']}% / "
+                      f"{row['p99_latency_ms']} ms / {row['size_mb']} MB (objective {row['objective']})")
+            search.apply(predictor)
+            print()
+        
+        if args.incremental:
+            results = predictor.train_incremental(dataset_path)
+            if 'crop_classification' not in results:
+                print()
+                print("✅ INCREMENTAL UPDATE COMPLETE!")
+                print(f"   • New rows: {results['new_rows']}")
+                if results['new_rows']:
+                    print(f"   • Trees added per forest: {results['trees_added']}")
+                    print(f"   • Accuracy on new rows before update: {results['prequential_accuracy']}%")
+                print(f"   • Rows seen: {results['data_watermark']['rows']}")
+                print(f"   Memory-mapped store: {predictor.store_path} (version {predictor.model_version})")
+                return
+        elif args.parallel:
+            pipeline = TrainingPipeline(predictor, n_workers=args.workers, use_oob=args.oob,
+                                        multi_output=args.multi_output)
+            results = pipeline.run(dataset_path)
+        else:
+            cache = None if args.no_cache else TrainingCache(cache_path_for(predictor.model_path))
+            results = predictor.train(dataset_path, multi_output=args.multi_output, cache=cache)
         
         print()
         print("=" * 60)
@@ -51,8 +110,11 @@ def main():
         
         print("🎯 CROP CLASSIFICATION RESULTS:")
         print(f"   • Accuracy: {results['crop_classification']['accuracy']}%")
-        print(f"   • Cross-validation mean: {results['crop_classification']['cv_mean']}%")
-        print(f"   • Cross-validation std: {results['crop_classification']['cv_std']}%")
+        if 'cv_mean' in results['crop_classification']:
+            print(f"   • Cross-validation mean: {results['crop_classification']['cv_mean']}%")
+            print(f"   • Cross-validation std: {results['crop_classification']['cv_std']}%")
+        if 'oob_accuracy' in results['crop_classification']:
+            print(f"   • Out-of-bag accuracy: {results['crop_classification']['oob_accuracy']}%")
         print(f"   • Training samples: {results['train_samples']}")
         print(f"   • Test samples: {results['test_samples']}")
         print()
@@ -87,8 +149,15 @@ def main():
             print(f"   • Mean Duration: {results['growth_duration']['mean_duration']} days")
             print()
         
+        if 'timings' in results:
+            print("⏱️ STAGE TIMINGS:")
+            for stage, seconds in results['timings'].items():
+                print(f"   • {stage:22s}: {seconds:7.2f}s")
+            print()
+        
         print("💾 Models saved successfully!")
-        print(f"   Location: models/crop_model.pkl")
+        print(f"   Location: {predictor.model_path}")
+        print(f"   Memory-mapped store: {predictor.store_path} (version {predictor.model_version})")
         print()
         print("=" * 60)
         print("🎉 TRAINING COMPLETED SUCCESSFULLY!")
@@ -1,6 +1,10 @@
 # utils/__init__.py
 from .data_handler import *
+from .history_store import *
+from .history_stats import *
+from .history_archive import *
+from .file_lock import *
 from .visualization import *
 from .weather_api import *
 
-__all__ = ['data_handler', 'visualization', 'weather_api']
+__all__ = ['data_handler', 'history_store', 'history_stats', 'history_archive', 'file_lock', 'visualization', 'weather_api']
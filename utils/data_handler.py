@@ -1,20 +1,60 @@
 """
 Data handling utilities - COMPLETE VERSION
 """
-import pandas as pd
+import csv
+import io
+import json
 import os
+import shutil
 from datetime import datetime
+from functools import lru_cache
+import pandas as pd
+from config.settings import HISTORY_STORAGE, HISTORY_ARCHIVE
+from utils.history_store import SQLiteHistoryStore
+from utils.history_stats import RunningStatistics
+from utils.file_lock import file_lock
+from utils.history_archive import HistoryArchive, archive_available
+
+# Column order of every history file; optional values are written as empty fields
+HISTORY_COLUMNS = ['timestamp', 'crop', 'nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity',
+                   'ph', 'rainfall', 'score', 'quality', 'estimated_yield', 'growth_duration']
+
+# Block size for reading the CSV history backwards from a byte offset
+TAIL_BLOCK_BYTES = 64 * 1024
+
+# Rows per chunk when scanning the whole CSV (statistics rebuild, filtered queries)
+SCAN_CHUNK_ROWS = 100_000
 
 class DataHandler:
     """Handle data persistence"""
     
-    def __init__(self, data_dir='data'):
+    def __init__(self, data_dir='data', backend=None):
+        """
+        Parameters:
+        -----------
+        backend : str, optional
+            'sqlite' or 'csv'; HISTORY_STORAGE['backend'] when omitted
+        """
         self.data_dir = data_dir
         self.history_file = os.path.join(data_dir, 'historical_data.csv')
         self.dataset_file = os.path.join(data_dir, 'crop_recommendation.csv')
+        self.stats_file = os.path.join(data_dir, 'historical_data.stats.json')
+        self.backend = backend or HISTORY_STORAGE['backend']
+        if self.backend not in ('sqlite', 'csv'):
+            raise ValueError(f"Unknown history backend '{self.backend}'; choose 'sqlite' or 'csv'")
         
         if not os.path.exists(data_dir):
             os.makedirs(data_dir)
+        
+        self.store = None
+        if self.backend == 'sqlite':
+            self.store = SQLiteHistoryStore(os.path.join(data_dir, HISTORY_STORAGE['db_file']))
+            if os.path.exists(self.history_file):
+                self.store.import_csv(self.history_file)
+        
+        self.archive = None
+        if HISTORY_ARCHIVE['enabled'] and archive_available():
+            self.archive = HistoryArchive(os.path.join(data_dir, HISTORY_ARCHIVE['dir']))
     
     def save_prediction(self, prediction, input_data):
         """Save prediction to history"""
@@ -36,27 +76,288 @@ class DataHandler:
         if 'growth_duration' in prediction:
             record['growth_duration'] = prediction['growth_duration']
         
-        if os.path.exists(self.history_file):
-            df = pd.read_csv(self.history_file)
-            df = pd.concat([df, pd.DataFrame([record])], ignore_index=True)
+        if self.store is not None:
+            self.store.append(record)
         else:
-            df = pd.DataFrame([record])
+            self._append_record(record)
         
-        df.to_csv(self.history_file, index=False)
+        if self.archive is not None:
+            self.archive.compact_in_background(self._archive_source(), self._rows_since,
+                                               HISTORY_ARCHIVE['compact_interval_seconds'])
         return record
     
+    def _append_record(self, record):
+        """
+        Append one CSV line under the history lock
+        
+        Only the header and the last byte are read, so a save costs the
+        same at any history size. Concurrent writers queue on the lock
+        instead of overwriting each other's rows. The running statistics
+        are updated under the same lock.
+        """
+        with self._history_lock():
+            columns = self._history_columns()
+            stats = self._csv_statistics()
+            with open(self.history_file, 'a', newline='') as f:
+                if f.tell() == 0:
+                    csv.writer(f, lineterminator='\n').writerow(columns)
+                csv.DictWriter(f, fieldnames=columns, restval='', extrasaction='ignore',
+                               lineterminator='\n').writerow(record)
+                f.flush()
+                size = f.tell()
+            stats.add(record)
+            self._write_csv_statistics(stats, size)
+    
+    def _csv_statistics(self):
+        """
+        Running statistics of the CSV history; call with the history lock held
+        
+        The stats file records the CSV size it describes. If the sizes
+        differ (a crash between the two writes, or an edit by hand), the
+        statistics are rebuilt from the CSV.
+        """
+        size = os.path.getsize(self.history_file) if os.path.exists(self.history_file) else 0
+        try:
+            with open(self.stats_file) as f:
+                saved = json.load(f)
+            if saved['history_bytes'] == size:
+                return RunningStatistics.from_dict(saved['statistics'])
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        stats = RunningStatistics()
+        if size:
+            for chunk in pd.read_csv(self.history_file, chunksize=SCAN_CHUNK_ROWS):
+                stats.add_frame(_history_layout(chunk))
+        self._write_csv_statistics(stats, size)
+        return stats
+    
+    def _write_csv_statistics(self, stats, size):
+        tmp_file = f'{self.stats_file}.tmp-{os.getpid()}'
+        with open(tmp_file, 'w') as f:
+            json.dump({'history_bytes': size, 'statistics': stats.to_dict()}, f)
+        os.replace(tmp_file, self.stats_file)
+    
+    def _history_columns(self):
+        """
+        Header of the history file (HISTORY_COLUMNS for a new file)
+        
+        A file written with an older layout keeps its column order: rows
+        are appended in the file's own order and mapped onto HISTORY_COLUMNS
+        when read. Columns the old header lacks (e.g. growth_duration) are
+        added to the header once, see _upgrade_header.
+        """
+        if not os.path.exists(self.history_file) or os.path.getsize(self.history_file) == 0:
+            return HISTORY_COLUMNS
+        
+        with open(self.history_file, 'rb') as f:
+            header = next(csv.reader([f.readline().decode('utf-8')]), [])
+            f.seek(-1, os.SEEK_END)
+            ends_with_newline = f.read(1) == b'\n'
+        
+        if not ends_with_newline:
+            with open(self.history_file, 'a', newline='') as f:
+                f.write('\n')
+        
+        missing = [column for column in HISTORY_COLUMNS if column not in header]
+        if missing:
+            header = header + missing
+            self._upgrade_header(header)
+        return header
+    
+    def _upgrade_header(self, columns):
+        """
+        Replace the header line with `columns`; call with the history lock held
+        
+        Old rows are copied byte for byte, not re-parsed or re-written.
+        They have fewer fields than the new header, and the missing trailing
+        fields read as empty.
+        """
+        tmp_file = f'{self.history_file}.tmp-{os.getpid()}'
+        with open(self.history_file, 'rb') as src, open(tmp_file, 'w', newline='') as dst:
+            src.readline()
+            csv.writer(dst, lineterminator='\n').writerow(columns)
+            dst.flush()
+            shutil.copyfileobj(src, dst.buffer)
+        os.replace(tmp_file, self.history_file)
+    
+    def _history_lock(self):
+        """Exclusive lock on a sidecar file, so the history file itself can be replaced"""
+        return file_lock(f'{self.history_file}.lock')
+    
     def load_history(self, limit=100):
         """Load prediction history"""
-        if os.path.exists(self.history_file):
-            df = pd.read_csv(self.history_file)
-            return df.tail(limit)
-        return None
+        return self.load_history_page(limit)[0]
+    
+    def load_history_page(self, limit=100, before=None):
+        """
+        One page of history, newest page first
+        
+        Only the requested rows are read (by rowid in SQLite, by seeking
+        backwards from the end of the CSV), so a page costs the same at
+        any history size.
+        
+        Parameters:
+        -----------
+        limit : int
+            Rows per page
+        before : int, optional
+            Cursor returned with the previous (newer) page; omit for the newest page
+        
+        Returns:
+        --------
+        (DataFrame, cursor) : Rows oldest first (None when there are none),
+                              and the cursor of the next older page, or None
+                              when this page reaches the start of the history
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        if self.store is not None:
+            return self.store.load_page(limit, before)
+        if not os.path.exists(self.history_file):
+            return None, None
+        return self._read_csv_page(limit, before)
+    
+    def _read_csv_page(self, limit, before):
+        """The `limit` CSV lines ending at byte offset `before` (end of file when None)"""
+        with open(self.history_file, 'rb') as f:
+            header = f.readline()
+            data_start = f.tell()
+            end = f.seek(0, os.SEEK_END) if before is None else before
+            
+            # Read whole blocks backwards until there are limit + 1 line breaks
+            # (the extra one marks where the first wanted line starts)
+            position, blocks, breaks = end, [], 0
+            while position > data_start and breaks <= limit:
+                size = min(TAIL_BLOCK_BYTES, position - data_start)
+                position -= size
+                f.seek(position)
+                block = f.read(size)
+                blocks.append(block)
+                breaks += block.count(b'\n')
+        
+        data = b''.join(reversed(blocks))
+        # A row still being appended by another writer has no line break yet
+        data = data[:data.rfind(b'\n') + 1]
+        lines = data.split(b'\n')[:-1]
+        if position > data_start:
+            lines = lines[1:]  # the first block starts mid-line
+        page = lines[-limit:]
+        
+        first = position + len(data) - sum(len(line) + 1 for line in page)
+        cursor = first if first > data_start else None
+        rows = [line for line in page if line.strip()]
+        if not rows:
+            return None, cursor
+        return _history_layout(pd.read_csv(io.BytesIO(header + b'\n'.join(rows) + b'\n'))), cursor
+    
+    def query_history(self, crop=None, start=None, end=None, limit=None):
+        """
+        History filtered by crop and an inclusive timestamp range
+        
+        SQLite answers from its crop and timestamp indexes. The CSV has no
+        index, so it is scanned in chunks: memory stays bounded by the
+        matches (the last `limit` of them), but the time still grows with the
+        history. Use the sqlite backend for frequent filtered queries.
+        
+        Parameters:
+        -----------
+        start, end : str, optional
+            'YYYY-MM-DD HH:MM:SS' bounds
+        limit : int, optional
+            Keep only the most recent `limit` matches
+        
+        Returns:
+        --------
+        DataFrame : Matching rows, oldest first
+        """
+        if self.store is not None:
+            return self.store.query(crop, start, end, limit)
+        
+        if not os.path.exists(self.history_file):
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        
+        matches = []
+        for chunk in pd.read_csv(self.history_file, chunksize=SCAN_CHUNK_ROWS):
+            chunk = _history_layout(chunk)
+            mask = pd.Series(True, index=chunk.index)
+            if crop is not None:
+                mask &= chunk['crop'] == crop
+            if start is not None:
+                mask &= chunk['timestamp'] >= start
+            if end is not None:
+                mask &= chunk['timestamp'] <= end
+            matches.append(chunk[mask])
+            if limit is not None:
+                # Only the most recent `limit` matches can survive the final cut
+                matches = [pd.concat(matches).sort_values('timestamp', kind='stable').tail(limit)]
+        
+        if not matches:
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+        df = pd.concat(matches).sort_values('timestamp', kind='stable')
+        return df.tail(limit) if limit is not None else df
+    
+    def compact_archive(self):
+        """
+        Copy history added since the last compaction into the Parquet archive
+        
+        Returns:
+        --------
+        dict : 'rows' archived, 'partitions' rewritten and 'seconds', or None
+               when a compaction is already running
+        """
+        if self.archive is None:
+            raise RuntimeError("The history archive is disabled or pyarrow is not installed")
+        return self.archive.compact(self._archive_source(), self._rows_since)
+    
+    def query_archive(self, columns=None, crop=None, start=None, end=None):
+        """
+        Archived history for analytics; reads only the partitions, row
+        groups and columns the filters need (see HistoryArchive.query)
+        """
+        if self.archive is None:
+            raise RuntimeError("The history archive is disabled or pyarrow is not installed")
+        return self.archive.query(columns, crop, start, end)
+    
+    def _archive_source(self):
+        """Identity of the live history; the archive is rebuilt when it changes"""
+        if self.store is not None:
+            return f'sqlite:{os.path.abspath(self.store.db_path)}'
+        # A recreated CSV (after clear_history or a header upgrade) gets a new inode, so byte offsets restart
+        inode = os.stat(self.history_file).st_ino if os.path.exists(self.history_file) else None
+        return f'csv:{os.path.abspath(self.history_file)}:{inode}'
+    
+    def _rows_since(self, position):
+        """History rows after `position` (a rowid, or a CSV byte offset) and the new position"""
+        if self.store is not None:
+            return self.store.rows_since(position)
+        if not os.path.exists(self.history_file):
+            return None, 0
+        
+        with open(self.history_file, 'rb') as f:
+            header = f.readline()
+            f.seek(max(position, f.tell()))
+            data = f.read()
+            start = f.tell() - len(data)
+        # Leave a row that is still being appended for the next run
+        data = data[:data.rfind(b'\n') + 1]
+        if not data.strip():
+            return None, start + len(data)
+        return _history_layout(pd.read_csv(io.BytesIO(header + data))), start + len(data)
     
     def clear_history(self):
         """Clear all historical data"""
-        if os.path.exists(self.history_file):
-            os.remove(self.history_file)
+        if self.archive is not None:
+            self.archive.clear()
+        if self.store is not None:
+            self.store.clear()
             return True
+        with self._history_lock():
+            if os.path.exists(self.stats_file):
+                os.remove(self.stats_file)
+            if os.path.exists(self.history_file):
+                os.remove(self.history_file)
+                return True
         return False
     
     def export_to_excel(self, filename='crop_predictions_export.xlsx'):
@@ -69,50 +370,46 @@ class DataHandler:
         return None
     
     def get_statistics(self):
-        """Get statistical summary"""
-        df = self.load_history()
-        
-        if df is None or df.empty:
-            return None
-        
-        stats = {
-            'total_predictions': len(df),
-            'crops_analyzed': df['crop'].nunique(),
-            'average_score': round(df['score'].mean(), 2),
-            'average_yield': round(df['estimated_yield'].mean(), 2),
-            'quality_distribution': df['quality'].value_counts().to_dict(),
-            'crop_distribution': df['crop'].value_counts().to_dict(),
-            'best_prediction': {
-                'score': df['score'].max(),
-                'crop': df.loc[df['score'].idxmax(), 'crop'],
-                'date': df.loc[df['score'].idxmax(), 'timestamp']
-            },
-            'worst_prediction': {
-                'score': df['score'].min(),
-                'crop': df.loc[df['score'].idxmin(), 'crop'],
-                'date': df.loc[df['score'].idxmin(), 'timestamp']
-            }
-        }
-        
-        if 'growth_duration' in df.columns and not df['growth_duration'].isna().all():
-            stats['average_growth_duration'] = round(df['growth_duration'].mean(), 1)
-        
-        return stats
+        """Get statistical summary of the whole history from the running aggregates"""
+        if self.store is not None:
+            return self.store.statistics()
+        with self._history_lock():
+            return self._csv_statistics().summary()
+    
+    def rebuild_statistics(self):
+        """Recompute the running statistics from the full history (recovery)"""
+        if self.store is not None:
+            return self.store.rebuild_statistics().summary()
+        with self._history_lock():
+            if os.path.exists(self.stats_file):
+                os.remove(self.stats_file)
+            return self._csv_statistics().summary()
+
+
+def _history_layout(df):
+    """Map rows read from any history file layout onto HISTORY_COLUMNS (extra columns go last)"""
+    if list(df.columns[:len(HISTORY_COLUMNS)]) == HISTORY_COLUMNS:
+        return df
+    return df.reindex(columns=HISTORY_COLUMNS + [column for column in df.columns if column not in HISTORY_COLUMNS])
 
 
 # Convenience functions
+@lru_cache(maxsize=None)
+def _default_handler():
+    """One DataHandler per process, so the SQLite import and archive setup run once"""
+    return DataHandler()
+
 def save_to_history(prediction, input_data):
-    handler = DataHandler()
-    return handler.save_prediction(prediction, input_data)
+    return _default_handler().save_prediction(prediction, input_data)
 
 def load_history(limit=100):
-    handler = DataHandler()
-    return handler.load_history(limit)
+    return _default_handler().load_history(limit)
+
+def load_history_page(limit=100, before=None):
+    return _default_handler().load_history_page(limit, before)
 
 def get_statistics():
-    handler = DataHandler()
-    return handler.get_statistics()
+    return _default_handler().get_statistics()
 
 def export_data(filename='export.xlsx'):
-    handler = DataHandler()
-    return handler.export_to_excel(filename)
\ No newline at end of file
+    return _default_handler().export_to_excel(filename)
\ No newline at end of file
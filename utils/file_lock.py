@@ -0,0 +1,54 @@
+"""
+Cross-process file locks
+"""
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+@contextmanager
+def file_lock(lock_path, blocking=True):
+    """
+    Exclusive lock on `lock_path` (created if missing) for the with-block
+    
+    Yields True when the lock is held; with blocking=False it yields False
+    instead of waiting when another process or thread holds it.
+    """
+    with open(lock_path, 'a+b') as lock_file:
+        if not _acquire(lock_file, blocking):
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            _release(lock_file)
+
+
+def _acquire(lock_file, blocking):
+    if fcntl is not None:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        return True
+    
+    lock_file.seek(0)
+    try:
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+    except OSError:
+        if blocking:
+            raise
+        return False
+    return True
+
+
+def _release(lock_file):
+    if fcntl is not None:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
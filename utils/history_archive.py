@@ -0,0 +1,282 @@
+"""
+Columnar prediction history archive
+Month-partitioned Parquet copy of the history for long-range analytics (needs pyarrow)
+"""
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from utils.file_lock import file_lock
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = ds = pq = None
+
+ARCHIVE_FORMAT_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+ARCHIVE_COLUMNS = ['timestamp', 'crop', 'nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity',
+                   'ph', 'rainfall', 'score', 'quality', 'estimated_yield', 'growth_duration']
+TEXT_COLUMNS = ('timestamp', 'crop', 'quality')
+
+# Upper bound on rows per row group; each crop starts a new row group
+ROW_GROUP_ROWS = 64_000
+
+_executor = None
+_pending = {}
+_last_compaction = {}
+_state_lock = threading.Lock()
+
+
+def archive_available():
+    return pa is not None
+
+
+def _schema():
+    return pa.schema([(column, pa.string() if column in TEXT_COLUMNS else pa.float64())
+                      for column in ARCHIVE_COLUMNS])
+
+
+class HistoryArchive:
+    """
+    Parquet archive of the prediction history, one partition per month
+    
+    compact() copies rows added to the live history since the last run
+    into their month's partition (month=YYYY-MM/...). Each partition is a
+    single file sorted by crop then timestamp, with one or more row groups
+    per crop and min/max statistics on every column. query() opens only
+    the partitions in the requested time range, reads only the requested
+    columns, and pushes the crop/time predicates down so row groups whose
+    statistics can't match are skipped.
+    
+    The manifest lists the live partition files and the position in the
+    source history (a rowid or a CSV byte offset) archived so far. It is
+    replaced atomically, so readers never see a half-written partition.
+    """
+    
+    def __init__(self, archive_dir):
+        if not archive_available():
+            raise ImportError("The history archive needs pyarrow: pip install pyarrow")
+        self.archive_dir = archive_dir
+        self.manifest_path = os.path.join(archive_dir, MANIFEST_FILE)
+        os.makedirs(archive_dir, exist_ok=True)
+    
+    def compact(self, source_id, read_since):
+        """
+        Archive the rows added since the last compaction
+        
+        Parameters:
+        -----------
+        source_id : str
+            Identifies the live history; when it changes the archive is rebuilt
+        read_since : callable
+            read_since(position) -> (DataFrame or None, new position)
+        
+        Returns:
+        --------
+        dict : 'rows' archived, 'partitions' rewritten, 'seconds', or None when
+               another compaction holds the lock
+        """
+        start = time.perf_counter()
+        with file_lock(os.path.join(self.archive_dir, '.lock'), blocking=False) as locked:
+            if not locked:
+                return None
+            
+            manifest = self._read_manifest()
+            if manifest['source'] != source_id:
+                self._remove_partitions()
+                manifest = _empty_manifest(source_id)
+            
+            rows, position = read_since(manifest['position'])
+            replaced = []
+            if rows is not None and len(rows):
+                rows = rows.reindex(columns=ARCHIVE_COLUMNS)
+                for month, month_rows in rows.groupby(rows['timestamp'].str[:7], sort=True):
+                    old = manifest['partitions'].get(month)
+                    manifest['partitions'][month] = self._write_partition(month, month_rows, old)
+                    if old is not None:
+                        replaced.append(old['file'])
+            
+            manifest['position'] = position
+            manifest['compacted_at'] = time.time()
+            self._write_manifest(manifest)
+            for path in replaced:
+                _remove(os.path.join(self.archive_dir, path))
+        
+        _last_compaction[self.archive_dir] = time.time()
+        return {
+            'rows': 0 if rows is None else len(rows),
+            'partitions': sorted(rows['timestamp'].str[:7].unique()) if rows is not None and len(rows) else [],
+            'seconds': round(time.perf_counter() - start, 3)
+        }
+    
+    def compact_in_background(self, source_id, read_since, interval_seconds=3600):
+        """
+        Start compact() on the background thread if the last run is older than `interval_seconds`
+        
+        Returns:
+        --------
+        Future or None : The running compaction, or None when none is due
+        """
+        with _state_lock:
+            global _executor
+            pending = _pending.get(self.archive_dir)
+            if pending is not None and not pending.done():
+                return pending
+            
+            last = _last_compaction.get(self.archive_dir)
+            if last is None:
+                last = self._read_manifest().get('compacted_at') or 0
+                _last_compaction[self.archive_dir] = last
+            if time.time() - last < interval_seconds:
+                return None
+            
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='history-compaction')
+            # Claim the slot now so concurrent saves don't queue duplicate runs
+            _last_compaction[self.archive_dir] = time.time()
+            future = _executor.submit(self._compact_quietly, source_id, read_since)
+            _pending[self.archive_dir] = future
+            return future
+    
+    def query(self, columns=None, crop=None, start=None, end=None):
+        """
+        Archived rows matching a crop and an inclusive timestamp range
+        
+        Parameters:
+        -----------
+        columns : list, optional
+            Columns to read; all when omitted
+        crop : str or list, optional
+            One crop or several
+        start, end : str, optional
+            'YYYY-MM-DD HH:MM:SS' bounds (prefixes like '2025-10' work too)
+        
+        Returns:
+        --------
+        DataFrame : Matching rows, oldest first when 'timestamp' is read
+        """
+        manifest = self._read_manifest()
+        files = [
+            os.path.join(self.archive_dir, part['file'])
+            for month, part in sorted(manifest['partitions'].items())
+            if (start is None or month >= start[:7]) and (end is None or month <= end[:7])
+        ]
+        columns = list(columns) if columns is not None else ARCHIVE_COLUMNS
+        if not files:
+            return pd.DataFrame(columns=columns)
+        
+        condition = None
+        if crop is not None:
+            crops = [crop] if isinstance(crop, str) else list(crop)
+            condition = _and(condition, ds.field('crop').isin(crops))
+        if start is not None:
+            condition = _and(condition, ds.field('timestamp') >= start)
+        if end is not None:
+            # A shorter bound like '2025-10' or '2025-10-31' covers that whole period
+            bound = end if len(end) >= 19 else end + '\uffff'
+            condition = _and(condition, ds.field('timestamp') <= bound)
+        
+        table = ds.dataset(files, schema=_schema(), format='parquet').to_table(columns=columns, filter=condition)
+        df = table.to_pandas()
+        if 'timestamp' in df.columns:
+            df = df.sort_values('timestamp', kind='stable', ignore_index=True)
+        return df
+    
+    def info(self):
+        """Partitions with their row counts, time range and file size"""
+        manifest = self._read_manifest()
+        partitions = []
+        for month, part in sorted(manifest['partitions'].items()):
+            path = os.path.join(self.archive_dir, part['file'])
+            partitions.append({**part, 'month': month,
+                               'bytes': os.path.getsize(path) if os.path.exists(path) else None})
+        return {
+            'source': manifest['source'],
+            'position': manifest['position'],
+            'compacted_at': manifest['compacted_at'],
+            'rows': sum(part['rows'] for part in partitions),
+            'bytes': sum(part['bytes'] or 0 for part in partitions),
+            'partitions': partitions
+        }
+    
+    def clear(self):
+        with file_lock(os.path.join(self.archive_dir, '.lock')):
+            self._remove_partitions()
+            self._write_manifest(_empty_manifest(None))
+        _last_compaction.pop(self.archive_dir, None)
+    
+    def _compact_quietly(self, source_id, read_since):
+        try:
+            return self.compact(source_id, read_since)
+        except Exception as e:
+            print(f"⚠️ History archive compaction failed: {e}")
+            return None
+    
+    def _write_partition(self, month, rows, old):
+        """Merge `rows` into a month's partition and write it as a new file"""
+        if old is not None:
+            existing = pq.read_table(os.path.join(self.archive_dir, old['file'])).to_pandas()
+            rows = pd.concat([existing, rows], ignore_index=True)
+        rows = rows.sort_values(['crop', 'timestamp'], kind='stable', ignore_index=True)
+        
+        relative = os.path.join(f'month={month}', f'part-{uuid.uuid4().hex[:12]}.parquet')
+        path = os.path.join(self.archive_dir, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        schema = _schema()
+        with pq.ParquetWriter(f'{path}.tmp', schema, compression='zstd', write_statistics=True) as writer:
+            for _, crop_rows in rows.groupby('crop', sort=True):
+                writer.write_table(pa.Table.from_pandas(crop_rows, schema=schema, preserve_index=False),
+                                   row_group_size=ROW_GROUP_ROWS)
+        os.replace(f'{path}.tmp', path)
+        
+        return {
+            'file': relative,
+            'rows': len(rows),
+            'min_timestamp': rows['timestamp'].min(),
+            'max_timestamp': rows['timestamp'].max()
+        }
+    
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return _empty_manifest(None)
+        if manifest.get('format_version') != ARCHIVE_FORMAT_VERSION:
+            return _empty_manifest(None)
+        return manifest
+    
+    def _write_manifest(self, manifest):
+        tmp_path = f'{self.manifest_path}.tmp-{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def _remove_partitions(self):
+        for name in os.listdir(self.archive_dir):
+            if name.startswith('month='):
+                shutil.rmtree(os.path.join(self.archive_dir, name), ignore_errors=True)
+
+
+def _empty_manifest(source_id):
+    return {'format_version': ARCHIVE_FORMAT_VERSION, 'source': source_id, 'position': 0,
+            'compacted_at': None, 'partitions': {}}
+
+
+def _and(condition, term):
+    return term if condition is None else condition & term
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
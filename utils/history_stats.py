@@ -0,0 +1,133 @@
+"""
+Running prediction history statistics
+Aggregates updated on every save so get_statistics never has to scan the history
+"""
+import math
+
+
+class RunningStatistics:
+    """
+    Counts, sums and best/worst rows of a prediction history
+    
+    add() folds in one record and add_frame() a chunk of rows, so the
+    same aggregate can be kept up to date on save or rebuilt from scratch.
+    On ties the earlier row stays best/worst, like idxmax/idxmin.
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.sums = {'score': 0.0, 'estimated_yield': 0.0, 'growth_duration': 0.0}
+        self.counts = {'score': 0, 'estimated_yield': 0, 'growth_duration': 0}
+        self.quality_counts = {}
+        self.crop_counts = {}
+        self.best = None
+        self.worst = None
+    
+    def add(self, record):
+        """Fold one history record (a dict with DataHandler's columns) into the totals"""
+        self.count += 1
+        crop = record.get('crop')
+        self.crop_counts[crop] = self.crop_counts.get(crop, 0) + 1
+        quality = record.get('quality')
+        if _present(quality):
+            self.quality_counts[quality] = self.quality_counts.get(quality, 0) + 1
+        
+        for column in self.sums:
+            value = record.get(column)
+            if _present(value):
+                self.sums[column] += float(value)
+                self.counts[column] += 1
+        
+        score = record.get('score')
+        if _present(score):
+            row = {'score': float(score), 'crop': crop, 'date': record.get('timestamp')}
+            if self.best is None or row['score'] > self.best['score']:
+                self.best = row
+            if self.worst is None or row['score'] < self.worst['score']:
+                self.worst = row
+    
+    def add_frame(self, df):
+        """Fold a DataFrame of history rows (in history order) into the totals"""
+        if df.empty:
+            return
+        self.count += len(df)
+        _merge_counts(self.crop_counts, df['crop'].value_counts())
+        if 'quality' in df.columns:
+            _merge_counts(self.quality_counts, df['quality'].value_counts())
+        
+        for column in self.sums:
+            if column in df.columns:
+                values = df[column].dropna()
+                self.sums[column] += float(values.sum())
+                self.counts[column] += len(values)
+        
+        if 'score' in df.columns and df['score'].notna().any():
+            best, worst = df.loc[df['score'].idxmax()], df.loc[df['score'].idxmin()]
+            if self.best is None or best['score'] > self.best['score']:
+                self.best = {'score': float(best['score']), 'crop': best['crop'], 'date': best['timestamp']}
+            if self.worst is None or worst['score'] < self.worst['score']:
+                self.worst = {'score': float(worst['score']), 'crop': worst['crop'], 'date': worst['timestamp']}
+    
+    def summary(self):
+        """The get_statistics dict, or None for an empty history"""
+        if self.count == 0:
+            return None
+        
+        stats = {
+            'total_predictions': self.count,
+            'crops_analyzed': len(self.crop_counts),
+            'average_score': self._mean('score', 2),
+            'average_yield': self._mean('estimated_yield', 2),
+            'quality_distribution': _by_count(self.quality_counts),
+            'crop_distribution': _by_count(self.crop_counts),
+            'best_prediction': dict(self.best) if self.best else None,
+            'worst_prediction': dict(self.worst) if self.worst else None
+        }
+        
+        if self.counts['growth_duration']:
+            stats['average_growth_duration'] = self._mean('growth_duration', 1)
+        
+        return stats
+    
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'sums': self.sums,
+            'counts': self.counts,
+            'quality_counts': self.quality_counts,
+            'crop_counts': self.crop_counts,
+            'best': self.best,
+            'worst': self.worst
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.count = data['count']
+        stats.sums.update(data['sums'])
+        stats.counts.update(data['counts'])
+        stats.quality_counts = dict(data['quality_counts'])
+        stats.crop_counts = dict(data['crop_counts'])
+        stats.best = data['best']
+        stats.worst = data['worst']
+        return stats
+    
+    def _mean(self, column, decimals):
+        if not self.counts[column]:
+            return None
+        return round(self.sums[column] / self.counts[column], decimals)
+
+
+def _present(value):
+    if value is None:
+        return False
+    return not (isinstance(value, float) and math.isnan(value))
+
+
+def _merge_counts(counts, value_counts):
+    for key, n in value_counts.items():
+        counts[key] = counts.get(key, 0) + int(n)
+
+
+def _by_count(counts):
+    return dict(sorted(counts.items(), key=lambda item: -item[1]))
@@ -0,0 +1,255 @@
+"""
+SQLite prediction history store
+Indexed history table so dashboards query and aggregate without parsing the whole history
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+import pandas as pd
+from utils.history_stats import RunningStatistics
+
+# Same order as DataHandler's CSV columns
+STORE_COLUMNS = ['timestamp', 'crop', 'nitrogen', 'phosphorus', 'potassium', 'temperature', 'humidity',
+                 'ph', 'rainfall', 'score', 'quality', 'estimated_yield', 'growth_duration']
+TEXT_COLUMNS = ('timestamp', 'crop', 'quality')
+
+# store_meta key of the running statistics, updated in the same transaction as each insert
+STATS_KEY = 'running_statistics'
+
+# Rows per executemany batch when importing a CSV
+IMPORT_CHUNK_ROWS = 50_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    crop TEXT NOT NULL,
+    nitrogen REAL,
+    phosphorus REAL,
+    potassium REAL,
+    temperature REAL,
+    humidity REAL,
+    ph REAL,
+    rainfall REAL,
+    score REAL,
+    quality TEXT,
+    estimated_yield REAL,
+    growth_duration REAL
+);
+CREATE INDEX IF NOT EXISTS idx_predictions_timestamp ON predictions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_predictions_crop ON predictions (crop);
+CREATE INDEX IF NOT EXISTS idx_predictions_score ON predictions (score);
+CREATE INDEX IF NOT EXISTS idx_predictions_quality ON predictions (quality);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_INSERT = (f"INSERT INTO predictions ({', '.join(STORE_COLUMNS)}) "
+           f"VALUES ({', '.join('?' for _ in STORE_COLUMNS)})")
+
+
+class SQLiteHistoryStore:
+    """
+    Prediction history in one SQLite table (WAL mode)
+    
+    Readers never block the writer. The timestamp and crop indexes serve
+    range filters and per-crop queries. Statistics come from running
+    aggregates kept in store_meta and updated in each insert's
+    transaction; the crop, quality and score indexes keep a rebuild from
+    SQL aggregates cheap.
+    """
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._ready = False
+    
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            if not self._ready:
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.executescript(_SCHEMA)
+                self._ready = True
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    
+    def append(self, record):
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            stats = self._read_stats(conn)
+            conn.execute(_INSERT, [record.get(column) for column in STORE_COLUMNS])
+            if stats is None:
+                stats = self._aggregate(conn)
+            else:
+                stats.add(record)
+            self._write_stats(conn, stats)
+    
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+    
+    def load(self, limit=100):
+        """Most recent `limit` rows, oldest first, or None when the store is empty"""
+        return self.load_page(limit)[0]
+    
+    def load_page(self, limit=100, before=None):
+        """
+        Keyset page of the `limit` rows before rowid `before` (newest when None)
+        
+        Returns:
+        --------
+        (DataFrame, cursor) : Rows oldest first (None when there are none) and
+                              the `before` of the next older page, or None
+        """
+        where, params = ('WHERE id < ?', [before]) if before is not None else ('', [])
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, {', '.join(STORE_COLUMNS)} FROM predictions {where} ORDER BY id DESC LIMIT ?",
+                params + [limit + 1]
+            ).fetchall()
+        
+        cursor = rows[limit - 1][0] if len(rows) > limit else None
+        rows = [row[1:] for row in reversed(rows[:limit])]
+        return (_to_frame(rows) if rows else None), cursor
+    
+    def rows_since(self, after_id):
+        """Rows with rowid > after_id in insert order, and the last rowid read"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id, {', '.join(STORE_COLUMNS)} FROM predictions WHERE id > ? ORDER BY id", (after_id,)
+            ).fetchall()
+        if not rows:
+            return None, after_id
+        return _to_frame([row[1:] for row in rows]), rows[-1][0]
+    
+    def query(self, crop=None, start=None, end=None, limit=None):
+        """
+        Rows filtered by crop and timestamp range, oldest first
+        
+        Parameters:
+        -----------
+        start, end : str, optional
+            Inclusive 'YYYY-MM-DD HH:MM:SS' bounds (a date prefix also works for start)
+        limit : int, optional
+            Keep only the most recent `limit` matches
+        """
+        where, params = [], []
+        if crop is not None:
+            where.append('crop = ?')
+            params.append(crop)
+        if start is not None:
+            where.append('timestamp >= ?')
+            params.append(start)
+        if end is not None:
+            where.append('timestamp <= ?')
+            params.append(end)
+        clause = f"WHERE {' AND '.join(where)}" if where else ''
+        
+        sql = f"SELECT {', '.join(STORE_COLUMNS)} FROM predictions {clause} ORDER BY timestamp, id"
+        if limit is not None:
+            sql = (f"SELECT {', '.join(STORE_COLUMNS)} FROM (SELECT * FROM predictions {clause} "
+                   f"ORDER BY timestamp DESC, id DESC LIMIT ?) ORDER BY timestamp, id")
+            params.append(limit)
+        
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return _to_frame(rows)
+    
+    def statistics(self):
+        """DataHandler.get_statistics from the running aggregates (O(1))"""
+        with self._connect() as conn:
+            stats = self._read_stats(conn)
+        if stats is None:
+            stats = self.rebuild_statistics()
+        return stats.summary()
+    
+    def rebuild_statistics(self):
+        """Recompute the running aggregates from the table with SQL aggregates"""
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            stats = self._aggregate(conn)
+            self._write_stats(conn, stats)
+        return stats
+    
+    def _aggregate(self, conn):
+        stats = RunningStatistics()
+        row = conn.execute(
+            "SELECT COUNT(*), SUM(score), COUNT(score), SUM(estimated_yield), COUNT(estimated_yield), "
+            "SUM(growth_duration), COUNT(growth_duration) FROM predictions"
+        ).fetchone()
+        stats.count = row[0]
+        for i, column in enumerate(('score', 'estimated_yield', 'growth_duration')):
+            stats.sums[column] = row[1 + 2 * i] or 0.0
+            stats.counts[column] = row[2 + 2 * i]
+        
+        stats.crop_counts = dict(conn.execute("SELECT crop, COUNT(*) FROM predictions GROUP BY crop"))
+        stats.quality_counts = dict(conn.execute(
+            "SELECT quality, COUNT(*) FROM predictions WHERE quality IS NOT NULL GROUP BY quality"
+        ))
+        for name, order in (('best', 'DESC'), ('worst', 'ASC')):
+            row = conn.execute(
+                f"SELECT score, crop, timestamp FROM predictions WHERE score IS NOT NULL "
+                f"ORDER BY score {order}, id LIMIT 1"
+            ).fetchone()
+            setattr(stats, name, {'score': row[0], 'crop': row[1], 'date': row[2]} if row else None)
+        return stats
+    
+    def _read_stats(self, conn):
+        row = conn.execute("SELECT value FROM store_meta WHERE key = ?", (STATS_KEY,)).fetchone()
+        return RunningStatistics.from_dict(json.loads(row[0])) if row else None
+    
+    def _write_stats(self, conn, stats):
+        conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)",
+                     (STATS_KEY, json.dumps(stats.to_dict())))
+    
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM predictions")
+            self._write_stats(conn, RunningStatistics())
+    
+    def import_csv(self, csv_path, force=False):
+        """
+        Copy a CSV history file into the store
+        
+        Each CSV is imported once: the import is recorded in the same
+        transaction, so concurrent callers or a later call don't duplicate
+        rows (unless `force`).
+        
+        Returns:
+        --------
+        int : Rows imported
+        """
+        marker = f'imported:{os.path.abspath(csv_path)}'
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            if not force and conn.execute("SELECT 1 FROM store_meta WHERE key = ?", (marker,)).fetchone():
+                return 0
+            
+            imported = 0
+            chunks = pd.read_csv(csv_path, chunksize=IMPORT_CHUNK_ROWS) if os.path.getsize(csv_path) else []
+            for chunk in chunks:
+                chunk = chunk.reindex(columns=STORE_COLUMNS).astype(object)
+                chunk = chunk.where(chunk.notna(), None)
+                conn.executemany(_INSERT, chunk.itertuples(index=False, name=None))
+                imported += len(chunk)
+            
+            conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES (?, ?)", (marker, str(time.time())))
+            self._write_stats(conn, self._aggregate(conn))
+        
+        print(f"📥 Imported {imported} history rows from {csv_path}")
+        return imported
+
+
+def _to_frame(rows):
+    df = pd.DataFrame(rows, columns=STORE_COLUMNS)
+    numeric = [column for column in STORE_COLUMNS if column not in TEXT_COLUMNS]
+    df[numeric] = df[numeric].astype('float64')
+    return df
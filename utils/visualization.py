@@ -543,4 +543,70 @@ def create_recommendation_chart(recommendation_data, font_size=14):
         ]
     )
     
+    return fig
+
+
+def create_sensitivity_line_chart(sweep, metric='quality_score', font_size=12):
+    """Create line chart for a 1-D what-if sweep with dark theme"""
+    custom_theme = CHART_THEME.copy()
+    custom_theme['font']['size'] = font_size
+    
+    fig = go.Figure()
+    
+    fig.add_trace(go.Scatter(
+        x=sweep['values'],
+        y=sweep[metric],
+        mode='lines+markers',
+        line=dict(color='#10b981', width=3),
+        marker=dict(size=6, color='#84cc16'),
+        hovertemplate=f"<b>{sweep['param']}: %{{x}}</b><br>{metric}: %{{y:.2f}}<extra></extra>"
+    ))
+    
+    fig.update_layout(
+        paper_bgcolor=custom_theme['paper_bgcolor'],
+        plot_bgcolor=custom_theme['plot_bgcolor'],
+        font=custom_theme['font'],
+        title=dict(
+            text=f"Sensitivity of {metric.replace('_', ' ').title()} to {sweep['param'].title()}",
+            font=dict(color='#10b981', size=font_size+4)
+        ),
+        xaxis=dict(title=sweep['param'].title(), gridcolor=custom_theme['gridcolor'], color='white'),
+        yaxis=dict(title=metric.replace('_', ' ').title(), gridcolor=custom_theme['gridcolor'], color='white'),
+        height=400,
+        showlegend=False
+    )
+    
+    return fig
+
+
+def create_sensitivity_heatmap(surface, metric='quality_score', font_size=12):
+    """Create heatmap for a 2-D what-if response surface with dark theme"""
+    custom_theme = CHART_THEME.copy()
+    custom_theme['font']['size'] = font_size
+    
+    fig = go.Figure()
+    
+    fig.add_trace(go.Heatmap(
+        x=surface['x'],
+        y=surface['y'],
+        z=surface[metric],
+        colorscale='Viridis',
+        colorbar=dict(title=metric.replace('_', ' ').title()),
+        hovertemplate=(f"{surface['x_param']}: %{{x}}<br>{surface['y_param']}: %{{y}}"
+                       f"<br>{metric}: %{{z:.2f}}<extra></extra>")
+    ))
+    
+    fig.update_layout(
+        paper_bgcolor=custom_theme['paper_bgcolor'],
+        plot_bgcolor=custom_theme['plot_bgcolor'],
+        font=custom_theme['font'],
+        title=dict(
+            text=f"{surface['x_param'].title()} × {surface['y_param'].title()} Response Surface",
+            font=dict(color='#10b981', size=font_size+4)
+        ),
+        xaxis=dict(title=surface['x_param'].title(), color='white'),
+        yaxis=dict(title=surface['y_param'].title(), color='white'),
+        height=450
+    )
+    
     return fig
\ No newline at end of file